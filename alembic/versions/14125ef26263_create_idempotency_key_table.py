@@ -0,0 +1,60 @@
+"""create idempotency key table
+
+Revision ID: 14125ef26263
+Revises: 8c75f1b1266f
+Create Date: 2026-10-18 11:41:52.903114
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "14125ef26263"
+down_revision: Union[str, Sequence[str], None] = "8c75f1b1266f"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "idempotency_key",
+        sa.Column("key", sa.String(length=255), nullable=False),
+        sa.Column("wallet_uuid", sa.String(), nullable=False),
+        sa.Column(
+            "operation_type",
+            postgresql.ENUM(name="operationtype", create_type=False),
+            nullable=False,
+        ),
+        sa.Column("amount", sa.Numeric(precision=18, scale=2), nullable=False),
+        sa.Column("new_balance", sa.Numeric(precision=18, scale=2), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("key"),
+        schema="wallet",
+    )
+    op.create_index(
+        "ix_idempotency_key_created_at",
+        "idempotency_key",
+        ["created_at"],
+        schema="wallet",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_idempotency_key_created_at",
+        table_name="idempotency_key",
+        schema="wallet",
+    )
+    op.drop_table("idempotency_key", schema="wallet")
@@ -0,0 +1,56 @@
+"""add operation created_at and wallet history index
+
+Revision ID: 1c14c8b9969d
+Revises: 50a085bf1ccf
+Create Date: 2026-10-18 10:12:41.218305
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "1c14c8b9969d"
+down_revision: Union[str, Sequence[str], None] = "50a085bf1ccf"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # now() is evaluated once, so existing rows get the migration time
+    # without a table rewrite
+    op.add_column(
+        "operation",
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        schema="wallet",
+    )
+
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_operation_wallet_uuid_id",
+            "operation",
+            ["wallet_uuid", "id"],
+            schema="wallet",
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_operation_wallet_uuid_id",
+            table_name="operation",
+            schema="wallet",
+            postgresql_concurrently=True,
+        )
+    op.drop_column("operation", "created_at", schema="wallet")
@@ -0,0 +1,77 @@
+"""record the money mode and store money as bigint minor units in minor_units mode
+
+Revision ID: 5d3a7c0e9b21
+Revises: 14125ef26263
+Create Date: 2026-10-18 14:05:37.218406
+
+The mode is taken from MONEY_MODE once, when this revision is applied, and
+recorded in ``wallet.schema_setting``: the later migrations type their money
+columns after the recorded mode and the app refuses to start with another
+one. The conversion is a no-op in "decimal" mode. To switch an existing
+database, downgrade past this revision and upgrade again with the new mode.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from database.models.schema_setting import MONEY_MODE_SETTING, migrated_money_mode
+from settings import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5d3a7c0e9b21"
+down_revision: Union[str, Sequence[str], None] = "14125ef26263"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONEY_COLUMNS = [
+    ("wallet", "balance"),
+    ("operation", "amount"),
+    ("idempotency_key", "amount"),
+    ("idempotency_key", "new_balance"),
+    ("balance_checkpoint", "balance"),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    schema_setting = op.create_table(
+        "schema_setting",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("value", sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+        schema="wallet",
+    )
+    op.bulk_insert(
+        schema_setting, [{"name": MONEY_MODE_SETTING, "value": settings.MONEY_MODE}]
+    )
+    if settings.MONEY_MODE != "minor_units":
+        return
+    for table, column in MONEY_COLUMNS:
+        op.alter_column(
+            table,
+            column,
+            type_=sa.BigInteger(),
+            existing_type=sa.Numeric(precision=18, scale=2),
+            postgresql_using=f"round({column} * 100)::bigint",
+            schema="wallet",
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = None if context.is_offline_mode() else op.get_bind()
+    if migrated_money_mode(bind) == "minor_units":
+        for table, column in MONEY_COLUMNS:
+            op.alter_column(
+                table,
+                column,
+                type_=sa.Numeric(precision=18, scale=2),
+                existing_type=sa.BigInteger(),
+                postgresql_using=f"({column} / 100.0)::numeric(18, 2)",
+                schema="wallet",
+            )
+    op.drop_table("schema_setting", schema="wallet")
@@ -0,0 +1,46 @@
+"""create balance checkpoint table
+
+Revision ID: 8c75f1b1266f
+Revises: 1c14c8b9969d
+Create Date: 2026-10-18 11:03:17.540912
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8c75f1b1266f"
+down_revision: Union[str, Sequence[str], None] = "1c14c8b9969d"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "balance_checkpoint",
+        sa.Column("wallet_uuid", sa.String(), nullable=False),
+        sa.Column("last_operation_id", sa.Integer(), nullable=False),
+        sa.Column("balance", sa.Numeric(precision=18, scale=2), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["wallet_uuid"],
+            ["wallet.wallet.uuid"],
+        ),
+        sa.PrimaryKeyConstraint("wallet_uuid"),
+        schema="wallet",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("balance_checkpoint", schema="wallet")
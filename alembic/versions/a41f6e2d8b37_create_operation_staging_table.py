@@ -0,0 +1,66 @@
+"""create operation staging table for the write-behind ledger
+
+Revision ID: a41f6e2d8b37
+Revises: 5d3a7c0e9b21
+Create Date: 2026-10-18 15:12:04.633918
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+from database.models.schema_setting import migrated_money_column_type
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a41f6e2d8b37"
+down_revision: Union[str, Sequence[str], None] = "5d3a7c0e9b21"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = None if context.is_offline_mode() else op.get_bind()
+    amount_type = migrated_money_column_type(bind)
+    op.create_table(
+        "operation_staging",
+        sa.Column(
+            "id",
+            sa.Integer(),
+            server_default=sa.text("nextval('wallet.operation_id_seq')"),
+            nullable=False,
+        ),
+        sa.Column("wallet_uuid", sa.String(), nullable=False),
+        sa.Column(
+            "operation_type",
+            postgresql.ENUM(
+                "DEPOSIT", "WITHDRAW", name="operationtype", create_type=False
+            ),
+            nullable=False,
+        ),
+        sa.Column("amount", amount_type, nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        schema="wallet",
+    )
+    # History pages and exports read staged rows through the ledger view
+    op.create_index(
+        "ix_operation_staging_wallet_uuid_id",
+        "operation_staging",
+        ["wallet_uuid", "id"],
+        schema="wallet",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("operation_staging", schema="wallet")
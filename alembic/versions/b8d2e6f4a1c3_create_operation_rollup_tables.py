@@ -0,0 +1,72 @@
+"""create operation rollup tables
+
+Revision ID: b8d2e6f4a1c3
+Revises: f3c9a1d7b5e2
+Create Date: 2026-10-18 20:41:09.362114
+
+The rollups start empty with the checkpoint at operation 0; the rollup job
+then folds in the existing ledger batch by batch.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from database.models.schema_setting import migrated_money_column_type
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b8d2e6f4a1c3"
+down_revision: Union[str, Sequence[str], None] = "f3c9a1d7b5e2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = None if context.is_offline_mode() else op.get_bind()
+    money_type = migrated_money_column_type(bind)
+    op.create_table(
+        "operation_rollup",
+        sa.Column("wallet_uuid", sa.Uuid(), nullable=False),
+        sa.Column(
+            "granularity",
+            sa.Enum("DAY", "MONTH", name="rollupgranularity"),
+            nullable=False,
+        ),
+        sa.Column("bucket", sa.Date(), nullable=False),
+        sa.Column("deposits", money_type, nullable=False),
+        sa.Column("withdrawals", money_type, nullable=False),
+        sa.Column("operations_count", sa.BigInteger(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["wallet_uuid"],
+            ["wallet.wallet.uuid"],
+        ),
+        sa.PrimaryKeyConstraint("wallet_uuid", "granularity", "bucket"),
+        schema="wallet",
+    )
+    rollup_checkpoint = op.create_table(
+        "rollup_checkpoint",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("last_operation_id", sa.BigInteger(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("name"),
+        schema="wallet",
+    )
+    op.bulk_insert(
+        rollup_checkpoint, [{"name": "operation_rollup", "last_operation_id": 0}]
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("rollup_checkpoint", schema="wallet")
+    op.drop_table("operation_rollup", schema="wallet")
+    op.execute("DROP TYPE rollupgranularity")
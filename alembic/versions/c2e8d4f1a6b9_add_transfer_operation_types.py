@@ -0,0 +1,32 @@
+"""add TRANSFER and TRANSFER_IN operation types
+
+Revision ID: c2e8d4f1a6b9
+Revises: a41f6e2d8b37
+Create Date: 2026-10-18 16:20:51.904172
+
+Postgres cannot drop enum values, so the downgrade leaves them in place.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c2e8d4f1a6b9"
+down_revision: Union[str, Sequence[str], None] = "a41f6e2d8b37"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # New enum values can not be used in the transaction that adds them
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE operationtype ADD VALUE IF NOT EXISTS 'TRANSFER'")
+        op.execute("ALTER TYPE operationtype ADD VALUE IF NOT EXISTS 'TRANSFER_IN'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
@@ -0,0 +1,125 @@
+"""ledger transaction ids and a transaction id rollup checkpoint
+
+Revision ID: c5f1a8e3d7b4
+Revises: b8d2e6f4a1c3
+Create Date: 2026-10-19 10:12:37.208415
+
+Ledger rows record the id of the transaction writing them (``txid``) and the
+rollup checkpoint becomes a transaction id: the rollup job folds in rows of
+finished transactions only, instead of rows older than a safety lag, which
+a transaction committing later than the lag could still slip under.
+
+Existing rows keep a NULL ``txid``, so adding the column rewrites nothing.
+With the ledger tables locked, every such row is committed: the ones after
+the old id checkpoint are folded in here and the new checkpoint starts at
+the oldest transaction still running, whose rows will carry a ``txid``.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c5f1a8e3d7b4"
+down_revision: Union[str, Sequence[str], None] = "b8d2e6f4a1c3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+LEDGER_TABLES = ["operation", "operation_staging"]
+
+CURRENT_TXID = "pg_current_xact_id()::text::bigint"
+
+FOLD_ROWS_AFTER_CHECKPOINT = """
+INSERT INTO wallet.operation_rollup
+    (wallet_uuid, granularity, bucket, deposits, withdrawals, operations_count)
+SELECT
+    ledger.wallet_uuid,
+    granularity,
+    date_trunc(lower(granularity::text), timezone('UTC', ledger.created_at))::date,
+    sum(CASE WHEN ledger.operation_type IN ('DEPOSIT', 'TRANSFER_IN')
+        THEN ledger.amount ELSE 0 END),
+    sum(CASE WHEN ledger.operation_type IN ('WITHDRAW', 'TRANSFER')
+        THEN ledger.amount ELSE 0 END),
+    count(*)
+FROM (
+    SELECT id, wallet_uuid, operation_type, amount, created_at
+    FROM wallet.operation
+    UNION ALL
+    SELECT id, wallet_uuid, operation_type, amount, created_at
+    FROM wallet.operation_staging
+) AS ledger
+CROSS JOIN unnest(enum_range(NULL::rollupgranularity)) AS granularity
+WHERE ledger.id > (
+    SELECT last_operation_id FROM wallet.rollup_checkpoint
+    WHERE name = 'operation_rollup'
+)
+GROUP BY 1, 2, 3
+ON CONFLICT (wallet_uuid, granularity, bucket) DO UPDATE SET
+    deposits = operation_rollup.deposits + EXCLUDED.deposits,
+    withdrawals = operation_rollup.withdrawals + EXCLUDED.withdrawals,
+    operations_count = operation_rollup.operations_count + EXCLUDED.operations_count
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Waits for the writers in flight; later ones get a txid
+    op.execute(
+        "LOCK TABLE wallet.operation, wallet.operation_staging"
+        " IN ACCESS EXCLUSIVE MODE"
+    )
+    for table in LEDGER_TABLES:
+        op.add_column(table, sa.Column("txid", sa.BigInteger()), schema="wallet")
+        op.alter_column(
+            table,
+            "txid",
+            server_default=sa.text(CURRENT_TXID),
+            schema="wallet",
+        )
+    op.create_index(
+        "ix_operation_txid",
+        "operation",
+        ["txid"],
+        schema="wallet",
+        postgresql_using="brin",
+    )
+
+    op.execute(FOLD_ROWS_AFTER_CHECKPOINT)
+    op.add_column(
+        "rollup_checkpoint",
+        sa.Column("next_txid", sa.BigInteger()),
+        schema="wallet",
+    )
+    op.execute(
+        "UPDATE wallet.rollup_checkpoint"
+        " SET next_txid = pg_snapshot_xmin(pg_current_snapshot())::text::bigint,"
+        " updated_at = now()"
+    )
+    op.alter_column("rollup_checkpoint", "next_txid", nullable=False, schema="wallet")
+    op.drop_column("rollup_checkpoint", "last_operation_id", schema="wallet")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column(
+        "rollup_checkpoint",
+        sa.Column("last_operation_id", sa.BigInteger()),
+        schema="wallet",
+    )
+    # The last id of the folded rows; folded and pending rows interleave by
+    # id, so the id checkpoint can only approximate the txid one
+    op.execute(
+        "UPDATE wallet.rollup_checkpoint SET last_operation_id = ("
+        " SELECT coalesce(max(id), 0) FROM wallet.operation"
+        " WHERE txid IS NULL OR txid < rollup_checkpoint.next_txid)"
+    )
+    op.alter_column(
+        "rollup_checkpoint", "last_operation_id", nullable=False, schema="wallet"
+    )
+    op.drop_column("rollup_checkpoint", "next_txid", schema="wallet")
+    op.drop_index("ix_operation_txid", "operation", schema="wallet")
+    for table in LEDGER_TABLES:
+        op.drop_column(table, "txid", schema="wallet")
@@ -0,0 +1,46 @@
+"""transaction id balance checkpoints
+
+Revision ID: d9a4b2c6e8f1
+Revises: c5f1a8e3d7b4
+Create Date: 2026-10-19 11:03:52.716284
+
+Balance checkpoints cover the operations of transactions below
+``next_txid`` instead of operations up to an id that lagged behind the
+snapshot by a safety interval. The id checkpoints cannot be translated, so
+they are dropped and the next reconciliation scans the whole ledger once.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d9a4b2c6e8f1"
+down_revision: Union[str, Sequence[str], None] = "c5f1a8e3d7b4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("DELETE FROM wallet.balance_checkpoint")
+    op.drop_column("balance_checkpoint", "last_operation_id", schema="wallet")
+    op.add_column(
+        "balance_checkpoint",
+        sa.Column("next_txid", sa.BigInteger(), nullable=False),
+        schema="wallet",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM wallet.balance_checkpoint")
+    op.drop_column("balance_checkpoint", "next_txid", schema="wallet")
+    op.add_column(
+        "balance_checkpoint",
+        sa.Column("last_operation_id", sa.BigInteger(), nullable=False),
+        schema="wallet",
+    )
@@ -0,0 +1,43 @@
+"""slot count on the wallet row
+
+Revision ID: e1c7b3f9a2d5
+Revises: d9a4b2c6e8f1
+Create Date: 2026-10-19 16:21:08.394152
+
+Slot-mode operations check the count in the statement applying them
+instead of looking for ``wallet_slot`` rows in a transaction of their own.
+The constant default makes adding the column a catalog-only change.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e1c7b3f9a2d5"
+down_revision: Union[str, Sequence[str], None] = "d9a4b2c6e8f1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "wallet",
+        sa.Column("slots", sa.Integer(), server_default=sa.text("0"), nullable=False),
+        schema="wallet",
+    )
+    op.execute(
+        "UPDATE wallet.wallet SET slots = counted.slots"
+        " FROM (SELECT wallet_uuid, count(*) AS slots FROM wallet.wallet_slot"
+        " GROUP BY wallet_uuid) AS counted"
+        " WHERE wallet.uuid = counted.wallet_uuid"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("wallet", "slots", schema="wallet")
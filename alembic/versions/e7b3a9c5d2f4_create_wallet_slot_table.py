@@ -0,0 +1,44 @@
+"""create wallet slot table
+
+Revision ID: e7b3a9c5d2f4
+Revises: c2e8d4f1a6b9
+Create Date: 2026-10-18 17:34:12.085317
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from database.models.schema_setting import migrated_money_column_type
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e7b3a9c5d2f4"
+down_revision: Union[str, Sequence[str], None] = "c2e8d4f1a6b9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = None if context.is_offline_mode() else op.get_bind()
+    balance_type = migrated_money_column_type(bind)
+    op.create_table(
+        "wallet_slot",
+        sa.Column("wallet_uuid", sa.String(), nullable=False),
+        sa.Column("slot", sa.Integer(), nullable=False),
+        sa.Column("balance", balance_type, nullable=False),
+        sa.ForeignKeyConstraint(
+            ["wallet_uuid"],
+            ["wallet.wallet.uuid"],
+        ),
+        sa.PrimaryKeyConstraint("wallet_uuid", "slot"),
+        schema="wallet",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("wallet_slot", schema="wallet")
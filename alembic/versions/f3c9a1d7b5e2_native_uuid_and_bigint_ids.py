@@ -0,0 +1,116 @@
+"""native uuid wallet keys, bigint operation ids and covering history index
+
+Revision ID: f3c9a1d7b5e2
+Revises: e7b3a9c5d2f4
+Create Date: 2026-10-18 19:02:44.517930
+
+Every column holding a wallet UUID becomes ``uuid`` (16 bytes instead of a
+37-byte varchar), the operation ids become ``bigint`` and the history index
+carries the listed columns, so a history page is an index-only scan.
+
+The type changes rewrite the tables under an exclusive lock; run this in a
+maintenance window. The wallet row gets no covering index: ``balance``
+changes on every operation, so indexing it would turn the HOT updates of
+the wallet row into index writes, and the native key already halves the
+primary key.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f3c9a1d7b5e2"
+down_revision: Union[str, Sequence[str], None] = "e7b3a9c5d2f4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+WALLET_UUID_COLUMNS = [
+    ("wallet", "uuid"),
+    ("operation", "wallet_uuid"),
+    ("operation_staging", "wallet_uuid"),
+    ("idempotency_key", "wallet_uuid"),
+    ("balance_checkpoint", "wallet_uuid"),
+    ("wallet_slot", "wallet_uuid"),
+]
+
+OPERATION_ID_COLUMNS = [
+    ("operation", "id"),
+    ("operation_staging", "id"),
+    ("balance_checkpoint", "last_operation_id"),
+]
+
+# Default constraint names of the foreign keys to wallet.uuid
+WALLET_FOREIGN_KEYS = [
+    ("operation", "operation_wallet_uuid_fkey"),
+    ("balance_checkpoint", "balance_checkpoint_wallet_uuid_fkey"),
+    ("wallet_slot", "wallet_slot_wallet_uuid_fkey"),
+]
+
+
+def drop_wallet_foreign_keys() -> None:
+    for table, name in WALLET_FOREIGN_KEYS:
+        op.drop_constraint(name, table, type_="foreignkey", schema="wallet")
+
+
+def create_wallet_foreign_keys() -> None:
+    for table, name in WALLET_FOREIGN_KEYS:
+        op.create_foreign_key(
+            name,
+            table,
+            "wallet",
+            ["wallet_uuid"],
+            ["uuid"],
+            source_schema="wallet",
+            referent_schema="wallet",
+        )
+
+
+def alter_column_types(wallet_uuid_type: str, operation_id_type: str) -> None:
+    """Retype the columns with one ALTER TABLE, so one rewrite, per table."""
+    changes = [
+        (table, column, wallet_uuid_type) for table, column in WALLET_UUID_COLUMNS
+    ] + [
+        (table, column, operation_id_type) for table, column in OPERATION_ID_COLUMNS
+    ]
+    clauses: dict[str, list[str]] = {}
+    for table, column, type_ in changes:
+        clauses.setdefault(table, []).append(
+            f"ALTER COLUMN {column} TYPE {type_} USING {column}::{type_}"
+        )
+    for table, table_clauses in clauses.items():
+        op.execute(f"ALTER TABLE wallet.{table} {', '.join(table_clauses)}")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Dropped before the rewrite instead of being rebuilt by it
+    op.drop_index("ix_operation_wallet_uuid_id", "operation", schema="wallet")
+    drop_wallet_foreign_keys()
+    alter_column_types("uuid", "bigint")
+    op.execute("ALTER SEQUENCE wallet.operation_id_seq AS bigint")
+    create_wallet_foreign_keys()
+    op.create_index(
+        "ix_operation_wallet_uuid_id",
+        "operation",
+        ["wallet_uuid", "id"],
+        schema="wallet",
+        postgresql_include=["operation_type", "amount", "created_at"],
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_operation_wallet_uuid_id", "operation", schema="wallet")
+    drop_wallet_foreign_keys()
+    alter_column_types("varchar", "integer")
+    op.execute("ALTER SEQUENCE wallet.operation_id_seq AS integer")
+    create_wallet_foreign_keys()
+    op.create_index(
+        "ix_operation_wallet_uuid_id",
+        "operation",
+        ["wallet_uuid", "id"],
+        schema="wallet",
+    )
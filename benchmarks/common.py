@@ -0,0 +1,39 @@
+"""Shared helpers for the benchmark scripts.
+
+The scripts talk to the Postgres instance configured in ``.env`` (the same
+settings the service uses), so run ``alembic upgrade head`` first.
+"""
+
+import json
+import os
+import sys
+import uuid
+
+SRC_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+sys.path.insert(0, SRC_DIR)
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, round(pct / 100 * (len(ordered) - 1)))
+    return ordered[index]
+
+
+def latency_summary(latencies: list[float]) -> dict:
+    """p50/p95/p99 of latencies given in seconds, reported in milliseconds."""
+    return {
+        f"p{pct}_ms": round(percentile(latencies, pct) * 1000, 3)
+        for pct in (50, 95, 99)
+    }
+
+
+async def create_wallet(dao, initial_balance: float = 0) -> str:
+    wallet_uuid = str(uuid.uuid4())
+    await dao.create_wallet(wallet_uuid, initial_balance)
+    return wallet_uuid
+
+
+def report(name: str, results) -> None:
+    print(json.dumps({"benchmark": name, "results": results}, indent=2))
@@ -0,0 +1,41 @@
+"""Compare two load_test.py reports, e.g. from two commits.
+
+    python benchmarks/compare.py before.json after.json
+"""
+
+import argparse
+import json
+
+METRICS = ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+
+
+def change(before: float, after: float) -> str:
+    if not before:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+def main(args) -> None:
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    print(f"{before['commit'][:10]} -> {after['commit'][:10]}")
+    for name, result in after["scenarios"].items():
+        baseline = before["scenarios"].get(name)
+        if baseline is None:
+            continue
+        print(name)
+        for metric in METRICS:
+            print(
+                f"  {metric:<16}{baseline[metric]:>12}{result[metric]:>12}"
+                f"  {change(baseline[metric], result[metric])}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("before")
+    parser.add_argument("after")
+    main(parser.parse_args())
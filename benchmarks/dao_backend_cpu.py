@@ -0,0 +1,69 @@
+"""Compare client-side CPU per request of the "sqlalchemy" and "asyncpg" DAOs.
+
+Requests run one at a time, so process CPU time divided by the request
+count is the Python overhead of building statements and reading results;
+the time spent waiting for Postgres is not counted.
+
+    python benchmarks/dao_backend_cpu.py --requests 5000
+"""
+
+import argparse
+import asyncio
+import time
+
+from common import create_wallet, report
+
+from database.asyncpg_pool import close_asyncpg_pool, open_asyncpg_pool
+from database.core import async_session_maker, shutdown_db
+from database.dao.asyncpg_wallet_dao import AsyncpgWalletDAO
+from database.dao.wallet_dao import WalletDAO
+from database.models.withdraw import OperationType
+
+
+async def cpu_per_request(requests: int, call) -> dict:
+    # Warm-up: connections, statement caches
+    for _ in range(min(requests, 100)):
+        await call()
+
+    cpu_started = time.process_time()
+    wall_started = time.perf_counter()
+    for _ in range(requests):
+        await call()
+    cpu = time.process_time() - cpu_started
+    wall = time.perf_counter() - wall_started
+    return {
+        "cpu_us_per_request": round(cpu / requests * 1e6, 1),
+        "wall_us_per_request": round(wall / requests * 1e6, 1),
+    }
+
+
+async def measure(dao: WalletDAO, requests: int) -> dict:
+    wallet_uuid = await create_wallet(dao, initial_balance=requests)
+    return {
+        "get_balance": await cpu_per_request(
+            requests, lambda: dao.get_balance(wallet_uuid)
+        ),
+        "process_operation": await cpu_per_request(
+            requests,
+            lambda: dao.process_operation(wallet_uuid, OperationType.DEPOSIT, 1),
+        ),
+    }
+
+
+async def main(args) -> None:
+    await open_asyncpg_pool()
+    results = {
+        "sqlalchemy": await measure(WalletDAO(async_session_maker), args.requests),
+        "asyncpg": await measure(
+            AsyncpgWalletDAO(async_session_maker), args.requests
+        ),
+    }
+    await close_asyncpg_pool()
+    await shutdown_db()
+    report("dao_backend_cpu", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    asyncio.run(main(parser.parse_args()))
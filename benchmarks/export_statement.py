@@ -0,0 +1,79 @@
+"""Stream a large wallet statement and report rows/sec and peak RSS.
+
+Seeds ``--rows`` ledger rows for a fresh wallet with one server-side
+INSERT ... SELECT, then consumes the NDJSON/CSV export exactly as the
+endpoint produces it.
+
+    python benchmarks/export_statement.py --rows 10000000 --format ndjson
+"""
+
+import argparse
+import asyncio
+import resource
+import time
+
+from common import create_wallet, report
+from sqlalchemy import text
+
+from database.core import async_session_maker, shutdown_db
+from database.dao.wallet_dao import WalletDAO
+from settings import settings
+from usecases.export_wallet_operations_usecase import (
+    ExportFormat,
+    ExportWalletOperationsUseCase,
+)
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def seed(wallet_uuid: str, rows: int) -> None:
+    async with async_session_maker() as session:
+        await session.execute(
+            text(
+                "INSERT INTO wallet.operation (wallet_uuid, operation_type, amount) "
+                "SELECT :wallet_uuid, 'DEPOSIT', 1 FROM generate_series(1, :rows)"
+            ),
+            {"wallet_uuid": wallet_uuid, "rows": rows},
+        )
+        await session.commit()
+
+
+async def main(args) -> None:
+    dao = WalletDAO(async_session_maker)
+    wallet_uuid = await create_wallet(dao)
+    await seed(wallet_uuid, args.rows)
+
+    usecase = ExportWalletOperationsUseCase(dao, args.chunk_size)
+    rss_before = peak_rss_mb()
+    started = time.perf_counter()
+    exported_bytes = 0
+    async for chunk in await usecase.execute(wallet_uuid, ExportFormat(args.format)):
+        exported_bytes += len(chunk)
+    elapsed = time.perf_counter() - started
+
+    await shutdown_db()
+    report(
+        "export_statement",
+        {
+            "rows": args.rows,
+            "format": args.format,
+            "chunk_size": args.chunk_size,
+            "seconds": round(elapsed, 2),
+            "rows_per_sec": round(args.rows / elapsed),
+            "exported_mb": round(exported_bytes / 2**20, 1),
+            "peak_rss_mb_before": round(rss_before, 1),
+            "peak_rss_mb_after": round(peak_rss_mb(), 1),
+        },
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--format", choices=["ndjson", "csv"], default="ndjson")
+    parser.add_argument(
+        "--chunk-size", type=int, default=settings.OPERATIONS_EXPORT_CHUNK_SIZE
+    )
+    asyncio.run(main(parser.parse_args()))
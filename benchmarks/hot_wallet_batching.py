@@ -0,0 +1,70 @@
+"""Deposits per second on a single hot wallet, with and without batching.
+
+    python benchmarks/hot_wallet_batching.py --operations 5000 --concurrency 200
+"""
+
+import argparse
+import asyncio
+import time
+
+from common import create_wallet, report
+
+from database.core import async_session_maker, shutdown_db
+from database.dao.wallet_dao import WalletDAO
+from database.models.withdraw import OperationType
+from services.operation_batcher import OperationBatcher
+
+
+async def run(submit, operations: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await submit(OperationType.DEPOSIT, 1)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(operations)))
+    return operations / (time.perf_counter() - started)
+
+
+async def main(args) -> None:
+    dao = WalletDAO(async_session_maker)
+    results = []
+
+    wallet_uuid = await create_wallet(dao)
+    ops_per_sec = await run(
+        lambda t, a: dao.process_operation(wallet_uuid, t, a),
+        args.operations,
+        args.concurrency,
+    )
+    results.append({"mode": "direct", "ops_per_sec": round(ops_per_sec, 1)})
+
+    for window_ms in args.windows:
+        wallet_uuid = await create_wallet(dao)
+        batcher = OperationBatcher(
+            dao, window=window_ms / 1000, max_batch_size=args.max_batch_size
+        )
+        ops_per_sec = await run(
+            lambda t, a: batcher.submit(wallet_uuid, t, a),
+            args.operations,
+            args.concurrency,
+        )
+        results.append(
+            {
+                "mode": "batched",
+                "window_ms": window_ms,
+                "ops_per_sec": round(ops_per_sec, 1),
+            }
+        )
+
+    await shutdown_db()
+    report("hot_wallet_batching", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--operations", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--max-batch-size", type=int, default=100)
+    parser.add_argument("--windows", type=float, nargs="+", default=[1, 2, 5])
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,272 @@
+"""Load test of the real service against a throwaway Postgres.
+
+Starts Postgres (``--postgres docker|initdb``, or ``existing`` to use the
+``DB_*`` variables from the environment), applies the migrations, runs
+``app:app`` under uvicorn and drives it over HTTP through these scenarios:
+
+* ``uniform``: deposits on wallets picked uniformly at random
+* ``hot_wallet``: deposits and withdrawals on one wallet
+* ``mixed_read_write``: 50 balance reads per operation, random wallets
+* ``withdraw_heavy``: withdrawals mostly failing with insufficient funds
+* ``create_burst``: concurrent wallet creation
+
+Each scenario reports throughput, p50/p95/p99 latency, status codes and
+the pool checkout and wallet lock wait accrued during it, as read from
+``/internal``. With several workers those figures come from whichever
+worker answered, so they are only exact with ``--workers 1``.
+
+    python benchmarks/load_test.py --postgres docker --output before.json
+    python benchmarks/compare.py before.json after.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import httpx
+from common import SRC_DIR, latency_summary, report
+from local_postgres import docker_postgres, initdb_postgres
+
+ROOT_DIR = os.path.dirname(SRC_DIR)
+API_URL = "/api/v1"
+WALLET_URL = f"{API_URL}/wallet"
+
+
+@contextmanager
+def postgres(kind: str, port: int):
+    if kind == "docker":
+        with docker_postgres(port) as env:
+            yield env
+    elif kind == "initdb":
+        with initdb_postgres(port) as env:
+            yield env
+    else:
+        yield {}
+
+
+@contextmanager
+def service(env: dict, port: int, workers: int):
+    subprocess.run(
+        [sys.executable, "-m", "alembic", "upgrade", "head"],
+        cwd=ROOT_DIR,
+        env=env,
+        check=True,
+        capture_output=True,
+    )
+    process = subprocess.Popen(
+        [
+            sys.executable, "-m", "uvicorn", "app:app",
+            "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers), "--log-level", "warning",
+        ],
+        cwd=SRC_DIR,
+        env=env,
+    )  # fmt: skip
+    try:
+        base_url = f"http://127.0.0.1:{port}"
+        deadline = time.monotonic() + 60
+        while True:
+            try:
+                httpx.get(f"{base_url}/openapi.json").raise_for_status()
+                break
+            except httpx.HTTPError:
+                if process.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("service did not start")
+                time.sleep(0.2)
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+
+async def create_wallets(
+    client: httpx.AsyncClient, count: int, balance: float
+) -> list[str]:
+    if balance:
+        body = {
+            "wallets": [
+                {"wallet_uuid": str(uuid.uuid4()), "initial_balance": balance}
+                for _ in range(count)
+            ]
+        }
+    else:
+        body = {"count": count}
+    response = await client.post(f"{WALLET_URL}/bulk", json=body)
+    response.raise_for_status()
+    return [json.loads(line)["wallet_uuid"] for line in response.text.splitlines()]
+
+
+def operation(client, wallet_uuid: str, operation_type: str, amount: float):
+    return client.post(
+        f"{WALLET_URL}/{wallet_uuid}/operation",
+        json={"operation_type": operation_type, "amount": amount},
+    )
+
+
+async def uniform(client, args):
+    wallets = await create_wallets(client, args.wallets, 0)
+    return lambda rng: operation(client, rng.choice(wallets), "DEPOSIT", 1)
+
+
+async def hot_wallet(client, args):
+    (wallet_uuid,) = await create_wallets(client, 1, args.requests)
+    return lambda rng: operation(
+        client, wallet_uuid, rng.choice(("DEPOSIT", "WITHDRAW")), 1
+    )
+
+
+async def mixed_read_write(client, args):
+    wallets = await create_wallets(client, args.wallets, 0)
+
+    def request(rng):
+        wallet_uuid = rng.choice(wallets)
+        if rng.randrange(51) == 0:
+            return operation(client, wallet_uuid, "DEPOSIT", 1)
+        return client.get(f"{WALLET_URL}/{wallet_uuid}")
+
+    return request
+
+
+async def withdraw_heavy(client, args):
+    wallets = await create_wallets(client, args.wallets, 100)
+
+    def request(rng):
+        operation_type = "DEPOSIT" if rng.randrange(10) == 0 else "WITHDRAW"
+        return operation(client, rng.choice(wallets), operation_type, 25)
+
+    return request
+
+
+async def create_burst(client, args):
+    return lambda rng: client.post(f"{WALLET_URL}/")
+
+
+SCENARIOS = {
+    "uniform": uniform,
+    "hot_wallet": hot_wallet,
+    "mixed_read_write": mixed_read_write,
+    "withdraw_heavy": withdraw_heavy,
+    "create_burst": create_burst,
+}
+
+
+async def internal_stats(client: httpx.AsyncClient) -> dict:
+    pool = (await client.get(f"{API_URL}/internal/pool")).json()["sqlalchemy"]
+    locks = (await client.get(f"{API_URL}/internal/locks")).json()["wallet_locks"]
+    return {"pool": pool, "locks": locks or {}}
+
+
+def wait_delta(before: dict, after: dict, count_key: str) -> dict:
+    if not after:
+        return {}
+    count = after[count_key] - before.get(count_key, 0)
+    wait_total = after["wait_time_total"] - before.get("wait_time_total", 0.0)
+    return {
+        count_key: count,
+        "wait_ms_total": round(wait_total * 1000, 3),
+        "wait_ms_avg": round(wait_total / count * 1000, 3) if count else 0.0,
+        "wait_ms_max_since_start": round(after["wait_time_max"] * 1000, 3),
+    }
+
+
+async def run_scenario(client: httpx.AsyncClient, name: str, args) -> dict:
+    request = await SCENARIOS[name](client, args)
+    rng = random.Random(args.seed)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            response = await request(rng)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+
+    before = await internal_stats(client)
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.requests)))
+    elapsed = time.perf_counter() - started
+    after = await internal_stats(client)
+
+    pool = wait_delta(before["pool"], after["pool"], "checkouts")
+    pool["timeouts"] = after["pool"]["timeouts"] - before["pool"]["timeouts"]
+    return {
+        "requests": args.requests,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(args.requests / elapsed, 1),
+        **latency_summary(latencies),
+        "status_codes": {str(code): n for code, n in sorted(statuses.items())},
+        "pool": pool,
+        "locks": wait_delta(before["locks"], after["locks"], "acquisitions"),
+    }
+
+
+def git_commit() -> str:
+    result = subprocess.run(
+        ["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True
+    )
+    return result.stdout.strip()
+
+
+async def main(args) -> None:
+    with postgres(args.postgres, args.db_port) as env:
+        env = {
+            **os.environ,
+            **env,
+            "APP_HOST": "127.0.0.1",
+            "APP_PORT": str(args.app_port),
+            "APP_RELOAD": "False",
+            "DEBUG": "False",
+        }
+        with service(env, args.app_port, args.workers) as base_url:
+            limits = httpx.Limits(max_connections=args.concurrency)
+            async with httpx.AsyncClient(
+                base_url=base_url, limits=limits, timeout=60
+            ) as client:
+                results = {
+                    name: await run_scenario(client, name, args)
+                    for name in args.scenarios
+                }
+
+    output = {
+        "commit": git_commit(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            name: getattr(args, name)
+            for name in ("requests", "concurrency", "wallets", "workers", "seed")
+        },
+        "scenarios": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+    report("load_test", output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--postgres", choices=("docker", "initdb", "existing"), default="docker"
+    )
+    parser.add_argument("--db-port", type=int, default=55432)
+    parser.add_argument("--app-port", type=int, default=59000)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--wallets", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=tuple(SCENARIOS), default=tuple(SCENARIOS)
+    )
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,150 @@
+"""Throwaway Postgres instances for the load test.
+
+``docker_postgres`` runs a disposable ``postgres:16`` container and
+``initdb_postgres`` a temporary cluster from the local Postgres binaries;
+``initdb_postgres_with_replica`` adds a streaming replica of the latter.
+All yield the ``DB_*`` environment variables the service reads and remove
+everything on exit.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Iterator
+
+DB_NAME = "wallet"
+DB_USER = "postgres"
+DB_PASSWORD = "postgres"
+MAX_CONNECTIONS = 500
+
+
+def db_env(port: int) -> dict[str, str]:
+    return {
+        "DB_HOST_POSTGRES": "127.0.0.1",
+        "DB_HOST_POSTGRES_LOCAL": "127.0.0.1",
+        "DB_PORT_POSTGRES": str(port),
+        "DB_NAME_POSTGRES": DB_NAME,
+        "DB_USERNAME_POSTGRES": DB_USER,
+        "DB_PASSWORD_POSTGRES": DB_PASSWORD,
+    }
+
+
+def _wait_until(check, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while subprocess.run(check, capture_output=True).returncode != 0:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Postgres did not become ready: {' '.join(check)}")
+        time.sleep(0.5)
+
+
+@contextmanager
+def docker_postgres(port: int, image: str = "postgres:16") -> Iterator[dict]:
+    name = f"wallet_bench_{uuid.uuid4().hex[:8]}"
+    subprocess.run(
+        [
+            "docker", "run", "-d", "--rm", "--name", name,
+            "-p", f"127.0.0.1:{port}:5432",
+            "-e", f"POSTGRES_DB={DB_NAME}",
+            "-e", f"POSTGRES_USER={DB_USER}",
+            "-e", f"POSTGRES_PASSWORD={DB_PASSWORD}",
+            image, "-c", f"max_connections={MAX_CONNECTIONS}",
+        ],
+        check=True,
+        capture_output=True,
+    )  # fmt: skip
+    try:
+        # TCP only accepts connections once the init scripts are done
+        _wait_until(
+            ["docker", "exec", name, "pg_isready", "-h", "127.0.0.1", "-U", DB_USER]
+        )
+        yield db_env(port)
+    finally:
+        subprocess.run(["docker", "rm", "-f", name], capture_output=True)
+
+
+@contextmanager
+def initdb_postgres(port: int) -> Iterator[dict]:
+    data_dir = tempfile.mkdtemp(prefix="wallet_bench_")
+    fd, password_file = tempfile.mkstemp(suffix=".pw")
+    with os.fdopen(fd, "w") as f:
+        f.write(DB_PASSWORD)
+    try:
+        subprocess.run(
+            [
+                "initdb", "-D", data_dir, "-U", DB_USER,
+                "--auth=md5", f"--pwfile={password_file}",
+            ],
+            check=True,
+            capture_output=True,
+        )  # fmt: skip
+        subprocess.run(
+            [
+                "pg_ctl", "-D", data_dir, "-w", "-l", os.path.join(data_dir, "log"),
+                "-o", f"-p {port} -k {data_dir} -c listen_addresses=127.0.0.1"
+                f" -c max_connections={MAX_CONNECTIONS}",
+                "start",
+            ],
+            check=True,
+            capture_output=True,
+        )  # fmt: skip
+        try:
+            subprocess.run(
+                ["createdb", "-h", "127.0.0.1", "-p", str(port), "-U", DB_USER,
+                 DB_NAME],  # fmt: skip
+                check=True,
+                capture_output=True,
+                env={**os.environ, "PGPASSWORD": DB_PASSWORD},
+            )
+            yield db_env(port)
+        finally:
+            subprocess.run(
+                ["pg_ctl", "-D", data_dir, "-m", "fast", "stop"], capture_output=True
+            )
+    finally:
+        os.remove(password_file)
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+@contextmanager
+def initdb_postgres_with_replica(port: int, replica_port: int) -> Iterator[dict]:
+    with initdb_postgres(port) as env:
+        data_dir = tempfile.mkdtemp(prefix="wallet_bench_replica_")
+        try:
+            # -R writes standby.signal and primary_conninfo
+            subprocess.run(
+                [
+                    "pg_basebackup", "-h", "127.0.0.1", "-p", str(port),
+                    "-U", DB_USER, "-D", data_dir, "-X", "stream", "-R",
+                ],
+                check=True,
+                capture_output=True,
+                env={**os.environ, "PGPASSWORD": DB_PASSWORD},
+            )  # fmt: skip
+            subprocess.run(
+                [
+                    "pg_ctl", "-D", data_dir, "-w", "-l", os.path.join(data_dir, "log"),
+                    "-o", f"-p {replica_port} -k {data_dir}"
+                    " -c listen_addresses=127.0.0.1"
+                    f" -c max_connections={MAX_CONNECTIONS}",
+                    "start",
+                ],
+                check=True,
+                capture_output=True,
+            )  # fmt: skip
+            try:
+                yield {
+                    **env,
+                    "DB_HOST_POSTGRES_REPLICA": "127.0.0.1",
+                    "DB_PORT_POSTGRES_REPLICA": str(replica_port),
+                }
+            finally:
+                subprocess.run(
+                    ["pg_ctl", "-D", data_dir, "-m", "fast", "stop"],
+                    capture_output=True,
+                )
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
@@ -0,0 +1,96 @@
+"""Requests/sec of GET /wallet/{uuid} with the old and new middleware stacks.
+
+"legacy" is the previous ``@app.middleware("http")`` (BaseHTTPMiddleware)
+logging and global-responses wrappers, "asgi" the pure ASGI replacements.
+The balance use case is replaced with a constant so that only the HTTP and
+middleware stack is measured; requests are sent in-process over ASGI.
+
+    python benchmarks/middleware_stack.py --requests 20000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+import uuid
+
+import httpx
+from common import report
+from fastapi import FastAPI, Request, Response
+
+import app as app_module
+from dependencies import get_wallet_balance_usecase
+from settings import settings
+
+
+class ConstantBalanceUseCase:
+    async def execute(self, wallet_uuid: str) -> float:
+        return 100.0
+
+
+def register_legacy_middleware(app: FastAPI) -> None:
+    @app.middleware("http")
+    async def log_request_and_timing(request: Request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        end_time = time.time()
+        logging.debug(
+            f"Method: {request.method}, URL: {request.url}, "
+            f"Time: {end_time - start_time:=.2f} sec",
+        )
+        return response
+
+    @app.middleware("http")
+    async def global_response_middleware(request, call_next):
+        response: Response = await call_next(request)
+        if response.status_code == 404:
+            response.body = b"Page not found"
+        elif response.status_code == 500:
+            response.body = b"Internal server error"
+        return response
+
+
+def build_app(stack: str) -> FastAPI:
+    asgi = stack == "asgi"
+    settings.MIDDLEWARE_TIMING_ENABLED = asgi
+    settings.MIDDLEWARE_GLOBAL_RESPONSES_ENABLED = asgi
+    app = app_module.create_app()
+    if not asgi:
+        register_legacy_middleware(app)
+    app.dependency_overrides[get_wallet_balance_usecase] = ConstantBalanceUseCase
+    return app
+
+
+async def measure(app: FastAPI, requests: int, concurrency: int) -> dict:
+    url = f"{settings.APP_URL}/wallet/{uuid.uuid4()}"
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+
+        async def one():
+            async with semaphore:
+                response = await client.get(url)
+                response.raise_for_status()
+
+        await asyncio.gather(*(one() for _ in range(min(requests, 500))))
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    return {"requests_per_sec": round(requests / elapsed, 1)}
+
+
+async def main(args) -> None:
+    results = {
+        stack: await measure(build_app(stack), args.requests, args.concurrency)
+        for stack in ("legacy", "asgi")
+    }
+    report("middleware_stack", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
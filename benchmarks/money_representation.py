@@ -0,0 +1,101 @@
+"""Compare the "decimal" and "minor_units" money representations.
+
+CPU: process time per operation of the money handling on the request path
+(request validation, parsing, the balance arithmetic and response
+serialization), without a database.
+
+Size: table and index size of ``--rows`` ledger-like rows stored as
+``NUMERIC(18, 2)`` and as ``BIGINT``, in temporary tables on the Postgres
+from ``.env``. Skip it with ``--skip-db``.
+
+    python benchmarks/money_representation.py --operations 200000 --rows 1000000
+"""
+
+import argparse
+import asyncio
+import time
+
+import asyncpg
+from common import report
+from pydantic import BaseModel
+
+from database.dao.wallet_dao import apply_operation
+from database.models.withdraw import OperationType
+from money import MONEY_MODES
+from settings import settings
+
+
+def cpu_per_operation(codec, operations: int) -> float:
+    class OperationRequest(BaseModel):
+        operation_type: OperationType
+        amount: codec.amount_type
+
+    class OperationResponse(BaseModel):
+        new_balance: codec.balance_type
+
+    body = b'{"operation_type": "DEPOSIT", "amount": 125}'
+    balance = codec.parse(0)
+
+    started = time.process_time()
+    for _ in range(operations):
+        request = OperationRequest.model_validate_json(body)
+        balance = apply_operation(
+            balance, request.operation_type, codec.parse(request.amount)
+        )
+        OperationResponse(new_balance=codec.to_api(balance)).model_dump_json()
+    return (time.process_time() - started) / operations
+
+
+async def storage_size(rows: int) -> dict:
+    connection = await asyncpg.connect(settings.db_dsn_postgres)
+    results = {}
+    try:
+        for mode, column_type in (
+            ("decimal", "NUMERIC(18, 2)"),
+            ("minor_units", "BIGINT"),
+        ):
+            table = f"money_{mode}"
+            cents = "(random() * 1000000)::bigint"
+            value = f"{cents} / 100.0" if mode == "decimal" else cents
+            await connection.execute(
+                f"CREATE TEMP TABLE {table} (id BIGINT, amount {column_type})"
+            )
+            await connection.execute(
+                f"INSERT INTO {table} SELECT i, {value}"
+                f" FROM generate_series(1, {rows}) AS i"
+            )
+            await connection.execute(f"CREATE INDEX ON {table} (amount)")
+            await connection.execute(f"VACUUM ANALYZE {table}")
+            table_size, index_size = await connection.fetchrow(
+                f"SELECT pg_relation_size('{table}'), pg_indexes_size('{table}')"
+            )
+            results[mode] = {
+                "table_mb": round(table_size / 2**20, 2),
+                "index_mb": round(index_size / 2**20, 2),
+            }
+    finally:
+        await connection.close()
+    return results
+
+
+async def main(args) -> None:
+    results = {
+        mode: {
+            "cpu_us_per_operation": round(
+                cpu_per_operation(codec, args.operations) * 1e6, 2
+            )
+        }
+        for mode, codec in MONEY_MODES.items()
+    }
+    if not args.skip_db:
+        for mode, sizes in (await storage_size(args.rows)).items():
+            results[mode].update(sizes)
+    report("money_representation", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--operations", type=int, default=200000)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--skip-db", action="store_true")
+    asyncio.run(main(parser.parse_args()))
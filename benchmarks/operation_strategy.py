@@ -0,0 +1,66 @@
+"""Compare the "for_update" and "single_statement" operation strategies.
+
+For each strategy the script reports p50/p95/p99 latency of uncontended
+operations and the throughput of concurrent operations on one wallet. The
+hot wallet row is held by one transaction at a time, so the mean row-lock
+hold time is the inverse of that throughput.
+
+    python benchmarks/operation_strategy.py --operations 2000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import time
+
+from common import create_wallet, latency_summary, report
+
+from database.core import async_session_maker, shutdown_db
+from database.dao.wallet_dao import WalletDAO
+from database.models.withdraw import OperationType
+
+
+async def measure(dao: WalletDAO, operations: int, concurrency: int) -> dict:
+    wallet_uuid = await create_wallet(dao, initial_balance=operations)
+
+    latencies = []
+    for i in range(operations):
+        operation_type = OperationType.DEPOSIT if i % 2 else OperationType.WITHDRAW
+        started = time.perf_counter()
+        await dao.process_operation(wallet_uuid, operation_type, 1)
+        latencies.append(time.perf_counter() - started)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await dao.process_operation(wallet_uuid, OperationType.DEPOSIT, 1)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(operations)))
+    ops_per_sec = operations / (time.perf_counter() - started)
+
+    return {
+        **latency_summary(latencies),
+        "hot_wallet_ops_per_sec": round(ops_per_sec, 1),
+        "mean_lock_hold_ms": round(1000 / ops_per_sec, 3),
+    }
+
+
+async def main(args) -> None:
+    results = {}
+    for strategy in (
+        WalletDAO.STRATEGY_FOR_UPDATE,
+        WalletDAO.STRATEGY_SINGLE_STATEMENT,
+    ):
+        dao = WalletDAO(async_session_maker, strategy)
+        results[strategy] = await measure(dao, args.operations, args.concurrency)
+
+    await shutdown_db()
+    report("operation_strategy", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--operations", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,153 @@
+"""Check read routing against a local primary and streaming replica.
+
+Starts both with ``initdb_postgres_with_replica`` and the service on top,
+then:
+
+* ``read_your_writes``: every balance read right after a deposit on the
+  same wallet must see it, although the replica may still be behind;
+* ``replica_reads``: reads of wallets not written by the worker go to the
+  replica once its lag is known;
+* ``lag_fallback``: with WAL replay paused on the replica
+  (``pg_wal_replay_pause()``) and the primary still being written, the lag
+  passes ``REPLICA_MAX_LAG_SECONDS`` and reads fall back to the primary;
+  they go back to the replica once replay resumes.
+
+Figures come from ``/internal/replica`` of the single worker.
+
+    python benchmarks/replica_routing.py --reads 2000
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+import asyncpg
+import httpx
+from common import report
+from load_test import API_URL, create_wallets, operation, service
+from local_postgres import (
+    DB_NAME,
+    DB_PASSWORD,
+    DB_USER,
+    initdb_postgres_with_replica,
+)
+
+MAX_LAG_SECONDS = 1.0
+
+
+async def replica_stats(client: httpx.AsyncClient) -> dict:
+    return (await client.get(f"{API_URL}/internal/replica")).json()["replica"]
+
+
+async def wait_for(client: httpx.AsyncClient, check, timeout: float = 30.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        stats = await replica_stats(client)
+        if check(stats):
+            return stats
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"replica stats did not settle: {stats}")
+        await asyncio.sleep(0.2)
+
+
+def routed(before: dict, after: dict) -> dict:
+    return {
+        key: after[key] - before[key]
+        for key in ("replica_reads", "primary_reads", "fallbacks")
+    }
+
+
+async def read_your_writes(client: httpx.AsyncClient, reads: int) -> dict:
+    (wallet_uuid,) = await create_wallets(client, 1, 0)
+    stale = 0
+    before = await replica_stats(client)
+    for expected in range(1, reads + 1):
+        (await operation(client, wallet_uuid, "DEPOSIT", 1)).raise_for_status()
+        response = await client.get(f"{API_URL}/wallet/{wallet_uuid}")
+        stale += response.json()["balance"] != expected
+    return {"stale_reads": stale, **routed(before, await replica_stats(client))}
+
+
+async def replica_reads(client: httpx.AsyncClient, wallets: list[str]) -> dict:
+    before = await replica_stats(client)
+    for wallet_uuid in wallets:
+        (await client.get(f"{API_URL}/wallet/{wallet_uuid}")).raise_for_status()
+    return routed(before, await replica_stats(client))
+
+
+async def lag_fallback(
+    client: httpx.AsyncClient, replica_dsn: str, wallets: list[str]
+) -> dict:
+    replica = await asyncpg.connect(replica_dsn)
+    try:
+        await replica.execute("SELECT pg_wal_replay_pause()")
+        writer = await create_wallets(client, 1, 0)
+
+        async def keep_writing():
+            while True:
+                await operation(client, writer[0], "DEPOSIT", 1)
+                await asyncio.sleep(0.05)
+
+        writing = asyncio.create_task(keep_writing())
+        try:
+            paused = await wait_for(client, lambda stats: not stats["healthy"])
+            during_pause = await replica_reads(client, wallets)
+        finally:
+            writing.cancel()
+        await replica.execute("SELECT pg_wal_replay_resume()")
+        resumed = await wait_for(client, lambda stats: stats["healthy"])
+        after_resume = await replica_reads(client, wallets)
+    finally:
+        await replica.close()
+    return {
+        "lag_seconds_when_unhealthy": paused["lag_seconds"],
+        "lag_seconds_after_resume": resumed["lag_seconds"],
+        "during_pause": during_pause,
+        "after_resume": after_resume,
+    }
+
+
+async def run(base_url: str, replica_dsn: str, args) -> dict:
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+        await wait_for(client, lambda stats: stats["lag_seconds"] is not None)
+        wallets = await create_wallets(client, args.wallets, 0)
+        # Let the creations leave the read-your-writes window
+        await asyncio.sleep(args.window + 0.5)
+        return {
+            "read_your_writes": await read_your_writes(client, args.reads),
+            "replica_reads": await replica_reads(client, wallets),
+            "lag_fallback": await lag_fallback(client, replica_dsn, wallets),
+        }
+
+
+def main(args) -> None:
+    with initdb_postgres_with_replica(args.db_port, args.replica_port) as env:
+        env = {
+            **os.environ,
+            **env,
+            "APP_HOST": "127.0.0.1",
+            "APP_PORT": str(args.app_port),
+            "APP_RELOAD": "False",
+            "DEBUG": "False",
+            "REPLICA_MAX_LAG_SECONDS": str(MAX_LAG_SECONDS),
+            "READ_YOUR_WRITES_WINDOW_SECONDS": str(args.window),
+        }
+        replica_dsn = (
+            f"postgresql://{DB_USER}:{DB_PASSWORD}"
+            f"@127.0.0.1:{args.replica_port}/{DB_NAME}"
+        )
+        with service(env, args.app_port, workers=1) as base_url:
+            results = asyncio.run(run(base_url, replica_dsn, args))
+    report("replica_routing", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--wallets", type=int, default=1000)
+    parser.add_argument("--window", type=float, default=2.0)
+    parser.add_argument("--app-port", type=int, default=59000)
+    parser.add_argument("--db-port", type=int, default=55432)
+    parser.add_argument("--replica-port", type=int, default=55433)
+    main(parser.parse_args())
@@ -0,0 +1,101 @@
+"""Concurrent transfers in both directions between a few hot wallets.
+
+Every transfer picks two distinct wallets out of ``--wallets`` at random, so
+each pair sees transfers both ways at the same time. The script reports
+throughput, p50/p95/p99 latency, deadlocks (there must be none) and
+whether the total balance was conserved, for:
+
+* ``transfer``: ``WalletDAO.transfer``, one statement locking both rows
+  in UUID order;
+* ``two_calls``: a WITHDRAW followed by a DEPOSIT, the two-request
+  transfer it replaces.
+
+    python benchmarks/transfer_contention.py --transfers 5000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+
+from common import create_wallet, latency_summary, report
+from sqlalchemy import func, select
+from sqlalchemy.exc import DBAPIError
+
+from database.core import async_session_maker, shutdown_db
+from database.dao.wallet_dao import WalletDAO
+from database.models.wallet import wallets
+from database.models.withdraw import OperationType
+from exceptions import BaseSystemException
+
+
+async def total_balance(wallet_uuids: list[str]):
+    async with async_session_maker() as session:
+        return await session.scalar(
+            select(func.sum(wallets.c.balance)).where(wallets.c.uuid.in_(wallet_uuids))
+        )
+
+
+async def two_calls(dao: WalletDAO, source: str, target: str, amount: int) -> None:
+    await dao.process_operation(source, OperationType.WITHDRAW, amount)
+    await dao.process_operation(target, OperationType.DEPOSIT, amount)
+
+
+async def measure(dao: WalletDAO, mode: str, args) -> dict:
+    wallet_uuids = [
+        await create_wallet(dao, initial_balance=args.transfers)
+        for _ in range(args.wallets)
+    ]
+    before = await total_balance(wallet_uuids)
+    rng = random.Random(args.seed)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: list[float] = []
+    outcomes: Counter = Counter()
+
+    async def one():
+        source, target = rng.sample(wallet_uuids, 2)
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                if mode == "transfer":
+                    await dao.transfer(source, target, 1)
+                else:
+                    await two_calls(dao, source, target, 1)
+                outcomes["ok"] += 1
+            except BaseSystemException as e:
+                outcomes[type(e).__name__] += 1
+            except DBAPIError as e:
+                deadlock = "deadlock detected" in str(e.orig)
+                outcomes["deadlock" if deadlock else type(e.orig).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.transfers)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "transfers_per_sec": round(args.transfers / elapsed, 1),
+        **latency_summary(latencies),
+        "outcomes": dict(outcomes),
+        "deadlocks": outcomes["deadlock"],
+        "balance_conserved": await total_balance(wallet_uuids) == before,
+    }
+
+
+async def main(args) -> None:
+    dao = WalletDAO(async_session_maker)
+    results = {
+        mode: await measure(dao, mode, args) for mode in ("transfer", "two_calls")
+    }
+    await shutdown_db()
+    report("transfer_contention", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--transfers", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--wallets", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,152 @@
+"""Compare the varchar/integer schema with the native UUID/BIGINT one.
+
+Both layouts are built in temporary tables on the Postgres from ``.env``
+with ``--wallets`` wallets and ``--rows`` ledger rows spread over them:
+
+* ``varchar``: ``VARCHAR`` wallet keys, ``INTEGER`` operation ids and the
+  plain ``(wallet_uuid, id)`` history index;
+* ``uuid``: ``UUID`` wallet keys, ``BIGINT`` operation ids and the history
+  index covering the listed columns.
+
+The script reports table and index sizes, p50/p95/p99 latency of
+``--lookups`` balance reads and history pages of random wallets, and the
+plan node of the history query. The default is the 100M-row ledger the
+migration targets; it needs ~30 GB of temporary space.
+
+    python benchmarks/uuid_schema.py --rows 100000000 --wallets 1000000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import asyncpg
+from common import latency_summary, report
+
+from settings import settings
+
+LAYOUTS = {
+    "varchar": {
+        "key_type": "VARCHAR",
+        "id_type": "INTEGER",
+        "history_index": "(wallet_uuid, id)",
+    },
+    "uuid": {
+        "key_type": "UUID",
+        "id_type": "BIGINT",
+        "history_index": (
+            "(wallet_uuid, id) INCLUDE (operation_type, amount, created_at)"
+        ),
+    },
+}
+
+HISTORY_PAGE_SIZE = 50
+
+
+async def build(connection: asyncpg.Connection, layout: str, args) -> None:
+    key_type = LAYOUTS[layout]["key_type"]
+    id_type = LAYOUTS[layout]["id_type"]
+    await connection.execute(
+        f"CREATE TEMP TABLE wallet_{layout}"
+        f" (uuid {key_type} PRIMARY KEY, balance NUMERIC(18, 2))"
+    )
+    await connection.execute(
+        f"INSERT INTO wallet_{layout} SELECT uuid::{key_type}, 0 FROM wallet_ids"
+    )
+    await connection.execute(
+        f"CREATE TEMP TABLE operation_{layout} (id {id_type} PRIMARY KEY,"
+        f" wallet_uuid {key_type}, operation_type TEXT, amount NUMERIC(18, 2),"
+        " created_at TIMESTAMPTZ NOT NULL DEFAULT now())"
+    )
+    await connection.execute(
+        f"INSERT INTO operation_{layout} (id, wallet_uuid, operation_type, amount)"
+        f" SELECT i, w.uuid::{key_type}, 'DEPOSIT', 1"
+        f" FROM generate_series(1, {args.rows}) AS i"
+        f" JOIN wallet_ids AS w ON w.n = i % {args.wallets}"
+    )
+    await connection.execute(
+        f"CREATE INDEX history_{layout} ON operation_{layout}"
+        f" {LAYOUTS[layout]['history_index']}"
+    )
+    # Sets the visibility map, which index-only scans rely on
+    await connection.execute(f"VACUUM ANALYZE wallet_{layout}")
+    await connection.execute(f"VACUUM ANALYZE operation_{layout}")
+
+
+async def sizes(connection: asyncpg.Connection, layout: str) -> dict:
+    row = await connection.fetchrow(
+        "SELECT pg_relation_size($1::regclass) AS wallet_table,"
+        " pg_relation_size($2::regclass) AS wallet_pkey,"
+        " pg_relation_size($3::regclass) AS operation_table,"
+        " pg_relation_size($4::regclass) AS operation_pkey,"
+        " pg_relation_size($5::regclass) AS history_index",
+        f"wallet_{layout}",
+        f"wallet_{layout}_pkey",
+        f"operation_{layout}",
+        f"operation_{layout}_pkey",
+        f"history_{layout}",
+    )
+    return {f"{name}_mb": round(size / 2**20, 2) for name, size in row.items()}
+
+
+async def lookups(
+    connection: asyncpg.Connection, layout: str, wallet_uuids: list[str]
+) -> dict:
+    balance = await connection.prepare(
+        f"SELECT balance FROM wallet_{layout} WHERE uuid = $1"
+    )
+    history_query = (
+        f"SELECT id, operation_type, amount, created_at FROM operation_{layout}"
+        f" WHERE wallet_uuid = $1 ORDER BY id DESC LIMIT {HISTORY_PAGE_SIZE}"
+    )
+    history = await connection.prepare(history_query)
+
+    results = {}
+    for name, statement in (("balance", balance), ("history", history)):
+        latencies = []
+        for wallet_uuid in wallet_uuids:
+            started = time.perf_counter()
+            await statement.fetch(wallet_uuid)
+            latencies.append(time.perf_counter() - started)
+        results[name] = latency_summary(latencies)
+
+    plan = await connection.fetchval(
+        f"EXPLAIN (FORMAT JSON) {history_query}", wallet_uuids[0]
+    )
+    results["history_plan"] = json.loads(plan)[0]["Plan"]["Plans"][0]["Node Type"]
+    return results
+
+
+async def main(args) -> None:
+    connection = await asyncpg.connect(settings.db_dsn_postgres)
+    results = {}
+    try:
+        await connection.execute(
+            "CREATE TEMP TABLE wallet_ids AS SELECT n, gen_random_uuid()::text"
+            f" AS uuid FROM generate_series(0, {args.wallets - 1}) AS n"
+        )
+        await connection.execute("CREATE INDEX ON wallet_ids (n)")
+        wallet_uuids = [
+            row["uuid"]
+            for row in await connection.fetch(
+                f"SELECT uuid FROM wallet_ids ORDER BY random() LIMIT {args.lookups}"
+            )
+        ]
+        for layout in LAYOUTS:
+            await build(connection, layout, args)
+            results[layout] = {
+                **await sizes(connection, layout),
+                **await lookups(connection, layout, wallet_uuids),
+            }
+    finally:
+        await connection.close()
+    report("uuid_schema", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000_000)
+    parser.add_argument("--wallets", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=1000)
+    asyncio.run(main(parser.parse_args()))
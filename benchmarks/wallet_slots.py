@@ -0,0 +1,60 @@
+"""Deposits per second on one hot wallet against its slot count.
+
+Each run creates a wallet, splits it into ``--slots`` slot rows (0 keeps the
+plain wallet row), fires ``--operations`` concurrent deposits and then checks
+that the balance read back equals the deposited total.
+
+    python benchmarks/wallet_slots.py --operations 5000 --concurrency 200
+"""
+
+import argparse
+import asyncio
+import time
+
+from common import create_wallet, latency_summary, report
+
+from database.core import async_session_maker, shutdown_db
+from database.dao.wallet_dao import WalletDAO
+from database.models.withdraw import OperationType
+from money import money
+
+
+async def measure(dao: WalletDAO, slots: int, args) -> dict:
+    wallet_uuid = await create_wallet(dao)
+    if slots:
+        await dao.set_wallet_slots(wallet_uuid, slots)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: list[float] = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            await dao.process_operation(wallet_uuid, OperationType.DEPOSIT, 1)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.operations)))
+    elapsed = time.perf_counter() - started
+
+    balance = await dao.get_balance(wallet_uuid)
+    return {
+        "slots": slots,
+        "deposits_per_sec": round(args.operations / elapsed, 1),
+        **latency_summary(latencies),
+        "balance_correct": balance == money.to_api(money.parse(args.operations)),
+    }
+
+
+async def main(args) -> None:
+    dao = WalletDAO(async_session_maker, wallet_slots=True)
+    results = [await measure(dao, slots, args) for slots in args.slots]
+    await shutdown_db()
+    report("wallet_slots", results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--operations", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--slots", type=int, nargs="+", default=[0, 4, 16, 64])
+    asyncio.run(main(parser.parse_args()))
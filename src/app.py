@@ -1,9 +1,8 @@
 import logging
 import os
-import time
 
 import fastapi_jsonrpc as jsonrpc
-from fastapi import APIRouter, FastAPI, Request, Response
+from fastapi import APIRouter, FastAPI, Request
 from fastapi.openapi.docs import (
     get_redoc_html,
     get_swagger_ui_html,
@@ -19,9 +18,17 @@ from exceptions import (
     WalletNotFoundError,
     InsufficientFundsError,
     ComponentIdError,
+    LedgerBackpressureError,
 )
 from lifespan import lifespan
-from routers import wallet
+from dependencies import admission_controller
+from middlewares import (
+    AdmissionControlMiddleware,
+    GlobalResponsesMiddleware,
+    MetricsMiddleware,
+    TimingMiddleware,
+)
+from routers import internal, metrics, rpc, wallet
 from settings import print_modes, settings
 
 
@@ -67,34 +74,39 @@ def register_offline_docs(app: FastAPI) -> None:
 
 
 def register_logging_middleware(app: FastAPI) -> None:
-
-    @app.middleware("http")
-    async def log_request_and_timing(request: Request, call_next):
-        start_time = time.time()
-        response = await call_next(request)
-        end_time = time.time()
-        logging.debug(
-            f"Method: {request.method}, URL: {request.url}, Time: {end_time - start_time:=.2f} sec",  # noqa E501
-        )
-        return response
+    if settings.MIDDLEWARE_TIMING_ENABLED:
+        app.add_middleware(TimingMiddleware)
 
 
 def register_global_responses(app: FastAPI) -> None:
+    if settings.MIDDLEWARE_GLOBAL_RESPONSES_ENABLED:
+        app.add_middleware(GlobalResponsesMiddleware)
+
 
-    @app.middleware("http")
-    async def global_response_middleware(request, call_next):
-        response: Response = await call_next(request)
+def register_metrics(app: FastAPI) -> None:
+    if not settings.METRICS_ENABLED:
+        return
 
-        # Handling global responses
-        if response.status_code == 404:
-            response.body = b"Page not found"
-        elif response.status_code == 500:
-            response.body = b"Internal server error"
+    app.include_router(router=metrics.router)
+    app.add_middleware(MetricsMiddleware)
 
-        return response
+
+def register_admission_control(app: FastAPI) -> None:
+    if admission_controller is None:
+        return
+
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        controller=admission_controller,
+        path_prefix=settings.APP_URL + "/wallet",
+        default_timeout=settings.ADMISSION_DEFAULT_TIMEOUT_MS / 1000,
+        retry_after=settings.ADMISSION_RETRY_AFTER_SECONDS,
+    )
 
 
 def register_cors_middleware(app: FastAPI) -> None:
+    if not settings.MIDDLEWARE_CORS_ENABLED:
+        return
 
     app.add_middleware(
         CORSMiddleware,
@@ -134,6 +146,16 @@ def register_exception_handlers(app: FastAPI):
             content={"message": exc.message},
         )
 
+    @app.exception_handler(LedgerBackpressureError)
+    async def ledger_backpressure_error_exception(
+        request: Request, exc: LedgerBackpressureError
+    ):
+        return JSONResponse(
+            status_code=503,
+            content={"message": exc.message},
+            headers={"Retry-After": "1"},
+        )
+
     @app.exception_handler(ComponentIdError)
     async def component_id_error_exception(request: Request, exc: ComponentIdError):
         return JSONResponse(
@@ -147,6 +169,12 @@ def create_app() -> App:
     app.include_router(
         router=wallet.router, prefix=settings.APP_URL + "/wallet", tags=["Кошелек"]
     )
+    app.include_router(
+        router=internal.router,
+        prefix=settings.APP_URL + "/internal",
+        tags=["Служебное"],
+    )
+    app.bind_entrypoint(rpc.entrypoint)
 
     app.openapi_version = "3.0.0"
 
@@ -158,6 +186,8 @@ def create_app() -> App:
     register_logging_middleware(app)
     register_cors_middleware(app)
     register_global_responses(app)
+    register_admission_control(app)
+    register_metrics(app)
     register_offline_docs(app)
 
     print_modes()
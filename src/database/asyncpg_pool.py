@@ -0,0 +1,86 @@
+from typing import Optional
+
+import asyncpg
+from asyncpg.prepared_stmt import PreparedStatement
+
+from database.models.operation_staging import operation_staging
+from database.models.wallet import wallets
+from database.models.withdraw import operations
+from settings import settings
+
+# Hot-path queries, prepared once per pooled connection
+HOT_STATEMENTS = {
+    "get_balance": f"SELECT balance FROM {wallets.fullname} WHERE uuid = $1",
+    "lock_wallet": (
+        f"SELECT balance FROM {wallets.fullname} WHERE uuid = $1 FOR UPDATE"
+    ),
+    "insert_operation": (
+        f"INSERT INTO {operations.fullname} (wallet_uuid, operation_type, amount)"
+        " VALUES ($1, $2, $3)"
+    ),
+    "insert_staged_operation": (
+        f"INSERT INTO {operation_staging.fullname}"
+        " (wallet_uuid, operation_type, amount) VALUES ($1, $2, $3)"
+    ),
+    "update_balance": f"UPDATE {wallets.fullname} SET balance = $2 WHERE uuid = $1",
+    "notify": "SELECT pg_notify($1, $2)",
+    # See ``database.core.apply_request_deadline``
+    "deadline_timeouts": (
+        "SELECT set_config('statement_timeout', $1, true),"
+        " set_config('lock_timeout', $1, true)"
+    ),
+}
+
+
+class WalletConnection(asyncpg.Connection):
+    """asyncpg connection carrying the named hot-path prepared statements."""
+
+    statements: dict[str, PreparedStatement]
+
+
+async def prepare_hot_statements(connection: WalletConnection) -> None:
+    connection.statements = {
+        name: await connection.prepare(query, name=f"wallet_{name}")
+        for name, query in HOT_STATEMENTS.items()
+    }
+
+
+_pool: Optional[asyncpg.Pool] = None
+
+
+async def open_asyncpg_pool() -> asyncpg.Pool:
+    """Open the pool and warm up ``ASYNCPG_POOL_MIN_SIZE`` connections.
+
+    Every new connection prepares ``HOT_STATEMENTS`` before it is handed
+    out, so the first requests do not pay for connecting and parsing.
+    """
+    global _pool
+    _pool = await asyncpg.create_pool(
+        settings.db_dsn_postgres,
+        min_size=settings.ASYNCPG_POOL_MIN_SIZE,
+        max_size=settings.ASYNCPG_POOL_MAX_SIZE,
+        statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+        server_settings=settings.db_server_settings,
+        connection_class=WalletConnection,
+        init=prepare_hot_statements,
+    )
+    return _pool
+
+
+def get_asyncpg_pool() -> asyncpg.Pool:
+    if _pool is None:
+        raise RuntimeError("asyncpg pool is not open")
+    return _pool
+
+
+def asyncpg_pool_stats() -> Optional[dict]:
+    if _pool is None:
+        return None
+    return {"size": _pool.get_size(), "idle": _pool.get_idle_size()}
+
+
+async def close_asyncpg_pool() -> None:
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
@@ -1,26 +1,74 @@
 from contextlib import asynccontextmanager
+from typing import Optional
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy import Connection, event, func, select
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session, SessionTransaction
+from yarl import URL
 
+from database.pool import InstrumentedAsyncPool
+from services.admission import request_deadline
 from settings import settings
 
-engine = create_async_engine(
-    str(settings.db_url_postgres),
-    echo=False,
-    future=True,
-    pool_size=5,
-    max_overflow=10,
-    pool_timeout=30,
-    pool_recycle=1800,
-)
 
-async_session_maker = async_sessionmaker(
-    engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
-)
+def create_engine(url: URL) -> AsyncEngine:
+    return create_async_engine(
+        str(url),
+        echo=False,
+        future=True,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        connect_args={
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "server_settings": settings.db_server_settings,
+        },
+    )
+
+
+def create_session_maker(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(
+        engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+
+
+def deadline_timeouts(budget_ms):
+    """Set ``statement_timeout`` and ``lock_timeout`` for the transaction."""
+    return select(
+        func.set_config("statement_timeout", budget_ms, True),
+        func.set_config("lock_timeout", budget_ms, True),
+    )
+
+
+@event.listens_for(Session, "after_begin")
+def apply_request_deadline(
+    session: Session, transaction: SessionTransaction, connection: Connection
+) -> None:
+    """Hand the rest of the request deadline to the transaction."""
+    deadline = request_deadline.get()
+    if deadline is not None:
+        connection.execute(deadline_timeouts(str(deadline.start_transaction())))
+
+
+engine = create_engine(settings.db_url_postgres)
+async_session_maker = create_session_maker(engine)
+
+replica_engine: Optional[AsyncEngine] = None
+replica_session_maker: Optional[async_sessionmaker[AsyncSession]] = None
+if settings.db_url_postgres_replica is not None:
+    replica_engine = create_engine(settings.db_url_postgres_replica)
+    replica_session_maker = create_session_maker(replica_engine)
 
 
 @asynccontextmanager
@@ -37,3 +85,5 @@ async def get_session() -> AsyncSession:  # type: ignore
 
 async def shutdown_db() -> None:
     await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
@@ -0,0 +1,88 @@
+import time
+from typing import Optional
+
+import asyncpg
+
+from database.asyncpg_pool import get_asyncpg_pool
+from database.dao.wallet_dao import WalletDAO, apply_operation
+from database.models.withdraw import OperationType
+from exceptions import WalletNotFoundError
+from money import Money, money
+from services.admission import request_deadline
+from services.metrics import OPERATION_PHASE_DURATION
+
+
+class AsyncpgWalletDAO(WalletDAO):
+    """``WalletDAO`` running the hot queries on a raw asyncpg pool.
+
+    ``get_balance`` and unkeyed ``for_update`` operations execute the named
+    statements prepared on every pooled connection, skipping SQLAlchemy
+    statement compilation and result processing. Everything else, including
+    keyed and ``single_statement`` operations and slot mode, whose slots the
+    prepared statements do not see, is inherited unchanged.
+    """
+
+    @property
+    def pool(self) -> asyncpg.Pool:
+        return get_asyncpg_pool()
+
+    async def _fetch_balance(self, wallet_uuid: str) -> Optional[Money]:
+        session_factory = self._read_session_factory(wallet_uuid)
+        if self.wallet_slots or session_factory is not self.session_factory:
+            # The prepared statement reads neither the replica nor the slots
+            return await self._fetch_balance_from(session_factory, wallet_uuid)
+        async with self.pool.acquire() as connection:
+            return await connection.statements["get_balance"].fetchval(wallet_uuid)
+
+    async def _process_operation_for_update(
+        self,
+        wallet_uuid: str,
+        operation_type: OperationType,
+        amount: float,
+        idempotency_key: Optional[str] = None,
+    ) -> float:
+        if idempotency_key is not None or self.wallet_slots:
+            return await super()._process_operation_for_update(
+                wallet_uuid, operation_type, amount, idempotency_key
+            )
+
+        stored_amount = money.parse(amount)
+        insert_operation = (
+            "insert_staged_operation" if self.ledger_staging else "insert_operation"
+        )
+
+        async with self.pool.acquire() as connection:
+            statements = connection.statements
+            async with connection.transaction():
+                deadline = request_deadline.get()
+                if deadline is not None:
+                    await statements["deadline_timeouts"].fetchval(
+                        str(deadline.start_transaction())
+                    )
+                started = time.perf_counter()
+                wallet_row = await statements["lock_wallet"].fetchrow(wallet_uuid)
+                locked = time.perf_counter()
+                OPERATION_PHASE_DURATION.observe(locked - started, "lock")
+                if wallet_row is None:
+                    raise WalletNotFoundError()
+
+                new_balance = apply_operation(
+                    wallet_row["balance"], operation_type, stored_amount
+                )
+
+                await statements[insert_operation].fetchval(
+                    wallet_uuid, operation_type.value, stored_amount
+                )
+                inserted = time.perf_counter()
+                OPERATION_PHASE_DURATION.observe(inserted - locked, "ledger_insert")
+
+                await statements["update_balance"].fetchval(wallet_uuid, new_balance)
+                OPERATION_PHASE_DURATION.observe(
+                    time.perf_counter() - inserted, "balance_update"
+                )
+                if self.balance_notify_channel:
+                    await statements["notify"].fetchval(
+                        self.balance_notify_channel, wallet_uuid
+                    )
+
+        return money.to_api(new_balance)
@@ -1,35 +1,588 @@
-from typing import Optional
-from sqlalchemy import select, update, insert
+from typing import AsyncIterator, Iterable, Optional, Sequence, Union
+from sqlalchemy import (
+    String,
+    any_,
+    bindparam,
+    case,
+    cast,
+    delete,
+    exists,
+    func,
+    insert,
+    literal,
+    select,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from database.models.wallet import wallets
-from database.models.withdraw import operations, OperationType
-from exceptions import WalletNotFoundError, InsufficientFundsError
-from decimal import Decimal
+from database.models.withdraw import (
+    CREDIT_OPERATION_TYPES,
+    DEBIT_OPERATION_TYPES,
+    operations,
+    OperationType,
+    finished_txid_horizon,
+)
+from database.models.operation_staging import (
+    LEDGER_COLUMNS,
+    ledger,
+    operation_staging,
+)
+from database.models.idempotency import idempotency_keys
+from database.models.rollup import (
+    ROLLUP_CHECKPOINT_NAME,
+    RollupGranularity,
+    operation_rollups,
+    rollup_checkpoints,
+)
+from database.models.schema_setting import money_mode_query
+from database.models.wallet_slot import slots_balance, wallet_slots
+from database.replica import ReadConsistency, ReplicaRouter
+from money import Money, money
+from services.cache import LRUCache
+from services.metrics import OPERATION_ERRORS, OPERATION_PHASE_DURATION
+from exceptions import (
+    BaseSystemException,
+    BatchOperationError,
+    IdempotencyKeyMismatchError,
+    WalletAlreadyExistsError,
+    WalletNotFoundError,
+    InsufficientFundsError,
+)
+import asyncio
+import time
+from contextlib import AsyncExitStack
+from datetime import date, datetime, timedelta
+
+
+def apply_operation(
+    balance: Money, operation_type: OperationType, amount: Money
+) -> Money:
+    if operation_type in CREDIT_OPERATION_TYPES:
+        return balance + amount
+    if balance < amount:
+        raise InsufficientFundsError()
+    return balance - amount
+
+
+class _IdempotentReplay(Exception):
+    """The idempotency key was already used; roll back and replay."""
 
 
 class WalletDAO:
-    def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+    STRATEGY_FOR_UPDATE = "for_update"
+    STRATEGY_SINGLE_STATEMENT = "single_statement"
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        operation_strategy: str = STRATEGY_FOR_UPDATE,
+        balance_cache: Optional[LRUCache] = None,
+        balance_notify_channel: Optional[str] = None,
+        replica_router: Optional[ReplicaRouter] = None,
+        read_consistency: ReadConsistency = ReadConsistency.REPLICA,
+        ledger_staging: bool = False,
+        wallet_slots: bool = False,
+    ) -> None:
         self.session_factory = session_factory
+        self.operation_strategy = operation_strategy
+        self.balance_cache = balance_cache
+        self.balance_notify_channel = balance_notify_channel
+        self.replica_router = replica_router
+        self.read_consistency = read_consistency
+        self.ledger_staging = ledger_staging
+        # Operations are appended here; see ``flush_staged_operations``
+        self.ledger_table = operation_staging if ledger_staging else operations
+        # Balances also live in ``wallet_slot`` rows; see ``set_wallet_slots``
+        self.wallet_slots = wallet_slots
 
     async def get_balance(self, wallet_uuid: str) -> Optional[float]:
-        async with self.session_factory() as session:
-            stmt = select(wallets.c.balance).where(wallets.c.uuid == wallet_uuid)
+        if self.balance_cache is not None:
+            cached_balance = self.balance_cache.get(wallet_uuid)
+            if cached_balance is not None:
+                return cached_balance
+
+        balance = await self._fetch_balance(wallet_uuid)
+        if balance is None:
+            raise WalletNotFoundError()
+
+        if self.balance_cache is not None:
+            self.balance_cache.set(wallet_uuid, money.to_api(balance))
+        return money.to_api(balance)
+
+    def _read_session_factory(
+        self, wallet_uuid: str
+    ) -> async_sessionmaker[AsyncSession]:
+        if self.replica_router is not None and self.replica_router.use_replica(
+            wallet_uuid, self.read_consistency
+        ):
+            return self.replica_router.replica_session_factory
+        return self.session_factory
+
+    async def _fetch_balance(self, wallet_uuid: str) -> Optional[Money]:
+        return await self._fetch_balance_from(
+            self._read_session_factory(wallet_uuid), wallet_uuid
+        )
+
+    async def _fetch_balance_from(
+        self, session_factory: async_sessionmaker[AsyncSession], wallet_uuid: str
+    ) -> Optional[Money]:
+        async with session_factory() as session:
+            balance = wallets.c.balance
+            if self.wallet_slots:
+                balance = balance + slots_balance(wallets.c.uuid)
+            stmt = select(balance).where(wallets.c.uuid == wallet_uuid)
             result = await session.execute(stmt)
-            balance = result.scalar_one_or_none()
-            if balance is None:
-                raise WalletNotFoundError()
-            return float(balance)
+            return result.scalar_one_or_none()
+
+    async def warm_up(self, connections: int) -> None:
+        """Open ``connections`` pool connections and prepare hot statements.
+
+        The balance read, row lock and balance update of the ``for_update``
+        path run on every connection against a wallet that cannot exist and
+        are rolled back, leaving them in the asyncpg prepared statement
+        cache and SQLAlchemy's compiled cache.
+        """
+        # The nil UUID, which ``uuid4`` never generates
+        wallet_uuid = "00000000-0000-0000-0000-000000000000"
+        hot_statements = [
+            select(wallets.c.balance).where(wallets.c.uuid == wallet_uuid),
+            select(wallets).where(wallets.c.uuid == wallet_uuid).with_for_update(),
+            update(wallets)
+            .where(wallets.c.uuid == wallet_uuid)
+            .values(balance=money.parse(0)),
+        ]
+
+        async def prepare(session: AsyncSession) -> None:
+            for stmt in hot_statements:
+                await session.execute(stmt)
+            await session.rollback()
+
+        # Sessions stay open until all are prepared, so each holds its own
+        # connection
+        async with AsyncExitStack() as stack:
+            sessions = [
+                await stack.enter_async_context(self.session_factory())
+                for _ in range(connections)
+            ]
+            await asyncio.gather(*(prepare(session) for session in sessions))
+
+    async def get_money_mode(self) -> Optional[str]:
+        """The money mode the schema was migrated with."""
+        async with self.session_factory() as session:
+            return await session.scalar(money_mode_query())
+
+    async def _notify_balance_changed(
+        self, session: AsyncSession, wallet_uuids: Sequence[str]
+    ) -> None:
+        if not self.balance_notify_channel or not wallet_uuids:
+            return
+        wallet_uuid = func.unnest(
+            bindparam("notify_wallet_uuids", list(wallet_uuids), ARRAY(String))
+        ).column_valued("wallet_uuid")
+        await session.execute(
+            select(func.pg_notify(self.balance_notify_channel, wallet_uuid))
+        )
+
+    def _wallets_written(self, wallet_uuids: Iterable[str]) -> None:
+        """Drop cached balances and pin reads of the wallets to the primary."""
+        if self.replica_router is not None:
+            self.replica_router.record_writes(wallet_uuids)
+        if self.balance_cache is None:
+            return
+        for wallet_uuid in wallet_uuids:
+            self.balance_cache.invalidate(wallet_uuid)
 
     async def process_operation(
         self,
         wallet_uuid: str,
         operation_type: OperationType,
         amount: float,
+        idempotency_key: Optional[str] = None,
+    ) -> float:
+        try:
+            # Keyed operations need the key row in the locked transaction
+            if idempotency_key is not None:
+                try:
+                    new_balance = await self._process_operation_for_update(
+                        wallet_uuid, operation_type, amount, idempotency_key
+                    )
+                except _IdempotentReplay:
+                    return await self.get_idempotent_result(
+                        idempotency_key, wallet_uuid, operation_type, amount
+                    )
+            else:
+                new_balance = await self._process_unkeyed_operation(
+                    wallet_uuid, operation_type, amount
+                )
+        except (WalletNotFoundError, InsufficientFundsError) as e:
+            OPERATION_ERRORS.inc(type(e).__name__)
+            raise
+        self._wallets_written([wallet_uuid])
+        return new_balance
+
+    async def _process_unkeyed_operation(
+        self,
+        wallet_uuid: str,
+        operation_type: OperationType,
+        amount: float,
     ) -> float:
-        amount_decimal = Decimal(str(amount))  
+        if self.wallet_slots:
+            return await self._process_operation_on_slots(
+                wallet_uuid, operation_type, amount
+            )
+        if self.operation_strategy == self.STRATEGY_SINGLE_STATEMENT:
+            return await self._process_operation_single_statement(
+                wallet_uuid, operation_type, amount
+            )
+        return await self._process_operation_for_update(
+            wallet_uuid, operation_type, amount
+        )
+
+    async def _process_operation_on_slots(
+        self,
+        wallet_uuid: str,
+        operation_type: OperationType,
+        amount: float,
+    ) -> float:
+        """Apply an unkeyed operation in slot mode.
+
+        A first statement skips busy slots; when every slot is busy, a
+        second one waits for a random slot, so a hot wallet stays spread
+        over its slots however contended it is. A withdrawal no single
+        slot covers goes to ``_withdraw_across_slots``. Wallets without
+        slots are served by the same statement, on their wallet row.
+        """
+        stored_amount = money.parse(amount)
+        for skip_locked in (True, False):
+            row = await self._apply_on_slot(
+                wallet_uuid, operation_type, stored_amount, skip_locked
+            )
+            if row.new_balance is not None:
+                return money.to_api(row.new_balance)
+            if row.slots is None:
+                raise WalletNotFoundError()
+            if not row.slots:
+                # A rejected withdrawal, or ``set_wallet_slots`` ran meanwhile;
+                # the locking path tells them apart
+                return await self._process_operation_for_update(
+                    wallet_uuid, operation_type, amount
+                )
+        if operation_type == OperationType.WITHDRAW:
+            return await self._withdraw_across_slots(wallet_uuid, stored_amount)
+        # The slots were replaced by ``set_wallet_slots`` meanwhile
+        return await self._process_operation_for_update(
+            wallet_uuid, operation_type, amount
+        )
+
+    async def _apply_on_slot(
+        self,
+        wallet_uuid: str,
+        operation_type: OperationType,
+        stored_amount: Money,
+        skip_locked: bool,
+    ) -> Row:
+        """Apply an operation to one random slot, or to a wallet without slots.
+
+        A deposit goes to any slot, a withdrawal to a slot holding the whole
+        amount; ``skip_locked`` picks only slots no other transaction holds,
+        otherwise the statement waits for the picked one. A wallet whose
+        ``slots`` count is 0 gets the guarded UPDATE of ``single_statement``
+        on its row instead. The update and the ledger row are one statement.
+        Returns the new balance, None with nothing written, and the slot
+        count, None for a missing wallet.
+        """
+        amount_param = literal(stored_amount, wallet_slots.c.balance.type)
+
+        picked_slot = select(wallet_slots.c.slot).where(
+            wallet_slots.c.wallet_uuid == wallet_uuid
+        )
+        updated_slot = update(wallet_slots).where(
+            wallet_slots.c.wallet_uuid == wallet_uuid
+        )
+        updated_wallet = update(wallets).where(
+            wallets.c.uuid == wallet_uuid, wallets.c.slots == 0
+        )
+        if operation_type == OperationType.DEPOSIT:
+            updated_slot = updated_slot.values(
+                balance=wallet_slots.c.balance + amount_param
+            )
+            updated_wallet = updated_wallet.values(
+                balance=wallets.c.balance + amount_param
+            )
+        else:
+            picked_slot = picked_slot.where(wallet_slots.c.balance >= amount_param)
+            updated_slot = updated_slot.values(
+                balance=wallet_slots.c.balance - amount_param
+            )
+            updated_wallet = updated_wallet.where(
+                wallets.c.balance >= amount_param
+            ).values(balance=wallets.c.balance - amount_param)
+        picked_slot = (
+            picked_slot.order_by(func.random())
+            .limit(1)
+            .with_for_update(skip_locked=skip_locked)
+            .cte("picked_slot")
+        )
+        updated_slot = (
+            updated_slot.where(wallet_slots.c.slot == picked_slot.c.slot)
+            .returning(wallet_slots.c.slot, wallet_slots.c.balance)
+            .cte("updated_slot")
+        )
+        updated_wallet = updated_wallet.returning(wallets.c.balance).cte(
+            "updated_wallet"
+        )
+
+        other_slots = select(func.sum(wallet_slots.c.balance)).where(
+            wallet_slots.c.wallet_uuid == wallet_uuid,
+            wallet_slots.c.slot != updated_slot.c.slot,
+        )
+        applied = union_all(
+            select(
+                (
+                    wallets.c.balance
+                    + updated_slot.c.balance
+                    + cast(
+                        func.coalesce(other_slots.scalar_subquery(), 0),
+                        wallet_slots.c.balance.type,
+                    )
+                ).label("new_balance")
+            ).where(wallets.c.uuid == wallet_uuid),
+            select(updated_wallet.c.balance),
+        ).cte("applied")
+        ledger_row = (
+            insert(self.ledger_table)
+            .from_select(
+                ["wallet_uuid", "operation_type", "amount"],
+                select(
+                    literal(wallet_uuid, wallets.c.uuid.type),
+                    literal(operation_type, operations.c.operation_type.type),
+                    literal(stored_amount, operations.c.amount.type),
+                ).select_from(applied),
+            )
+            .cte("ledger_row")
+        )
+
+        stmt = select(
+            select(applied.c.new_balance).scalar_subquery().label("new_balance"),
+            select(wallets.c.slots)
+            .where(wallets.c.uuid == wallet_uuid)
+            .scalar_subquery()
+            .label("slots"),
+        ).add_cte(ledger_row)
+        if self.balance_notify_channel:
+            # Only when a slot or the wallet row was actually updated
+            stmt = stmt.add_columns(
+                select(func.pg_notify(self.balance_notify_channel, wallet_uuid))
+                .select_from(applied)
+                .scalar_subquery()
+                .label("notified")
+            )
+
+        async with self.session_factory() as session:
+            async with session.begin():
+                started = time.perf_counter()
+                row = (await session.execute(stmt)).one()
+                OPERATION_PHASE_DURATION.observe(
+                    time.perf_counter() - started, "slot"
+                )
+        return row
+
+    async def _withdraw_across_slots(
+        self, wallet_uuid: str, stored_amount: Money
+    ) -> float:
+        """Withdraw from the wallet row and as many slots as it takes.
+
+        Locks the wallet row and then every slot in slot order, the order
+        ``set_wallet_slots`` uses, checks the total and drains the wallet
+        row first, then the slots in order.
+        """
+        async with self.session_factory() as session:
+            async with session.begin():
+                started = time.perf_counter()
+                main_balance = await session.scalar(
+                    select(wallets.c.balance)
+                    .where(wallets.c.uuid == wallet_uuid)
+                    .with_for_update()
+                )
+                if main_balance is None:
+                    raise WalletNotFoundError()
+                slot_rows = (
+                    await session.execute(
+                        select(wallet_slots.c.slot, wallet_slots.c.balance)
+                        .where(wallet_slots.c.wallet_uuid == wallet_uuid)
+                        .order_by(wallet_slots.c.slot)
+                        .with_for_update()
+                    )
+                ).all()
+                OPERATION_PHASE_DURATION.observe(
+                    time.perf_counter() - started, "lock"
+                )
+
+                new_balance = apply_operation(
+                    main_balance + sum(row.balance for row in slot_rows),
+                    OperationType.WITHDRAW,
+                    stored_amount,
+                )
+                remaining = stored_amount - min(main_balance, stored_amount)
+                if remaining != stored_amount:
+                    await session.execute(
+                        update(wallets)
+                        .where(wallets.c.uuid == wallet_uuid)
+                        .values(balance=main_balance - (stored_amount - remaining))
+                    )
+                for slot, balance in slot_rows:
+                    if not remaining:
+                        break
+                    debit = min(balance, remaining)
+                    if not debit:
+                        continue
+                    await session.execute(
+                        update(wallet_slots)
+                        .where(
+                            wallet_slots.c.wallet_uuid == wallet_uuid,
+                            wallet_slots.c.slot == slot,
+                        )
+                        .values(balance=balance - debit)
+                    )
+                    remaining -= debit
+
+                await session.execute(
+                    insert(self.ledger_table).values(
+                        wallet_uuid=wallet_uuid,
+                        operation_type=OperationType.WITHDRAW,
+                        amount=stored_amount,
+                    )
+                )
+                await self._notify_balance_changed(session, [wallet_uuid])
+
+        return money.to_api(new_balance)
+
+    async def _fold_slots(
+        self, session: AsyncSession, wallet_uuids: Sequence[str]
+    ) -> dict[str, Money]:
+        """Move the slot balances of wallets locked by the caller into their rows.
+
+        Every path that locks wallet rows in slot mode calls this right after,
+        so its funds check and returned balance cover the whole balance. The
+        slots are locked in ``(wallet_uuid, slot)`` order, after the wallet
+        rows as in ``_withdraw_across_slots``, and emptied. Returns the new
+        row balances of the wallets that have slots.
+        """
+        locked_slots = (
+            select(
+                wallet_slots.c.wallet_uuid, wallet_slots.c.slot, wallet_slots.c.balance
+            )
+            .where(
+                wallet_slots.c.wallet_uuid
+                == any_(
+                    bindparam(
+                        "fold_wallet_uuids",
+                        list(wallet_uuids),
+                        ARRAY(wallets.c.uuid.type),
+                    )
+                )
+            )
+            .order_by(wallet_slots.c.wallet_uuid, wallet_slots.c.slot)
+            .with_for_update()
+            .cte("locked_slots")
+        )
+        emptied = (
+            update(wallet_slots)
+            .where(
+                wallet_slots.c.wallet_uuid == locked_slots.c.wallet_uuid,
+                wallet_slots.c.slot == locked_slots.c.slot,
+            )
+            .values(balance=money.parse(0))
+            .cte("emptied")
+        )
+        totals = (
+            select(
+                locked_slots.c.wallet_uuid,
+                cast(
+                    func.sum(locked_slots.c.balance), wallet_slots.c.balance.type
+                ).label("balance"),
+            )
+            .group_by(locked_slots.c.wallet_uuid)
+            .cte("totals")
+        )
+        stmt = (
+            update(wallets)
+            .where(wallets.c.uuid == totals.c.wallet_uuid)
+            .values(balance=wallets.c.balance + totals.c.balance)
+            .returning(wallets.c.uuid, wallets.c.balance)
+            .add_cte(emptied)
+        )
+        result = await session.execute(stmt)
+        return dict(result.tuples().all())
+
+    async def set_wallet_slots(self, wallet_uuid: str, slots: int) -> None:
+        """Move a wallet into slot mode with ``slots`` slots, or out with 0.
+
+        Works online: the wallet row and then its slots are locked, waiting
+        for operations in flight on them, and the whole balance is folded
+        into the wallet row (``slots == 0``) or into slot 0 of the new
+        slots. Operations meanwhile wait for a slot or, once the slot count
+        on the wallet row changes, for the row itself; the balance never
+        changes.
+        """
+        async with self.session_factory() as session:
+            async with session.begin():
+                main_balance = await session.scalar(
+                    select(wallets.c.balance)
+                    .where(wallets.c.uuid == wallet_uuid)
+                    .with_for_update()
+                )
+                if main_balance is None:
+                    raise WalletNotFoundError()
+                slot_balances = await session.scalars(
+                    select(wallet_slots.c.balance)
+                    .where(wallet_slots.c.wallet_uuid == wallet_uuid)
+                    .order_by(wallet_slots.c.slot)
+                    .with_for_update()
+                )
+                total = main_balance + sum(slot_balances)
+
+                await session.execute(
+                    delete(wallet_slots).where(
+                        wallet_slots.c.wallet_uuid == wallet_uuid
+                    )
+                )
+                zero = money.parse(0)
+                if slots:
+                    await session.execute(
+                        insert(wallet_slots),
+                        [
+                            {
+                                "wallet_uuid": wallet_uuid,
+                                "slot": slot,
+                                "balance": total if slot == 0 else zero,
+                            }
+                            for slot in range(slots)
+                        ],
+                    )
+                await session.execute(
+                    update(wallets)
+                    .where(wallets.c.uuid == wallet_uuid)
+                    .values(balance=zero if slots else total, slots=slots)
+                )
+                await self._notify_balance_changed(session, [wallet_uuid])
+        self._wallets_written([wallet_uuid])
+
+    async def _process_operation_for_update(
+        self,
+        wallet_uuid: str,
+        operation_type: OperationType,
+        amount: float,
+        idempotency_key: Optional[str] = None,
+    ) -> float:
+        stored_amount = money.parse(amount)  
 
         async with self.session_factory() as session:
             async with session.begin():  
+                started = time.perf_counter()
                 stmt = (
                     select(wallets)
                     .where(wallets.c.uuid == wallet_uuid)
@@ -37,50 +590,737 @@ class WalletDAO:
                 )
                 result = await session.execute(stmt)
                 wallet_row = result.mappings().first()  
+                locked = time.perf_counter()
+                OPERATION_PHASE_DURATION.observe(locked - started, "lock")
 
                 if wallet_row is None:
                     raise WalletNotFoundError()
 
-                current_balance: Decimal = wallet_row["balance"]
-
-                new_balance = current_balance
+                current_balance: Money = wallet_row["balance"]
+                if self.wallet_slots:
+                    folded = await self._fold_slots(session, [wallet_uuid])
+                    current_balance = folded.get(wallet_uuid, current_balance)
 
-                if operation_type == OperationType.DEPOSIT:
-                    new_balance += amount_decimal
-                elif operation_type == OperationType.WITHDRAW:
-                    if current_balance < amount_decimal:
-                        raise InsufficientFundsError()
-                    new_balance -= amount_decimal
+                new_balance = apply_operation(
+                    current_balance, operation_type, stored_amount
+                )
 
                 await session.execute(
-                    insert(operations).values(
+                    insert(self.ledger_table).values(
                         wallet_uuid=wallet_uuid,
                         operation_type=operation_type,
-                        amount=amount_decimal,
+                        amount=stored_amount,
                     )
                 )
+                inserted = time.perf_counter()
+                OPERATION_PHASE_DURATION.observe(inserted - locked, "ledger_insert")
 
                 await session.execute(
                     update(wallets)
                     .where(wallets.c.uuid == wallet_uuid)
                     .values(balance=new_balance)
                 )
+                OPERATION_PHASE_DURATION.observe(
+                    time.perf_counter() - inserted, "balance_update"
+                )
+                await self._notify_balance_changed(session, [wallet_uuid])
 
-        return float(new_balance) 
+                if idempotency_key is not None:
+                    # Blocks while a concurrent holder of the key is in flight
+                    stored_key = await session.scalar(
+                        pg_insert(idempotency_keys)
+                        .values(
+                            key=idempotency_key,
+                            wallet_uuid=wallet_uuid,
+                            operation_type=operation_type,
+                            amount=stored_amount,
+                            new_balance=new_balance,
+                        )
+                        .on_conflict_do_nothing()
+                        .returning(idempotency_keys.c.key)
+                    )
+                    if stored_key is None:
+                        raise _IdempotentReplay()
 
-    async def create_wallet(self, wallet_uuid: str, initial_balance: float = 0) -> str:
+        return money.to_api(new_balance) 
+
+    async def _process_operation_single_statement(
+        self,
+        wallet_uuid: str,
+        operation_type: OperationType,
+        amount: float,
+    ) -> float:
+        """Apply an operation with one data-modifying CTE.
+
+        The guarded UPDATE takes the row lock only for the duration of the
+        statement and feeds the ledger insert. A missing wallet and
+        insufficient funds are told apart by ``wallet_exists``, evaluated
+        in the same statement.
+        """
+        stored_amount = money.parse(amount)
+
+        updated_wallet = update(wallets).where(wallets.c.uuid == wallet_uuid)
+        if operation_type == OperationType.DEPOSIT:
+            updated_wallet = updated_wallet.values(
+                balance=wallets.c.balance + stored_amount
+            )
+        else:
+            updated_wallet = updated_wallet.where(
+                wallets.c.balance >= stored_amount
+            ).values(balance=wallets.c.balance - stored_amount)
+        updated_wallet = updated_wallet.returning(
+            wallets.c.uuid, wallets.c.balance
+        ).cte("updated_wallet")
+
+        ledger_row = (
+            insert(self.ledger_table)
+            .from_select(
+                ["wallet_uuid", "operation_type", "amount"],
+                select(
+                    updated_wallet.c.uuid,
+                    literal(operation_type, operations.c.operation_type.type),
+                    literal(stored_amount, operations.c.amount.type),
+                ),
+            )
+            .returning(self.ledger_table.c.id)
+            .cte("ledger_row")
+        )
+
+        stmt = select(
+            select(updated_wallet.c.balance).scalar_subquery().label("new_balance"),
+            select(ledger_row.c.id).scalar_subquery().label("operation_id"),
+            exists().where(wallets.c.uuid == wallet_uuid).label("wallet_exists"),
+        )
+        if self.balance_notify_channel:
+            # Only when the guarded UPDATE matched the row
+            stmt = stmt.add_columns(
+                select(func.pg_notify(self.balance_notify_channel, wallet_uuid))
+                .select_from(updated_wallet)
+                .scalar_subquery()
+                .label("notified")
+            )
+
+        async with self.session_factory() as session:
+            async with session.begin():
+                started = time.perf_counter()
+                row = (await session.execute(stmt)).one()
+                OPERATION_PHASE_DURATION.observe(
+                    time.perf_counter() - started, "single_statement"
+                )
+
+        if row.new_balance is None:
+            if not row.wallet_exists:
+                raise WalletNotFoundError()
+            raise InsufficientFundsError()
+        return money.to_api(row.new_balance)
+
+    async def get_idempotent_result(
+        self,
+        idempotency_key: str,
+        wallet_uuid: str,
+        operation_type: OperationType,
+        amount: float,
+    ) -> float:
+        """Return the stored result of an already applied keyed operation."""
         async with self.session_factory() as session:
-            stmt = select(wallets.c.uuid).where(wallets.c.uuid == wallet_uuid)
+            result = await session.execute(
+                select(
+                    idempotency_keys.c.wallet_uuid,
+                    idempotency_keys.c.operation_type,
+                    idempotency_keys.c.amount,
+                    idempotency_keys.c.new_balance,
+                ).where(idempotency_keys.c.key == idempotency_key)
+            )
+            record = result.one()
+
+        if (record.wallet_uuid, record.operation_type, record.amount) != (
+            wallet_uuid,
+            operation_type,
+            money.parse(amount),
+        ):
+            raise IdempotencyKeyMismatchError()
+        return money.to_api(record.new_balance)
+
+    async def purge_idempotency_keys(self, ttl: timedelta, batch_size: int) -> int:
+        """Delete keys older than ``ttl`` in batches, one transaction each."""
+        expired = (
+            select(idempotency_keys.c.key)
+            .where(idempotency_keys.c.created_at < func.now() - ttl)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        stmt = delete(idempotency_keys).where(idempotency_keys.c.key.in_(expired))
+
+        purged = 0
+        while True:
+            async with self.session_factory() as session:
+                async with session.begin():
+                    deleted = (await session.execute(stmt)).rowcount
+            purged += deleted
+            if deleted < batch_size:
+                return purged
+
+    async def process_operations(
+        self,
+        wallet_uuid: str,
+        wallet_operations: Sequence[tuple[OperationType, float]],
+    ) -> list[Union[float, BaseSystemException]]:
+        """Apply several operations on one wallet in a single transaction.
+
+        The result list is aligned with ``wallet_operations``: the balance
+        after the operation or the error it failed with.
+        """
+        return await self.process_operations_batch(
+            [
+                (wallet_uuid, operation_type, amount)
+                for operation_type, amount in wallet_operations
+            ]
+        )
+
+    async def process_operations_batch(
+        self,
+        batch: Sequence[tuple[str, OperationType, float]],
+        atomic: bool = False,
+    ) -> list[Union[float, BaseSystemException]]:
+        """Apply operations on any number of wallets in one transaction.
+
+        Involved wallets are locked with a single ``SELECT ... FOR UPDATE``
+        ordered by UUID, so concurrent batches always lock in the same order
+        and cannot deadlock each other; in slot mode their slots are folded
+        into the locked rows. Operations are applied in the given
+        order, successful ones are written with one bulk ledger insert and
+        every touched wallet gets one balance update.
+
+        With ``atomic`` the first failing operation rolls back the whole
+        batch with ``BatchOperationError``; otherwise failed operations are
+        skipped and reported in the aligned result list.
+        """
+        results: list[Union[float, BaseSystemException]] = []
+        ledger_rows = []
+        wallet_uuids_param = bindparam(
+            "wallet_uuids",
+            sorted({wallet_uuid for wallet_uuid, _, _ in batch}),
+            ARRAY(wallets.c.uuid.type),
+        )
+
+        async with self.session_factory() as session:
+            async with session.begin():
+                stmt = (
+                    select(wallets.c.uuid, wallets.c.balance)
+                    .where(wallets.c.uuid == any_(wallet_uuids_param))
+                    .order_by(wallets.c.uuid)
+                    .with_for_update()
+                )
+                result = await session.execute(stmt)
+                balances: dict[str, Money] = dict(result.tuples().all())
+                if self.wallet_slots:
+                    balances.update(await self._fold_slots(session, sorted(balances)))
+                touched: set[str] = set()
+
+                for index, item in enumerate(batch):
+                    wallet_uuid, operation_type, amount = item
+                    stored_amount = money.parse(amount)
+                    try:
+                        if wallet_uuid not in balances:
+                            raise WalletNotFoundError()
+                        balances[wallet_uuid] = apply_operation(
+                            balances[wallet_uuid], operation_type, stored_amount
+                        )
+                    except (WalletNotFoundError, InsufficientFundsError) as e:
+                        OPERATION_ERRORS.inc(type(e).__name__)
+                        if atomic:
+                            raise BatchOperationError(index, e)
+                        results.append(e)
+                        continue
+
+                    touched.add(wallet_uuid)
+                    ledger_rows.append(
+                        {
+                            "wallet_uuid": wallet_uuid,
+                            "operation_type": operation_type,
+                            "amount": stored_amount,
+                        }
+                    )
+                    results.append(money.to_api(balances[wallet_uuid]))
+
+                if ledger_rows:
+                    await session.execute(insert(self.ledger_table), ledger_rows)
+                    await session.execute(
+                        update(wallets)
+                        .where(wallets.c.uuid == bindparam("b_uuid"))
+                        .values(balance=bindparam("b_balance")),
+                        [
+                            {"b_uuid": uuid, "b_balance": balances[uuid]}
+                            for uuid in sorted(touched)
+                        ],
+                    )
+                    await self._notify_balance_changed(session, sorted(touched))
+
+        self._wallets_written(touched)
+        return results
+
+    async def transfer(
+        self, source_uuid: str, target_uuid: str, amount: float
+    ) -> float:
+        """Move ``amount`` from one wallet to another in one statement.
+
+        Both wallet rows are locked by a ``SELECT ... FOR UPDATE`` ordered by
+        UUID, the order ``process_operations_batch`` uses too, so transfers in
+        opposite directions cannot deadlock. The guarded update of both
+        balances and the paired TRANSFER / TRANSFER_IN ledger rows are
+        data-modifying CTEs of the same statement: one round trip. In slot
+        mode the rows are locked and their slots folded into them first.
+        Returns the new balance of the source wallet.
+        """
+        if source_uuid == target_uuid:
+            raise ValueError("Cannot transfer to the same wallet")
+        stored_amount = literal(money.parse(amount), wallets.c.balance.type)
+        operation_type = operations.c.operation_type.type
+
+        locked = (
+            select(wallets.c.uuid, wallets.c.balance)
+            .where(wallets.c.uuid.in_([source_uuid, target_uuid]))
+            .order_by(wallets.c.uuid)
+            .with_for_update()
+            .cte("locked")
+        )
+        locked_count = select(func.count()).select_from(locked).scalar_subquery()
+        source_balance = (
+            select(locked.c.balance)
+            .where(locked.c.uuid == source_uuid)
+            .scalar_subquery()
+        )
+
+        updated = (
+            update(wallets)
+            .where(
+                wallets.c.uuid == locked.c.uuid,
+                locked_count == 2,
+                source_balance >= stored_amount,
+            )
+            .values(
+                balance=wallets.c.balance
+                + case(
+                    (wallets.c.uuid == source_uuid, -stored_amount),
+                    else_=stored_amount,
+                )
+            )
+            .returning(wallets.c.uuid, wallets.c.balance)
+            .cte("updated")
+        )
+        ledger_rows = (
+            insert(self.ledger_table)
+            .from_select(
+                ["wallet_uuid", "operation_type", "amount"],
+                select(
+                    updated.c.uuid,
+                    case(
+                        (
+                            updated.c.uuid == source_uuid,
+                            literal(OperationType.TRANSFER, operation_type),
+                        ),
+                        else_=literal(OperationType.TRANSFER_IN, operation_type),
+                    ),
+                    stored_amount,
+                ).order_by(updated.c.uuid != source_uuid),
+            )
+            .cte("ledger_rows")
+        )
+
+        stmt = select(
+            select(updated.c.balance)
+            .where(updated.c.uuid == source_uuid)
+            .scalar_subquery()
+            .label("new_balance"),
+            locked_count.label("wallets_found"),
+        ).add_cte(ledger_rows)
+        if self.balance_notify_channel:
+            # Only for the wallets the guarded update changed
+            notified = (
+                select(
+                    func.pg_notify(
+                        self.balance_notify_channel, cast(updated.c.uuid, String)
+                    )
+                )
+                .select_from(updated)
+                .cte("notified")
+            )
+            stmt = stmt.add_columns(
+                select(func.count())
+                .select_from(notified)
+                .scalar_subquery()
+                .label("notified")
+            )
+
+        try:
+            async with self.session_factory() as session:
+                async with session.begin():
+                    started = time.perf_counter()
+                    if self.wallet_slots:
+                        await session.execute(select(locked.c.uuid))
+                        await self._fold_slots(
+                            session, sorted([source_uuid, target_uuid])
+                        )
+                    row = (await session.execute(stmt)).one()
+                    OPERATION_PHASE_DURATION.observe(
+                        time.perf_counter() - started, "transfer"
+                    )
+
+            if row.new_balance is None:
+                if row.wallets_found < 2:
+                    raise WalletNotFoundError()
+                raise InsufficientFundsError()
+        except (WalletNotFoundError, InsufficientFundsError) as e:
+            OPERATION_ERRORS.inc(type(e).__name__)
+            raise
+        self._wallets_written([source_uuid, target_uuid])
+        return money.to_api(row.new_balance)
+
+    async def get_operations(
+        self,
+        wallet_uuid: str,
+        limit: int,
+        cursor: Optional[int] = None,
+    ) -> tuple[list[dict], Optional[int]]:
+        """Return one page of wallet operations, newest first.
+
+        Keyset pagination on ``(wallet_uuid, id)``: ``cursor`` is the id of
+        the last operation of the previous page, so every page costs one
+        index range scan regardless of its position.
+        """
+        history = ledger if self.ledger_staging else operations
+        stmt = (
+            select(
+                history.c.id,
+                history.c.operation_type,
+                history.c.amount,
+                history.c.created_at,
+            )
+            .where(history.c.wallet_uuid == wallet_uuid)
+            .order_by(history.c.id.desc())
+            .limit(limit + 1)
+        )
+        if cursor is not None:
+            stmt = stmt.where(history.c.id < cursor)
+
+        async with self._read_session_factory(wallet_uuid)() as session:
             result = await session.execute(stmt)
-            exists = result.scalar_one_or_none()
-            if exists is not None:
-                raise Exception(f"Wallet with UUID {wallet_uuid} already exists")
+            rows = [dict(row) for row in result.mappings()]
+
+            if not rows:
+                wallet_exists = await session.scalar(
+                    select(exists().where(wallets.c.uuid == wallet_uuid))
+                )
+                if not wallet_exists:
+                    raise WalletNotFoundError()
+
+        next_cursor = rows[limit - 1]["id"] if len(rows) > limit else None
+        return rows[:limit], next_cursor
+
+    async def get_operation_stats(
+        self,
+        wallet_uuid: str,
+        granularity: RollupGranularity,
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+    ) -> tuple[list[dict], datetime]:
+        """Return the wallet's turnover rollups, oldest bucket first.
+
+        Buckets are included when they start within ``[since, until]``. The
+        second value is the time of the last rollup pass; operations still
+        in flight then are not counted yet.
+        """
+        stmt = (
+            select(
+                operation_rollups.c.bucket,
+                operation_rollups.c.deposits,
+                operation_rollups.c.withdrawals,
+                (
+                    operation_rollups.c.deposits - operation_rollups.c.withdrawals
+                ).label("net"),
+                operation_rollups.c.operations_count,
+            )
+            .where(
+                operation_rollups.c.wallet_uuid == wallet_uuid,
+                operation_rollups.c.granularity == granularity,
+            )
+            .order_by(operation_rollups.c.bucket)
+        )
+        if since is not None:
+            stmt = stmt.where(operation_rollups.c.bucket >= since)
+        if until is not None:
+            stmt = stmt.where(operation_rollups.c.bucket <= until)
 
-            await session.execute(
-                insert(wallets).values(
-                    uuid=wallet_uuid,
-                    balance=initial_balance,
+        async with self._read_session_factory(wallet_uuid)() as session:
+            rows = [dict(row) for row in (await session.execute(stmt)).mappings()]
+            if not rows:
+                wallet_exists = await session.scalar(
+                    select(exists().where(wallets.c.uuid == wallet_uuid))
+                )
+                if not wallet_exists:
+                    raise WalletNotFoundError()
+            rolled_up_at = await session.scalar(
+                select(rollup_checkpoints.c.updated_at).where(
+                    rollup_checkpoints.c.name == ROLLUP_CHECKPOINT_NAME
                 )
             )
-            await session.commit()
-            return wallet_uuid
+        return rows, rolled_up_at
+
+    async def rollup_operations(self, batch_size: int) -> tuple[int, bool]:
+        """Fold the ledger rows after the rollup checkpoint into the rollups.
+
+        The checkpoint is a transaction id: one pass folds in the rows of at
+        most ``batch_size`` transaction ids starting at it and moves it past
+        them. Passes stop at ``finished_txid_horizon``, so a transaction
+        still in flight is never skipped however late it commits. The
+        checkpoint row is locked with ``SKIP LOCKED``, so concurrent workers
+        leave the batch to the one holding it.
+
+        Returns the number of ledger rows folded in and whether the rollups
+        caught up with the finished transactions.
+        """
+        async with self.session_factory() as session:
+            async with session.begin():
+                next_txid = await session.scalar(
+                    select(rollup_checkpoints.c.next_txid)
+                    .where(rollup_checkpoints.c.name == ROLLUP_CHECKPOINT_NAME)
+                    .with_for_update(skip_locked=True)
+                )
+                if next_txid is None:
+                    return 0, True
+                horizon = await session.scalar(select(finished_txid_horizon()))
+                if horizon <= next_txid:
+                    return 0, True
+                upto = min(horizon, next_txid + batch_size)
+
+                rolled_up = 0
+                for granularity in RollupGranularity:
+                    rolled_up = await self._rollup_batch(
+                        session, granularity, next_txid, upto
+                    )
+                await session.execute(
+                    update(rollup_checkpoints)
+                    .where(rollup_checkpoints.c.name == ROLLUP_CHECKPOINT_NAME)
+                    .values(next_txid=upto, updated_at=func.now())
+                )
+        return rolled_up, upto == horizon
+
+    async def _rollup_batch(
+        self,
+        session: AsyncSession,
+        granularity: RollupGranularity,
+        from_txid: int,
+        upto_txid: int,
+    ) -> int:
+        """Add the rows of transactions ``[from_txid, upto_txid)`` to one rollup."""
+        zero = literal(money.parse(0), operations.c.amount.type)
+        # Buckets are UTC days and months
+        bucket = cast(
+            func.date_trunc(
+                granularity.value, func.timezone("UTC", ledger.c.created_at)
+            ),
+            operation_rollups.c.bucket.type,
+        )
+        batch = (
+            select(
+                ledger.c.wallet_uuid,
+                literal(granularity, operation_rollups.c.granularity.type).label(
+                    "granularity"
+                ),
+                bucket.label("bucket"),
+                func.sum(
+                    case(
+                        (
+                            ledger.c.operation_type.in_(CREDIT_OPERATION_TYPES),
+                            ledger.c.amount,
+                        ),
+                        else_=zero,
+                    )
+                ).label("deposits"),
+                func.sum(
+                    case(
+                        (
+                            ledger.c.operation_type.in_(DEBIT_OPERATION_TYPES),
+                            ledger.c.amount,
+                        ),
+                        else_=zero,
+                    )
+                ).label("withdrawals"),
+                func.count().label("operations_count"),
+            )
+            .where(ledger.c.txid >= from_txid, ledger.c.txid < upto_txid)
+            .group_by(ledger.c.wallet_uuid, bucket)
+            .cte("batch")
+        )
+        upsert = pg_insert(operation_rollups).from_select(
+            list(batch.c.keys()), select(batch)
+        )
+        upsert = upsert.on_conflict_do_update(
+            index_elements=[
+                operation_rollups.c.wallet_uuid,
+                operation_rollups.c.granularity,
+                operation_rollups.c.bucket,
+            ],
+            set_={
+                "deposits": operation_rollups.c.deposits + upsert.excluded.deposits,
+                "withdrawals": (
+                    operation_rollups.c.withdrawals + upsert.excluded.withdrawals
+                ),
+                "operations_count": (
+                    operation_rollups.c.operations_count
+                    + upsert.excluded.operations_count
+                ),
+            },
+        ).cte("upsert")
+        stmt = select(
+            func.coalesce(func.sum(batch.c.operations_count), 0)
+        ).add_cte(upsert)
+        return await session.scalar(stmt)
+
+    async def stream_operations(
+        self, wallet_uuid: str, chunk_size: int
+    ) -> AsyncIterator[Sequence[Row]]:
+        """Yield all wallet operations, oldest first, in chunks.
+
+        Rows come from a server-side cursor, so memory use is bounded by
+        ``chunk_size`` regardless of the ledger size.
+        """
+        history = ledger if self.ledger_staging else operations
+        stmt = (
+            select(
+                history.c.id,
+                history.c.operation_type,
+                history.c.amount,
+                history.c.created_at,
+            )
+            .where(history.c.wallet_uuid == wallet_uuid)
+            .order_by(history.c.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        async with self._read_session_factory(wallet_uuid)() as session:
+            result = await session.stream(stmt)
+            async for chunk in result.partitions():
+                yield chunk
+
+    async def create_wallet(self, wallet_uuid: str, initial_balance: float = 0) -> str:
+        created = await self.create_wallets([(wallet_uuid, initial_balance)])
+        if not created:
+            raise WalletAlreadyExistsError(wallet_uuid)
+        return wallet_uuid
+
+    async def create_wallets(
+        self, new_wallets: Sequence[tuple[str, float]]
+    ) -> list[str]:
+        """Insert wallets with one statement and return the created UUIDs.
+
+        Existing UUIDs are skipped with ``ON CONFLICT DO NOTHING``. Non-zero
+        initial balances get an opening DEPOSIT ledger row in the same
+        statement, so balances stay equal to their ledger sums.
+        """
+        rows = func.unnest(
+            bindparam(
+                "wallet_uuids",
+                [uuid for uuid, _ in new_wallets],
+                ARRAY(wallets.c.uuid.type),
+            ),
+            bindparam(
+                "balances",
+                [money.parse(balance) for _, balance in new_wallets],
+                ARRAY(wallets.c.balance.type),
+            ),
+        ).table_valued("uuid", "balance")
+        inserted = (
+            pg_insert(wallets)
+            .from_select(["uuid", "balance"], select(rows.c.uuid, rows.c.balance))
+            .on_conflict_do_nothing()
+            .returning(wallets.c.uuid, wallets.c.balance)
+            .cte("inserted")
+        )
+        opening_balance = (
+            insert(self.ledger_table)
+            .from_select(
+                ["wallet_uuid", "operation_type", "amount"],
+                select(
+                    inserted.c.uuid,
+                    literal(OperationType.DEPOSIT, operations.c.operation_type.type),
+                    inserted.c.balance,
+                ).where(inserted.c.balance > 0),
+            )
+            .cte("opening_balance")
+        )
+        stmt = select(inserted.c.uuid).add_cte(opening_balance)
+
+        async with self.session_factory() as session:
+            async with session.begin():
+                result = await session.execute(stmt)
+                created = list(result.scalars())
+
+        self._wallets_written(created)
+        return created
+
+    async def copy_wallets(self, wallet_uuids: Sequence[str]) -> None:
+        """Bulk-load new zero-balance wallets with ``COPY``.
+
+        ``COPY`` has no conflict handling, so this is only for freshly
+        generated UUIDs.
+        """
+        async with self.session_factory() as session:
+            async with session.begin():
+                connection = await session.connection()
+                raw_connection = await connection.get_raw_connection()
+                await raw_connection.driver_connection.copy_records_to_table(
+                    wallets.name,
+                    schema_name=wallets.schema,
+                    columns=["uuid", "balance"],
+                    records=[(wallet_uuid, 0) for wallet_uuid in wallet_uuids],
+                )
+
+        self._wallets_written(wallet_uuids)
+
+    async def flush_staged_operations(self, batch_size: int) -> tuple[int, int]:
+        """Move the oldest staged operations to ``operation`` with ``COPY``.
+
+        Up to ``batch_size`` rows are deleted from ``operation_staging`` and
+        copied with their ids in the same transaction. ``SKIP LOCKED`` lets
+        the flushers of several workers run side by side. Returns the number
+        of rows moved and the number still staged.
+        """
+        oldest = (
+            select(operation_staging.c.id)
+            .order_by(operation_staging.c.id)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            delete(operation_staging)
+            .where(operation_staging.c.id.in_(oldest.scalar_subquery()))
+            .returning(*(operation_staging.c[name] for name in LEDGER_COLUMNS))
+        )
+
+        async with self.session_factory() as session:
+            async with session.begin():
+                rows = (await session.execute(stmt)).all()
+                if rows:
+                    connection = await session.connection()
+                    raw_connection = await connection.get_raw_connection()
+                    await raw_connection.driver_connection.copy_records_to_table(
+                        operations.name,
+                        schema_name=operations.schema,
+                        columns=LEDGER_COLUMNS,
+                        records=[
+                            (
+                                row.id,
+                                row.wallet_uuid,
+                                row.operation_type.value,
+                                row.amount,
+                                row.created_at,
+                                row.txid,
+                            )
+                            for row in rows
+                        ],
+                    )
+                remaining = await session.scalar(
+                    select(func.count()).select_from(operation_staging)
+                )
+        return len(rows), remaining
@@ -0,0 +1,31 @@
+from sqlalchemy import (
+    Table,
+    Column,
+    BigInteger,
+    Uuid,
+    DateTime,
+    ForeignKey,
+    func,
+)
+
+from database.models.base import metadata
+from database.models.wallet import wallets
+from money import money
+
+# Ledger sum of a wallet over the operations of transactions below
+# ``next_txid``; see ``LedgerReconciliation``
+balance_checkpoints = Table(
+    "balance_checkpoint",
+    metadata,
+    Column(
+        "wallet_uuid", Uuid(as_uuid=False), ForeignKey(wallets.c.uuid), primary_key=True
+    ),
+    Column("next_txid", BigInteger, nullable=False),
+    Column("balance", money.column_type(), nullable=False),
+    Column(
+        "updated_at",
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    ),
+)
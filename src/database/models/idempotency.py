@@ -0,0 +1,31 @@
+from sqlalchemy import (
+    Table,
+    Column,
+    String,
+    Uuid,
+    Enum,
+    DateTime,
+    Index,
+    func,
+)
+
+from database.models.base import metadata
+from database.models.withdraw import OperationType
+from money import money
+
+idempotency_keys = Table(
+    "idempotency_key",
+    metadata,
+    Column("key", String(255), primary_key=True),
+    Column("wallet_uuid", Uuid(as_uuid=False), nullable=False),
+    Column("operation_type", Enum(OperationType), nullable=False),
+    Column("amount", money.column_type(), nullable=False),
+    Column("new_balance", money.column_type(), nullable=False),
+    Column(
+        "created_at",
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    ),
+    Index("ix_idempotency_key_created_at", "created_at"),
+)
@@ -0,0 +1,60 @@
+from sqlalchemy import (
+    Table,
+    Column,
+    BigInteger,
+    Uuid,
+    Enum,
+    DateTime,
+    Index,
+    func,
+    select,
+    text,
+    union_all,
+)
+
+from database.models.base import metadata
+from database.models.withdraw import CURRENT_TXID, operations, OperationType
+from money import money
+
+# Write-behind ledger rows, moved to ``operation`` by the ledger flusher.
+# Ids come from the ``operation`` sequence and are kept when the rows are
+# moved, so a staged row already has its final position in the ledger. No
+# foreign key keeps the append in the balance transaction cheap; the one
+# secondary index serves the history reads through ``ledger``.
+operation_staging = Table(
+    "operation_staging",
+    metadata,
+    Column(
+        "id",
+        BigInteger,
+        primary_key=True,
+        server_default=text(f"nextval('{operations.schema}.operation_id_seq')"),
+    ),
+    Column("wallet_uuid", Uuid(as_uuid=False), nullable=False),
+    Column("operation_type", Enum(OperationType), nullable=False),
+    Column("amount", money.column_type(), nullable=False),
+    Column(
+        "created_at",
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    ),
+    Column("txid", BigInteger, server_default=CURRENT_TXID),
+    Index("ix_operation_staging_wallet_uuid_id", "wallet_uuid", "id"),
+)
+
+LEDGER_COLUMNS = [
+    "id",
+    "wallet_uuid",
+    "operation_type",
+    "amount",
+    "created_at",
+    "txid",
+]
+
+# Flushed and staged operations; a flush moves rows in one transaction, so
+# every snapshot sees each operation exactly once
+ledger = union_all(
+    select(*(operations.c[name] for name in LEDGER_COLUMNS)),
+    select(*(operation_staging.c[name] for name in LEDGER_COLUMNS)),
+).subquery("ledger")
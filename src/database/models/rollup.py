@@ -0,0 +1,55 @@
+from sqlalchemy import (
+    Table,
+    Column,
+    BigInteger,
+    Date,
+    DateTime,
+    Enum,
+    ForeignKey,
+    String,
+    Uuid,
+    func,
+)
+import enum
+
+from database.models.base import metadata
+from database.models.wallet import wallets
+from money import money
+
+
+class RollupGranularity(enum.Enum):
+    DAY = "day"
+    MONTH = "month"
+
+
+# Per-wallet turnover by UTC day and month, folded in from the ledger by
+# ``WalletDAO.rollup_operations``. Credits (DEPOSIT, TRANSFER_IN) count as
+# deposits and debits (WITHDRAW, TRANSFER) as withdrawals.
+operation_rollups = Table(
+    "operation_rollup",
+    metadata,
+    Column(
+        "wallet_uuid", Uuid(as_uuid=False), ForeignKey(wallets.c.uuid), primary_key=True
+    ),
+    Column("granularity", Enum(RollupGranularity), primary_key=True),
+    Column("bucket", Date, primary_key=True),
+    Column("deposits", money.column_type(), nullable=False),
+    Column("withdrawals", money.column_type(), nullable=False),
+    Column("operations_count", BigInteger, nullable=False),
+)
+
+# Ledger rows written by transactions below ``next_txid`` are folded into
+# the rollups. The single row is created by the migration.
+ROLLUP_CHECKPOINT_NAME = "operation_rollup"
+rollup_checkpoints = Table(
+    "rollup_checkpoint",
+    metadata,
+    Column("name", String, primary_key=True),
+    Column("next_txid", BigInteger, nullable=False),
+    Column(
+        "updated_at",
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    ),
+)
@@ -0,0 +1,45 @@
+from typing import Optional
+
+from sqlalchemy import (
+    Table,
+    Column,
+    Connection,
+    String,
+    select,
+)
+
+from database.models.base import metadata
+from money import MONEY_MODES
+from settings import settings
+
+# Settings the schema was migrated with; the app has to run with the same
+# ones. ``money_mode`` is recorded by the minor units migration, which
+# converts the money columns, and the later migrations type theirs after it.
+MONEY_MODE_SETTING = "money_mode"
+schema_settings = Table(
+    "schema_setting",
+    metadata,
+    Column("name", String, primary_key=True),
+    Column("value", String, nullable=False),
+)
+
+
+def money_mode_query():
+    return select(schema_settings.c.value).where(
+        schema_settings.c.name == MONEY_MODE_SETTING
+    )
+
+
+def migrated_money_mode(connection: Optional[Connection]) -> str:
+    """The money mode recorded in the schema of ``connection``.
+
+    Offline migrations (``alembic upgrade --sql``) have no connection to
+    read it from and render the configured ``MONEY_MODE``.
+    """
+    if connection is None:
+        return settings.MONEY_MODE
+    return connection.scalar(money_mode_query())
+
+
+def migrated_money_column_type(connection: Optional[Connection]):
+    return MONEY_MODES[migrated_money_mode(connection)].column_type()
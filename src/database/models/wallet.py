@@ -1,15 +1,20 @@
 from sqlalchemy import (
     Table,
     Column,
-    String,
-    Numeric,
+    Integer,
+    Uuid,
+    text,
 )
 
 from ..models.base import metadata
+from money import money
 
 wallets = Table(
     "wallet",
     metadata,
-    Column("uuid", String, primary_key=True),
-    Column("balance", Numeric(18, 2), default=0),
+    Column("uuid", Uuid(as_uuid=False), primary_key=True),
+    Column("balance", money.column_type(), default=0),
+    # Number of ``wallet_slot`` rows, kept by ``WalletDAO.set_wallet_slots``;
+    # lets one statement tell slot-mode wallets from plain ones
+    Column("slots", Integer, server_default=text("0"), nullable=False),
 )
@@ -0,0 +1,40 @@
+from sqlalchemy import (
+    Table,
+    Column,
+    Integer,
+    Uuid,
+    ForeignKey,
+    cast,
+    func,
+    select,
+)
+
+from database.models.base import metadata
+from database.models.wallet import wallets
+from money import money
+
+# Sub-balances of wallets in slot mode. Such a wallet's balance is its
+# ``wallet.balance`` plus the sum of its slots; deposits spread over the
+# slot rows instead of queueing on the wallet row lock.
+wallet_slots = Table(
+    "wallet_slot",
+    metadata,
+    Column(
+        "wallet_uuid", Uuid(as_uuid=False), ForeignKey(wallets.c.uuid), primary_key=True
+    ),
+    Column("slot", Integer, primary_key=True),
+    Column("balance", money.column_type(), nullable=False),
+)
+
+
+def slots_balance(wallet_uuid):
+    """Sum of a wallet's slot balances; 0 for wallets not in slot mode."""
+    return cast(
+        func.coalesce(
+            select(func.sum(wallet_slots.c.balance))
+            .where(wallet_slots.c.wallet_uuid == wallet_uuid)
+            .scalar_subquery(),
+            0,
+        ),
+        wallet_slots.c.balance.type,
+    )
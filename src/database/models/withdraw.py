@@ -1,29 +1,76 @@
 from sqlalchemy import (
     Table,
     Column,
-    Integer,
-    String,
-    Numeric,
+    BigInteger,
+    Uuid,
     Enum,
     ForeignKey,
+    DateTime,
+    Index,
+    Text,
+    cast,
+    func,
+    text,
 )
 import enum
 
 from database.models.wallet import wallets
 
 from database.models.base import metadata
+from money import money
 
 
 class OperationType(enum.Enum):
     DEPOSIT = "DEPOSIT"
     WITHDRAW = "WITHDRAW"
+    # Debits the wallet and credits the target wallet, whose ledger gets
+    # the paired TRANSFER_IN row
+    TRANSFER = "TRANSFER"
+    TRANSFER_IN = "TRANSFER_IN"
+
+
+CREDIT_OPERATION_TYPES = (OperationType.DEPOSIT, OperationType.TRANSFER_IN)
+DEBIT_OPERATION_TYPES = (OperationType.WITHDRAW, OperationType.TRANSFER)
+
+# Id (xid8) of the transaction writing a ledger row, as a bigint
+CURRENT_TXID = text("pg_current_xact_id()::text::bigint")
+
+
+def finished_txid_horizon():
+    """Transaction id below which every transaction has committed or aborted.
+
+    Ledger rows with a lower ``txid`` are visible now or never will be,
+    whatever order their transactions committed in; the operation ids and
+    ``created_at`` are taken before commit and give no such bound.
+    """
+    return cast(
+        cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), Text), BigInteger
+    )
 
 
 operations = Table(
     "operation",
     metadata,
-    Column("id", Integer, primary_key=True, autoincrement=True),
-    Column("wallet_uuid", String, ForeignKey(wallets.c.uuid)),
+    Column("id", BigInteger, primary_key=True, autoincrement=True),
+    Column("wallet_uuid", Uuid(as_uuid=False), ForeignKey(wallets.c.uuid)),
     Column("operation_type", Enum(OperationType)),
-    Column("amount", Numeric(18, 2)),
+    Column("amount", money.column_type()),
+    Column(
+        "created_at",
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    ),
+    # NULL for rows written before the column existed
+    Column("txid", BigInteger, server_default=CURRENT_TXID),
+    # Covers the history page, which is served by an index-only scan
+    Index(
+        "ix_operation_wallet_uuid_id",
+        "wallet_uuid",
+        "id",
+        postgresql_include=["operation_type", "amount", "created_at"],
+    ),
+    # Transaction ids grow with the insertion order, so a BRIN index finds
+    # the rows of a txid range at almost no write cost
+    Index("ix_operation_txid", "txid", postgresql_using="brin"),
 )
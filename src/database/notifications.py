@@ -0,0 +1,74 @@
+import asyncio
+import logging
+from typing import Optional
+
+import asyncpg
+
+from services.cache import LRUCache
+
+
+class BalanceChangeListener:
+    """Drops cached balances changed by other workers and replicas.
+
+    Writers publish the wallet UUID on ``channel`` with ``pg_notify`` in the
+    same transaction as the balance update, so notifications are delivered
+    only for committed changes. The listener keeps one dedicated asyncpg
+    connection outside the pool. While it is disconnected the cache is
+    cleared and staleness is bounded by the cache TTL.
+    """
+
+    RECONNECT_DELAY = 1.0
+    RECONNECT_MAX_DELAY = 30.0
+
+    def __init__(self, dsn: str, channel: str, cache: LRUCache):
+        self.dsn = dsn
+        self.channel = channel
+        self.cache = cache
+        self._connection: Optional[asyncpg.Connection] = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    async def start(self) -> None:
+        self._connection = await asyncpg.connect(self.dsn)
+        self._connection.add_termination_listener(self._on_termination)
+        await self._connection.add_listener(self.channel, self._on_notification)
+
+    async def stop(self) -> None:
+        self._closed = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+        if self._connection is not None and not self._connection.is_closed():
+            await self._connection.close()
+
+    def _on_notification(self, connection, pid, channel, payload) -> None:
+        self.cache.invalidate(payload)
+
+    def _on_termination(self, connection) -> None:
+        self.cache.clear()
+        if not self._closed:
+            logging.warning("Balance change listener disconnected, reconnecting")
+            self._reconnect_task = asyncio.create_task(self._reconnect())
+
+    async def _reconnect(self) -> None:
+        delay = self.RECONNECT_DELAY
+        while not self._closed:
+            await asyncio.sleep(delay)
+            try:
+                await self.start()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Any failure (DNS, auth, TLS, protocol) must not end the
+                # loop, or the cache would stay unsynchronised until restart
+                logging.exception("Balance change listener reconnect failed")
+                await self._close_connection()
+                delay = min(delay * 2, self.RECONNECT_MAX_DELAY)
+                continue
+            self.cache.clear()
+            return
+
+    async def _close_connection(self) -> None:
+        connection, self._connection = self._connection, None
+        if connection is not None and not connection.is_closed():
+            connection.remove_termination_listener(self._on_termination)
+            connection.terminate()
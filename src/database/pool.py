@@ -0,0 +1,77 @@
+import bisect
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+class PoolStats:
+    """Checkout counters and a wait-time histogram of one connection pool."""
+
+    WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.wait_buckets = [0] * (len(self.WAIT_BUCKETS_MS) + 1)
+
+    def observe_wait(self, seconds: float) -> None:
+        self.wait_time_total += seconds
+        self.wait_time_max = max(self.wait_time_max, seconds)
+        index = bisect.bisect_left(self.WAIT_BUCKETS_MS, seconds * 1000)
+        self.wait_buckets[index] += 1
+
+    def stats(self) -> dict:
+        observed = self.checkouts + self.timeouts
+        bounds = [f"le_{bound}ms" for bound in self.WAIT_BUCKETS_MS] + ["le_inf"]
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_time_total": round(self.wait_time_total, 6),
+            "wait_time_max": round(self.wait_time_max, 6),
+            "wait_time_avg": (
+                round(self.wait_time_total / observed, 6) if observed else 0.0
+            ),
+            "wait_histogram": dict(zip(bounds, self.wait_buckets)),
+        }
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """``AsyncAdaptedQueuePool`` that records how long checkouts wait.
+
+    ``stats`` survives ``recreate()``, so counters are kept across
+    ``engine.dispose()``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def recreate(self) -> "InstrumentedAsyncPool":
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            self.stats.observe_wait(time.perf_counter() - started)
+            raise
+        self.stats.checkouts += 1
+        self.stats.observe_wait(time.perf_counter() - started)
+        return connection
+
+    def snapshot(self) -> dict:
+        return {
+            "size": self.size(),
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow_in_use": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            **self.stats.stats(),
+        }
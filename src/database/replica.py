@@ -0,0 +1,103 @@
+import asyncio
+import enum
+import logging
+from typing import Iterable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from services.cache import LRUCache
+
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())"
+    " END"
+)
+
+
+class ReadConsistency(str, enum.Enum):
+    """Value of the ``X-Read-Consistency`` request header."""
+
+    PRIMARY = "primary"
+    REPLICA = "replica"
+
+
+class ReplicaRouter:
+    """Decides whether a read may go to the replica.
+
+    Reads go to the primary when the request asks for ``primary``
+    consistency, when this worker wrote the wallet within the
+    ``recent_writes`` TTL (read-your-writes), or when the last measured
+    replica lag is unknown or above ``max_lag``. ``monitor_lag`` keeps the
+    lag up to date.
+
+    ``recent_writes`` lives in this worker's memory, so read-your-writes
+    only holds when the read lands on the worker that made the write.
+    Requests default to ``primary`` consistency (``READ_CONSISTENCY_DEFAULT``)
+    for that reason; ``replica`` reads are for callers that tolerate up to
+    ``max_lag`` of staleness.
+    """
+
+    def __init__(
+        self,
+        replica_session_factory: async_sessionmaker[AsyncSession],
+        max_lag: float,
+        recent_writes: LRUCache,
+    ):
+        self.replica_session_factory = replica_session_factory
+        self.max_lag = max_lag
+        self.recent_writes = recent_writes
+        self.lag: Optional[float] = None
+        self.replica_reads = 0
+        self.primary_reads = 0
+        self.fallbacks = 0
+
+    @property
+    def healthy(self) -> bool:
+        return self.lag is not None and self.lag <= self.max_lag
+
+    def use_replica(self, wallet_uuid: str, consistency: ReadConsistency) -> bool:
+        use_replica = (
+            consistency != ReadConsistency.PRIMARY
+            and self.recent_writes.get(wallet_uuid) is None
+        )
+        if use_replica and not self.healthy:
+            self.fallbacks += 1
+            use_replica = False
+        if use_replica:
+            self.replica_reads += 1
+        else:
+            self.primary_reads += 1
+        return use_replica
+
+    def record_writes(self, wallet_uuids: Iterable[str]) -> None:
+        for wallet_uuid in wallet_uuids:
+            self.recent_writes.set(wallet_uuid, True)
+
+    async def measure_lag(self) -> Optional[float]:
+        try:
+            async with self.replica_session_factory() as session:
+                lag = await session.scalar(REPLICA_LAG_QUERY)
+        except Exception:
+            logging.exception("Replica lag check failed")
+            lag = None
+        # NULL before the replica has replayed any transaction
+        self.lag = float(lag) if lag is not None else None
+        return self.lag
+
+    async def monitor_lag(self, interval: float) -> None:
+        while True:
+            await self.measure_lag()
+            await asyncio.sleep(interval)
+
+    def stats(self) -> dict:
+        return {
+            "lag_seconds": self.lag,
+            "max_lag_seconds": self.max_lag,
+            "healthy": self.healthy,
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "fallbacks": self.fallbacks,
+            "recent_writes": len(self.recent_writes),
+        }
@@ -1,27 +1,167 @@
-from fastapi import Depends
+from typing import Optional
+
+from fastapi import Depends, Header
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
-from database.core import async_session_maker
+from database.core import async_session_maker, replica_session_maker
+from database.dao.asyncpg_wallet_dao import AsyncpgWalletDAO
 from database.dao.wallet_dao import WalletDAO
+from database.replica import ReadConsistency, ReplicaRouter
+from services.admission import AdmissionController
+from services.cache import LRUCache
+from services.ledger_flusher import LedgerFlusher
+from services.operation_batcher import OperationBatcher
+from services.wallet_locks import WalletLockManager
 from services.wallet_service import WalletService
+from settings import settings
 from usecases.get_wallet_balance_usecase import GetWalletBalanceUseCase
+from usecases.get_wallet_operations_usecase import GetWalletOperationsUseCase
+from usecases.export_wallet_operations_usecase import ExportWalletOperationsUseCase
 from usecases.process_wallet_operation_usecase import ProcessWalletOperationUseCase
+from usecases.process_wallet_operations_batch_usecase import (
+    ProcessWalletOperationsBatchUseCase,
+)
 from usecases.create_waller_usecase import CreateWalletUseCase
+from usecases.create_wallets_bulk_usecase import CreateWalletsBulkUseCase
+from usecases.set_wallet_slots_usecase import SetWalletSlotsUseCase
+from usecases.get_wallet_stats_usecase import GetWalletStatsUseCase
+
+
+balance_cache = (
+    LRUCache(
+        max_size=settings.BALANCE_CACHE_MAX_SIZE,
+        ttl=settings.BALANCE_CACHE_TTL_SECONDS,
+    )
+    if settings.BALANCE_CACHE_ENABLED
+    else None
+)
+
+idempotency_cache = (
+    LRUCache(
+        max_size=settings.IDEMPOTENCY_CACHE_MAX_SIZE,
+        ttl=settings.IDEMPOTENCY_CACHE_TTL_SECONDS,
+    )
+    if settings.IDEMPOTENCY_CACHE_MAX_SIZE
+    else None
+)
+
+replica_router = (
+    ReplicaRouter(
+        replica_session_maker,
+        max_lag=settings.REPLICA_MAX_LAG_SECONDS,
+        recent_writes=LRUCache(
+            max_size=settings.READ_YOUR_WRITES_MAX_SIZE,
+            ttl=settings.READ_YOUR_WRITES_WINDOW_SECONDS,
+        ),
+    )
+    if replica_session_maker is not None
+    else None
+)
+
+
+def build_wallet_dao(
+    session_factory: async_sessionmaker[AsyncSession],
+    read_consistency: ReadConsistency = ReadConsistency.REPLICA,
+) -> WalletDAO:
+    notify = settings.BALANCE_CACHE_ENABLED and settings.BALANCE_CACHE_NOTIFY
+    dao_class = (
+        AsyncpgWalletDAO if settings.WALLET_DAO_BACKEND == "asyncpg" else WalletDAO
+    )
+    return dao_class(
+        session_factory,
+        operation_strategy=settings.WALLET_OPERATION_STRATEGY,
+        balance_cache=balance_cache,
+        balance_notify_channel=(
+            settings.BALANCE_CACHE_NOTIFY_CHANNEL if notify else None
+        ),
+        replica_router=replica_router,
+        read_consistency=read_consistency,
+        ledger_staging=settings.LEDGER_STAGING_ENABLED,
+        wallet_slots=settings.WALLET_SLOTS_ENABLED,
+    )
+
+
+operation_batcher = (
+    OperationBatcher(
+        build_wallet_dao(async_session_maker),
+        window=settings.OPERATION_BATCH_WINDOW_MS / 1000,
+        max_batch_size=settings.OPERATION_BATCH_MAX_SIZE,
+    )
+    if settings.OPERATION_BATCHING_ENABLED
+    else None
+)
+
+wallet_lock_manager = (
+    WalletLockManager(settings.WALLET_LOCK_STRIPES)
+    if settings.WALLET_LOCKS_ENABLED
+    else None
+)
+
+admission_controller = (
+    AdmissionController(
+        max_in_flight=settings.ADMISSION_MAX_IN_FLIGHT or settings.db_max_connections,
+        max_queue=settings.ADMISSION_MAX_QUEUE,
+        max_per_wallet=settings.ADMISSION_MAX_PER_WALLET,
+        queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_MS / 1000,
+    )
+    if settings.ADMISSION_CONTROL_ENABLED
+    else None
+)
+
+ledger_flusher = (
+    LedgerFlusher(
+        build_wallet_dao(async_session_maker),
+        batch_size=settings.LEDGER_FLUSH_BATCH_SIZE,
+        interval=settings.LEDGER_FLUSH_INTERVAL_MS / 1000,
+        max_depth=settings.LEDGER_STAGING_MAX_ROWS,
+        max_wait=settings.LEDGER_BACKPRESSURE_TIMEOUT_MS / 1000,
+    )
+    if settings.LEDGER_STAGING_ENABLED
+    else None
+)
 
 
 async def get_session_factory() -> async_sessionmaker[AsyncSession]:
     yield async_session_maker
 
 
+def get_read_consistency(
+    x_read_consistency: Optional[ReadConsistency] = Header(
+        None, alias="X-Read-Consistency"
+    ),
+) -> ReadConsistency:
+    return x_read_consistency or ReadConsistency(settings.READ_CONSISTENCY_DEFAULT)
+
+
 def get_wallet_dao(
     session_factory: async_sessionmaker[AsyncSession] = Depends(get_session_factory),
+    read_consistency: ReadConsistency = Depends(get_read_consistency),
 ) -> WalletDAO:
-    return WalletDAO(session_factory)
+    return build_wallet_dao(session_factory, read_consistency)
+
+
+def get_replica_router() -> Optional[ReplicaRouter]:
+    return replica_router
+
+
+def get_operation_batcher() -> Optional[OperationBatcher]:
+    return operation_batcher
+
+
+def get_wallet_lock_manager() -> Optional[WalletLockManager]:
+    return wallet_lock_manager
+
+
+def get_ledger_flusher() -> Optional[LedgerFlusher]:
+    return ledger_flusher
 
 
 def get_wallet_service(
     dao: WalletDAO = Depends(get_wallet_dao),
+    batcher: Optional[OperationBatcher] = Depends(get_operation_batcher),
+    lock_manager: Optional[WalletLockManager] = Depends(get_wallet_lock_manager),
+    flusher: Optional[LedgerFlusher] = Depends(get_ledger_flusher),
 ) -> WalletService:
-    return WalletService(dao)
+    return WalletService(dao, batcher, lock_manager, flusher)
 
 
 def get_wallet_balance_usecase(
@@ -30,13 +170,51 @@ def get_wallet_balance_usecase(
     return GetWalletBalanceUseCase(service)
 
 
+def get_wallet_operations_usecase(
+    service: WalletService = Depends(get_wallet_service),
+) -> GetWalletOperationsUseCase:
+    return GetWalletOperationsUseCase(service)
+
+
+def get_wallet_stats_usecase(
+    service: WalletService = Depends(get_wallet_service),
+) -> GetWalletStatsUseCase:
+    return GetWalletStatsUseCase(service, settings.ROLLUP_ENABLED)
+
+
+def get_export_wallet_operations_usecase(
+    service: WalletService = Depends(get_wallet_service),
+) -> ExportWalletOperationsUseCase:
+    return ExportWalletOperationsUseCase(
+        service, settings.OPERATIONS_EXPORT_CHUNK_SIZE
+    )
+
+
 def get_process_wallet_operation_usecase(
     service: WalletService = Depends(get_wallet_service),
 ) -> ProcessWalletOperationUseCase:
-    return ProcessWalletOperationUseCase(service)
+    return ProcessWalletOperationUseCase(service, idempotency_cache)
+
+
+def get_process_wallet_operations_batch_usecase(
+    service: WalletService = Depends(get_wallet_service),
+) -> ProcessWalletOperationsBatchUseCase:
+    return ProcessWalletOperationsBatchUseCase(service)
+
+
+def get_set_wallet_slots_usecase(
+    service: WalletService = Depends(get_wallet_service),
+) -> SetWalletSlotsUseCase:
+    return SetWalletSlotsUseCase(service, settings.WALLET_SLOTS_ENABLED)
 
 
 def get_create_wallet_usecase(
     service: WalletService = Depends(get_wallet_service),
 ) -> CreateWalletUseCase:
     return CreateWalletUseCase(service)
+
+
+def get_create_wallets_bulk_usecase(
+    service: WalletService = Depends(get_wallet_service),
+) -> CreateWalletsBulkUseCase:
+    return CreateWalletsBulkUseCase(service, settings.WALLET_BULK_CREATE_CHUNK_SIZE)
@@ -1,6 +1,3 @@
-import fastapi_jsonrpc as jsonrpc
-
-
 class BaseSystemException(Exception):
     def __init__(self, message=""):
         self.message = message
@@ -17,11 +14,33 @@ class WalletNotFoundError(BaseSystemException):
         super().__init__("Wallet not found")
 
 
+class WalletAlreadyExistsError(BaseSystemException):
+    def __init__(self, wallet_uuid: str):
+        super().__init__(f"Wallet with UUID {wallet_uuid} already exists")
+
+
 class InsufficientFundsError(BaseSystemException):
     def __init__(self):
         super().__init__("Insufficient funds")
 
 
+class IdempotencyKeyMismatchError(BaseSystemException):
+    def __init__(self):
+        super().__init__("Idempotency key was used for a different operation")
+
+
+class LedgerBackpressureError(BaseSystemException):
+    def __init__(self):
+        super().__init__("Ledger staging is full, retry later")
+
+
+class BatchOperationError(BaseSystemException):
+    def __init__(self, index: int, error: BaseSystemException):
+        self.index = index
+        self.error = error
+        super().__init__(f"Operation #{index}: {error.message}")
+
+
 class ComponentIdError(BaseSystemException):
     def __init__(self):
         super().__init__("Invalid component id")
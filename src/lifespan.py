@@ -1,10 +1,142 @@
 import logging
-from contextlib import asynccontextmanager
+import time
+from contextlib import asynccontextmanager, contextmanager
+from datetime import timedelta
 
-import rasterio
+import aiojobs
 from fastapi import FastAPI
 
+from database.asyncpg_pool import close_asyncpg_pool, open_asyncpg_pool
+from database.core import async_session_maker, shutdown_db
+from dependencies import (
+    balance_cache,
+    build_wallet_dao,
+    ledger_flusher,
+    operation_batcher,
+    replica_router,
+)
+from services.maintenance import (
+    purge_idempotency_keys_periodically,
+    rollup_operations_periodically,
+)
+from settings import settings
+
+
+class PhaseTimer:
+    """Collects the duration of named phases and logs them in one line."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.phases: list[tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    def log(self) -> None:
+        total = sum(elapsed for _, elapsed in self.phases)
+        phases = ", ".join(
+            f"{name} {elapsed * 1000:.1f} ms" for name, elapsed in self.phases
+        )
+        logging.info(f"{self.name}: {phases}; total {total * 1000:.1f} ms")
+
+
+async def check_money_mode(wallet_dao) -> None:
+    """Refuse to run with a ``MONEY_MODE`` the schema was not migrated with.
+
+    The money columns are ``NUMERIC`` or ``BIGINT`` after the mode recorded
+    by the migrations, and reading one as the other scales every amount.
+    """
+    migrated_mode = await wallet_dao.get_money_mode()
+    if migrated_mode != settings.MONEY_MODE:
+        raise RuntimeError(
+            f"MONEY_MODE is {settings.MONEY_MODE!r} but the database was"
+            f" migrated with {migrated_mode!r}"
+        )
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    startup = PhaseTimer("Startup")
+    wallet_dao = build_wallet_dao(async_session_maker)
+
+    with startup.phase("money_mode"):
+        await check_money_mode(wallet_dao)
+
+    if settings.WALLET_DAO_BACKEND == "asyncpg":
+        with startup.phase("asyncpg_pool"):
+            await open_asyncpg_pool()
+
+    warm_up_size = min(settings.DB_POOL_WARMUP_SIZE, settings.DB_POOL_SIZE)
+    if warm_up_size > 0:
+        with startup.phase(f"pool_warm_up[{warm_up_size}]"):
+            await wallet_dao.warm_up(warm_up_size)
+
+    with startup.phase("background_jobs"):
+        scheduler = aiojobs.Scheduler()
+        await scheduler.spawn(
+            purge_idempotency_keys_periodically(
+                wallet_dao,
+                ttl=timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS),
+                batch_size=settings.IDEMPOTENCY_PURGE_BATCH_SIZE,
+                interval=settings.IDEMPOTENCY_PURGE_INTERVAL_SECONDS,
+            )
+        )
+        if settings.ROLLUP_ENABLED:
+            await scheduler.spawn(
+                rollup_operations_periodically(
+                    wallet_dao,
+                    batch_size=settings.ROLLUP_BATCH_SIZE,
+                    interval=settings.ROLLUP_INTERVAL_SECONDS,
+                )
+            )
+        if ledger_flusher is not None:
+            await scheduler.spawn(ledger_flusher.run())
+        if replica_router is not None:
+            await scheduler.spawn(
+                replica_router.monitor_lag(
+                    settings.REPLICA_LAG_CHECK_INTERVAL_SECONDS
+                )
+            )
+
+    balance_listener = None
+    if balance_cache is not None and settings.BALANCE_CACHE_NOTIFY:
+        from database.notifications import BalanceChangeListener
+
+        with startup.phase("balance_listener"):
+            balance_listener = BalanceChangeListener(
+                settings.db_dsn_postgres,
+                settings.BALANCE_CACHE_NOTIFY_CHANNEL,
+                balance_cache,
+            )
+            await balance_listener.start()
+
+    startup.log()
+
     yield
+
+    shutdown = PhaseTimer("Shutdown")
+    # Custom lifespans bypass shutdown event handlers, including the one
+    # closing the JSON-RPC entrypoint schedulers
+    with shutdown.phase("jsonrpc"):
+        await app.run_shutdown_functions()
+    with shutdown.phase("background_jobs"):
+        await scheduler.close()
+    if operation_batcher is not None:
+        with shutdown.phase("operation_batcher"):
+            await operation_batcher.close()
+    if ledger_flusher is not None:
+        # After the batcher, which may still stage operations
+        with shutdown.phase("ledger_flusher"):
+            await ledger_flusher.close()
+    if balance_listener is not None:
+        with shutdown.phase("balance_listener"):
+            await balance_listener.stop()
+    with shutdown.phase("dispose_pools"):
+        await close_asyncpg_pool()
+        await shutdown_db()
+    shutdown.log()
@@ -0,0 +1,244 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Optional
+
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from services.admission import (
+    AdmissionController,
+    AdmissionRejected,
+    RequestDeadline,
+    is_deadline_error,
+    request_deadline,
+)
+from services.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request counts and latencies.
+
+    Requests are labelled with the matched route template rather than the
+    raw path, so wallet UUIDs do not create a series each.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            route_path = route.path if route is not None else "unmatched"
+            method = scope["method"]
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - started, method, route_path
+            )
+            HTTP_REQUESTS.inc(method, route_path, str(status_code))
+
+
+class TimingMiddleware:
+    """Logs method, URL and handling time of every request at DEBUG."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not logging.root.isEnabledFor(logging.DEBUG):
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            path = scope["path"]
+            if scope["query_string"]:
+                path += "?" + scope["query_string"].decode("latin-1")
+            logging.debug(
+                "Method: %s, URL: %s, Time: %.3f ms",
+                scope["method"],
+                path,
+                (time.perf_counter() - started) * 1000,
+            )
+
+
+class GlobalResponsesMiddleware:
+    """Replaces the body of 404 responses for unknown URLs and of all 500s.
+
+    404s raised by matched endpoints (e.g. a missing wallet) keep their own
+    body. Unhandled exceptions get the 500 body too, then propagate to the
+    server error middleware for logging.
+    """
+
+    BODIES = {404: b"Page not found", 500: b"Internal server error"}
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        response_started = False
+        replaced = False
+
+        async def send_global_response(message: Message) -> None:
+            nonlocal response_started, replaced
+            if message["type"] == "http.response.start":
+                response_started = True
+                status_code = message["status"]
+                replaced = status_code == 500 or (
+                    status_code == 404 and "route" not in scope
+                )
+                if replaced:
+                    await self._send_body(send, status_code)
+                    return
+            elif replaced:
+                return
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_global_response)
+        except Exception:
+            if not response_started:
+                await self._send_body(send, 500)
+            raise
+
+    async def _send_body(self, send: Send, status_code: int) -> None:
+        body = self.BODIES[status_code]
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status_code,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionControlMiddleware:
+    """Admission control and deadlines for requests under ``path_prefix``.
+
+    The ``X-Request-Timeout-Ms`` header (or ``default_timeout``) sets the
+    request deadline. The request waits for admission at most until then
+    and is cancelled when it passes before its first transaction starts,
+    pool checkout included. Transactions get the rest of the budget as
+    ``statement_timeout`` and ``lock_timeout`` (see ``RequestDeadline``), so
+    a deadline passing during a write rolls it back instead of hiding its
+    commit. Either way the request gets a 503 if no response was started.
+    Shed requests get 429 or 503 with ``Retry-After``.
+    """
+
+    TIMEOUT_HEADER = b"x-request-timeout-ms"
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        controller: AdmissionController,
+        path_prefix: str,
+        default_timeout: float = 0,
+        retry_after: int = 1,
+    ):
+        self.app = app
+        self.controller = controller
+        self.path_prefix = path_prefix
+        self.default_timeout = default_timeout
+        self.retry_after = retry_after
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        timeout = self._timeout(scope)
+        deadline = time.monotonic() + timeout if timeout else None
+        response_started = False
+
+        async def send_tracking_start(message: Message) -> None:
+            nonlocal response_started
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            async with self.controller.admit(self._wallet_uuid(scope), deadline):
+                if deadline is None:
+                    await self.app(scope, receive, send)
+                    return
+                request_timeout = asyncio.timeout(deadline - time.monotonic())
+                token = request_deadline.set(
+                    RequestDeadline(deadline, request_timeout)
+                )
+                try:
+                    async with request_timeout:
+                        await self.app(scope, receive, send_tracking_start)
+                except TimeoutError:
+                    if not request_timeout.expired() or response_started:
+                        raise
+                    self.controller.count_shed("deadline_exceeded")
+                    await self._send_rejection(send, 503, "deadline_exceeded")
+                except Exception as e:
+                    if not is_deadline_error(e) or response_started:
+                        raise
+                    self.controller.count_shed("deadline_exceeded")
+                    await self._send_rejection(send, 503, "deadline_exceeded")
+                finally:
+                    request_deadline.reset(token)
+        except AdmissionRejected as e:
+            await self._send_rejection(send, e.status_code, e.reason)
+
+    def _timeout(self, scope: Scope) -> float:
+        for name, value in scope["headers"]:
+            if name == self.TIMEOUT_HEADER:
+                try:
+                    return max(float(value) / 1000, 0.0)
+                except ValueError:
+                    break
+        return self.default_timeout
+
+    @staticmethod
+    def _wallet_uuid(scope: Scope) -> Optional[str]:
+        # Routing has not run yet. Match the route like the router does, which
+        # also gives shed requests their route label in the metrics
+        for route in scope["app"].router.routes:
+            match, child_scope = route.matches(scope)
+            if match == Match.FULL:
+                scope.update(child_scope)
+                return scope["path_params"].get("wallet_uuid")
+        return None
+
+    async def _send_rejection(self, send: Send, status_code: int, reason: str) -> None:
+        body = json.dumps({"detail": reason}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status_code,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(self.retry_after).encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
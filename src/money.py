@@ -0,0 +1,95 @@
+"""Money representation, selected with ``MONEY_MODE``.
+
+``decimal`` stores ``NUMERIC(18, 2)`` and takes decimal amounts in the API.
+``minor_units`` stores ``BIGINT`` minor units (cents) and takes and returns
+integers in the API, so the hot path does integer arithmetic only.
+The migrations record the mode they ran with and the app checks it at
+startup; switching an existing database means re-running the conversion in
+``alembic/versions/5d3a7c0e9b21_money_minor_units.py``.
+"""
+
+from decimal import Decimal
+from typing import Union
+
+from pydantic import condecimal, conint
+from sqlalchemy import BigInteger, Numeric, cast, func
+
+from settings import settings
+
+MINOR_UNITS_PER_UNIT = 100
+
+Money = Union[Decimal, int]
+
+
+class DecimalMoney:
+    mode = "decimal"
+    amount_type = condecimal(gt=0)
+    non_negative_amount_type = condecimal(ge=0)
+    balance_type = float
+
+    @staticmethod
+    def column_type() -> Numeric:
+        return Numeric(18, 2)
+
+    @staticmethod
+    def parse(value: Union[Decimal, int, float, str]) -> Decimal:
+        if isinstance(value, Decimal):
+            return value
+        return Decimal(str(value))
+
+    @staticmethod
+    def to_api(value: Decimal) -> float:
+        return float(value)
+
+    @staticmethod
+    def to_minor_units_sql(column):
+        return cast(func.coalesce(column, 0) * MINOR_UNITS_PER_UNIT, BigInteger)
+
+    @staticmethod
+    def from_minor_units_sql(column):
+        return cast(column, Numeric(18, 2)) / MINOR_UNITS_PER_UNIT
+
+    @staticmethod
+    def from_minor_units(value: int) -> Decimal:
+        return Decimal(int(value)) / MINOR_UNITS_PER_UNIT
+
+
+class MinorUnitsMoney:
+    mode = "minor_units"
+    amount_type = conint(gt=0)
+    non_negative_amount_type = conint(ge=0)
+    balance_type = int
+
+    @staticmethod
+    def column_type() -> BigInteger:
+        return BigInteger()
+
+    @staticmethod
+    def parse(value: Union[Decimal, int, float, str]) -> int:
+        if isinstance(value, int):
+            return value
+        decimal_value = Decimal(str(value))
+        if decimal_value != decimal_value.to_integral_value():
+            raise ValueError("Amounts are integer minor units")
+        return int(decimal_value)
+
+    @staticmethod
+    def to_api(value: int) -> int:
+        return int(value)
+
+    @staticmethod
+    def to_minor_units_sql(column):
+        return func.coalesce(column, 0)
+
+    @staticmethod
+    def from_minor_units_sql(column):
+        return column
+
+    @staticmethod
+    def from_minor_units(value: int) -> int:
+        return int(value)
+
+
+MONEY_MODES = {codec.mode: codec for codec in (DecimalMoney, MinorUnitsMoney)}
+
+money = MONEY_MODES[settings.MONEY_MODE]()
@@ -0,0 +1,28 @@
+import asyncio
+import json
+import logging
+
+from database.core import async_session_maker, shutdown_db
+from services.ledger_reconciliation import LedgerReconciliation
+from settings import settings
+
+
+async def reconcile() -> None:
+    reconciliation = LedgerReconciliation(
+        async_session_maker,
+        chunk_size=settings.RECONCILIATION_CHUNK_SIZE,
+    )
+    try:
+        report = await reconciliation.run()
+    finally:
+        await shutdown_db()
+
+    logging.info(
+        f"Reconciled {report.wallets_checked} wallets, "
+        f"{report.operations_scanned} operations in {report.elapsed_seconds} sec"
+    )
+    print(json.dumps(report.as_dict(), default=str, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(reconcile())
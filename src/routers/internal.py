@@ -0,0 +1,66 @@
+from fastapi import APIRouter
+
+from database.asyncpg_pool import asyncpg_pool_stats
+from database.core import engine, replica_engine
+from dependencies import (
+    admission_controller,
+    balance_cache,
+    idempotency_cache,
+    ledger_flusher,
+    replica_router,
+    wallet_lock_manager,
+)
+from settings import settings
+
+router = APIRouter()
+
+
+@router.get("/cache", summary="Статистика кэша балансов")
+async def get_cache_stats():
+    return {
+        "balance_cache": balance_cache.stats() if balance_cache else None,
+        "idempotency_cache": (
+            idempotency_cache.stats() if idempotency_cache else None
+        ),
+    }
+
+
+@router.get("/locks", summary="Статистика блокировок кошельков")
+async def get_lock_stats():
+    return {
+        "wallet_locks": (
+            wallet_lock_manager.stats() if wallet_lock_manager else None
+        ),
+    }
+
+
+@router.get("/pool", summary="Статистика пула соединений с БД")
+async def get_pool_stats():
+    return {
+        "workers_count": settings.WORKERS_COUNT,
+        "max_connections_per_worker": settings.db_max_connections,
+        "sqlalchemy": engine.pool.snapshot(),
+        "asyncpg": asyncpg_pool_stats(),
+    }
+
+
+@router.get("/replica", summary="Статистика маршрутизации чтений на реплику")
+async def get_replica_stats():
+    return {
+        "replica": replica_router.stats() if replica_router else None,
+        "pool": replica_engine.pool.snapshot() if replica_engine else None,
+    }
+
+
+@router.get("/ledger", summary="Статистика отложенной записи журнала операций")
+async def get_ledger_stats():
+    return {"ledger_flusher": ledger_flusher.stats() if ledger_flusher else None}
+
+
+@router.get("/admission", summary="Статистика контроля нагрузки")
+async def get_admission_stats():
+    return {
+        "admission": (
+            admission_controller.stats() if admission_controller else None
+        ),
+    }
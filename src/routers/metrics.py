@@ -0,0 +1,13 @@
+from fastapi import APIRouter
+from starlette.responses import PlainTextResponse
+
+from services import metrics
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4"
+    )
@@ -0,0 +1,122 @@
+import uuid
+from typing import Optional
+
+import fastapi_jsonrpc as jsonrpc
+from fastapi import Body, Depends
+from pydantic import BaseModel
+
+from database.models.withdraw import OperationType
+from dependencies import (
+    get_create_wallet_usecase,
+    get_process_wallet_operation_usecase,
+    get_wallet_balance_usecase,
+)
+from exceptions import (
+    IdempotencyKeyMismatchError,
+    InsufficientFundsError,
+    LedgerBackpressureError,
+    WalletNotFoundError,
+)
+from money import money
+from schema import BalanceResponse, CreateWalletResponse, OperationResponse
+from settings import settings
+from usecases.create_waller_usecase import CreateWalletUseCase
+from usecases.get_wallet_balance_usecase import GetWalletBalanceUseCase
+from usecases.process_wallet_operation_usecase import ProcessWalletOperationUseCase
+
+
+class WalletNotFound(jsonrpc.BaseError):
+    CODE = 1001
+    MESSAGE = "Wallet not found"
+
+
+class InsufficientFunds(jsonrpc.BaseError):
+    CODE = 1002
+    MESSAGE = "Insufficient funds"
+
+
+class IdempotencyKeyMismatch(jsonrpc.BaseError):
+    CODE = 1003
+    MESSAGE = "Idempotency key reused with a different operation"
+
+
+class InvalidOperation(jsonrpc.BaseError):
+    CODE = 1004
+    MESSAGE = "Invalid operation"
+
+    class DataModel(BaseModel):
+        detail: str
+
+
+class LedgerBackpressure(jsonrpc.BaseError):
+    CODE = 1005
+    MESSAGE = "Ledger staging is full, retry later"
+
+
+# Calls of a batch request run concurrently on the entrypoint scheduler;
+# its limit bounds them, across all batches, to the connection budget
+entrypoint = jsonrpc.Entrypoint(
+    settings.APP_URL + "/jsonrpc",
+    scheduler_kwargs={
+        "limit": settings.JSONRPC_CONCURRENCY_LIMIT or settings.db_max_connections,
+    },
+    tags=["JSON-RPC"],
+)
+
+
+@entrypoint.method(errors=[WalletNotFound])
+async def get_balance(
+    wallet_uuid: uuid.UUID = Body(..., description="UUID кошелька"),
+    usecase: GetWalletBalanceUseCase = Depends(get_wallet_balance_usecase),
+) -> BalanceResponse:
+    try:
+        return BalanceResponse(balance=await usecase.execute(str(wallet_uuid)))
+    except WalletNotFoundError:
+        raise WalletNotFound()
+
+
+@entrypoint.method(
+    errors=[
+        WalletNotFound,
+        InsufficientFunds,
+        IdempotencyKeyMismatch,
+        InvalidOperation,
+        LedgerBackpressure,
+    ]
+)
+async def process_operation(
+    wallet_uuid: uuid.UUID = Body(..., description="UUID кошелька"),
+    operation_type: OperationType = Body(...),
+    amount: money.amount_type = Body(...),
+    idempotency_key: Optional[str] = Body(None, max_length=255),
+    target_wallet_uuid: Optional[uuid.UUID] = Body(None),
+    usecase: ProcessWalletOperationUseCase = Depends(
+        get_process_wallet_operation_usecase
+    ),
+) -> OperationResponse:
+    try:
+        new_balance = await usecase.execute(
+            str(wallet_uuid),
+            operation_type.value,
+            amount,
+            idempotency_key,
+            str(target_wallet_uuid) if target_wallet_uuid else None,
+        )
+        return OperationResponse(new_balance=new_balance)
+    except WalletNotFoundError:
+        raise WalletNotFound()
+    except InsufficientFundsError:
+        raise InsufficientFunds()
+    except IdempotencyKeyMismatchError:
+        raise IdempotencyKeyMismatch()
+    except ValueError as e:
+        raise InvalidOperation(data={"detail": str(e)})
+    except LedgerBackpressureError:
+        raise LedgerBackpressure()
+
+
+@entrypoint.method()
+async def create_wallet(
+    usecase: CreateWalletUseCase = Depends(get_create_wallet_usecase),
+) -> CreateWalletResponse:
+    return CreateWalletResponse(wallet_uuid=await usecase.execute())
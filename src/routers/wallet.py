@@ -1,18 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException, Path, Body
-from exceptions import WalletNotFoundError, InsufficientFundsError
+import json
+import uuid
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Body, Query, Header
+from fastapi.responses import StreamingResponse
+from database.models.rollup import RollupGranularity
+from exceptions import (
+    BatchOperationError,
+    IdempotencyKeyMismatchError,
+    WalletNotFoundError,
+    InsufficientFundsError,
+)
 from usecases.get_wallet_balance_usecase import GetWalletBalanceUseCase
+from usecases.get_wallet_operations_usecase import GetWalletOperationsUseCase
+from usecases.get_wallet_stats_usecase import GetWalletStatsUseCase
+from usecases.export_wallet_operations_usecase import (
+    ExportFormat,
+    ExportWalletOperationsUseCase,
+)
 from usecases.process_wallet_operation_usecase import ProcessWalletOperationUseCase
+from usecases.process_wallet_operations_batch_usecase import (
+    ProcessWalletOperationsBatchUseCase,
+)
 from usecases.create_waller_usecase import CreateWalletUseCase
+from usecases.create_wallets_bulk_usecase import CreateWalletsBulkUseCase
+from usecases.set_wallet_slots_usecase import SetWalletSlotsUseCase
 from schema import (
     OperationRequest,
     BalanceResponse,
     OperationResponse,
     CreateWalletResponse,
+    BulkCreateWalletsRequest,
+    OperationHistoryResponse,
+    OperationStatsResponse,
+    BatchMode,
+    BatchOperationsRequest,
+    BatchOperationResult,
+    BatchOperationsResponse,
+    WalletSlotsRequest,
+    WalletSlotsResponse,
 )
+from settings import settings
 from dependencies import (
     get_wallet_balance_usecase,
+    get_wallet_operations_usecase,
+    get_wallet_stats_usecase,
+    get_export_wallet_operations_usecase,
     get_process_wallet_operation_usecase,
+    get_process_wallet_operations_batch_usecase,
     get_create_wallet_usecase,
+    get_create_wallets_bulk_usecase,
+    get_set_wallet_slots_usecase,
 )
 
 
@@ -25,42 +64,188 @@ router = APIRouter()
     summary="Получить баланс кошелька",
 )
 async def get_balance(
-    wallet_uuid: str = Path(..., description="UUID кошелька"),
+    wallet_uuid: uuid.UUID = Path(..., description="UUID кошелька"),
     usecase: GetWalletBalanceUseCase = Depends(get_wallet_balance_usecase),
 ):
     try:
-        balance = await usecase.execute(wallet_uuid)
+        balance = await usecase.execute(str(wallet_uuid))
         return BalanceResponse(balance=balance)
     except WalletNotFoundError:
         raise HTTPException(status_code=404, detail="Wallet not found")
 
 
+@router.get(
+    "/{wallet_uuid}/operations",
+    response_model=OperationHistoryResponse,
+    summary="Получить историю операций кошелька",
+)
+async def get_wallet_operations(
+    wallet_uuid: uuid.UUID = Path(..., description="UUID кошелька"),
+    limit: int = Query(50, ge=1, le=settings.OPERATIONS_PAGE_MAX_SIZE),
+    cursor: Optional[int] = Query(
+        None, description="next_cursor из предыдущей страницы"
+    ),
+    usecase: GetWalletOperationsUseCase = Depends(get_wallet_operations_usecase),
+):
+    try:
+        items, next_cursor = await usecase.execute(
+            str(wallet_uuid), limit, cursor
+        )
+        return OperationHistoryResponse(items=items, next_cursor=next_cursor)
+    except WalletNotFoundError:
+        raise HTTPException(status_code=404, detail="Wallet not found")
+
+
+@router.get(
+    "/{wallet_uuid}/operations/export",
+    summary="Выгрузить выписку по кошельку",
+    response_class=StreamingResponse,
+)
+async def export_wallet_operations(
+    wallet_uuid: uuid.UUID = Path(..., description="UUID кошелька"),
+    export_format: ExportFormat = Query(ExportFormat.NDJSON, alias="format"),
+    usecase: ExportWalletOperationsUseCase = Depends(
+        get_export_wallet_operations_usecase
+    ),
+):
+    try:
+        content = await usecase.execute(str(wallet_uuid), export_format)
+    except WalletNotFoundError:
+        raise HTTPException(status_code=404, detail="Wallet not found")
+
+    media_type = (
+        "text/csv" if export_format == ExportFormat.CSV else "application/x-ndjson"
+    )
+    return StreamingResponse(
+        content,
+        media_type=media_type,
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="{wallet_uuid}.{export_format.value}"'
+            )
+        },
+    )
+
+
+@router.get(
+    "/{wallet_uuid}/stats",
+    response_model=OperationStatsResponse,
+    summary="Получить обороты кошелька по дням или месяцам",
+)
+async def get_wallet_stats(
+    wallet_uuid: uuid.UUID = Path(..., description="UUID кошелька"),
+    granularity: RollupGranularity = Query(RollupGranularity.DAY),
+    date_from: Optional[date] = Query(None, description="Первый период, включительно"),
+    date_to: Optional[date] = Query(None, description="Последний период, включительно"),
+    usecase: GetWalletStatsUseCase = Depends(get_wallet_stats_usecase),
+):
+    try:
+        items, rolled_up_at = await usecase.execute(
+            str(wallet_uuid), granularity, date_from, date_to
+        )
+        return OperationStatsResponse(
+            granularity=granularity,
+            items=items,
+            rolled_up_at=rolled_up_at,
+        )
+    except WalletNotFoundError:
+        raise HTTPException(status_code=404, detail="Wallet not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @router.post(
     "/{wallet_uuid}/operation",
     response_model=OperationResponse,
     summary="Выполнить операцию с кошельком",
 )
 async def process_wallet_operation(
-    wallet_uuid: str = Path(..., description="UUID кошелька"),
+    wallet_uuid: uuid.UUID = Path(..., description="UUID кошелька"),
     operation: OperationRequest = Body(...),
+    idempotency_key: Optional[str] = Header(
+        None, alias="Idempotency-Key", max_length=255
+    ),
     usecase: ProcessWalletOperationUseCase = Depends(
         get_process_wallet_operation_usecase
     ),
 ):
+    target_wallet_uuid = operation.target_wallet_uuid
     try:
         new_balance = await usecase.execute(
-            wallet_uuid,
+            str(wallet_uuid),
             operation.operation_type.value,
-            float(operation.amount),
+            operation.amount,
+            idempotency_key,
+            str(target_wallet_uuid) if target_wallet_uuid else None,
         )
         return OperationResponse(new_balance=new_balance)
     except WalletNotFoundError:
         raise HTTPException(status_code=404, detail="Wallet not found")
     except InsufficientFundsError:
         raise HTTPException(status_code=400, detail="Insufficient funds")
+    except IdempotencyKeyMismatchError as e:
+        raise HTTPException(status_code=422, detail=e.message)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.put(
+    "/{wallet_uuid}/slots",
+    response_model=WalletSlotsResponse,
+    summary="Разделить баланс кошелька на слоты",
+)
+async def set_wallet_slots(
+    wallet_uuid: uuid.UUID = Path(..., description="UUID кошелька"),
+    request: WalletSlotsRequest = Body(...),
+    usecase: SetWalletSlotsUseCase = Depends(get_set_wallet_slots_usecase),
+):
+    try:
+        slots = await usecase.execute(str(wallet_uuid), request.slots)
+        return WalletSlotsResponse(slots=slots)
+    except WalletNotFoundError:
+        raise HTTPException(status_code=404, detail="Wallet not found")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post(
+    "/operations/batch",
+    response_model=BatchOperationsResponse,
+    summary="Выполнить пакет операций с кошельками",
+)
+async def process_wallet_operations_batch(
+    request: BatchOperationsRequest = Body(...),
+    usecase: ProcessWalletOperationsBatchUseCase = Depends(
+        get_process_wallet_operations_batch_usecase
+    ),
+):
+    try:
+        results = await usecase.execute(
+            [
+                (str(item.wallet_uuid), item.operation_type.value, item.amount)
+                for item in request.operations
+            ],
+            atomic=request.mode == BatchMode.ATOMIC,
+        )
+    except BatchOperationError as e:
+        status_code = 404 if isinstance(e.error, WalletNotFoundError) else 400
+        raise HTTPException(status_code=status_code, detail=e.message)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    return BatchOperationsResponse(
+        results=[
+            BatchOperationResult(
+                wallet_uuid=str(item.wallet_uuid), error=result.message
+            )
+            if isinstance(result, Exception)
+            else BatchOperationResult(
+                wallet_uuid=str(item.wallet_uuid), new_balance=result
+            )
+            for item, result in zip(request.operations, results)
+        ]
+    )
+
 
 @router.post(
     "/",
@@ -75,3 +260,28 @@ async def create_wallet(
         return CreateWalletResponse(wallet_uuid=wallet_uuid)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post(
+    "/bulk",
+    summary="Создать кошельки пакетом",
+    response_class=StreamingResponse,
+)
+async def create_wallets_bulk(
+    request: BulkCreateWalletsRequest = Body(...),
+    usecase: CreateWalletsBulkUseCase = Depends(get_create_wallets_bulk_usecase),
+):
+    new_wallets = None
+    if request.wallets is not None:
+        new_wallets = [
+            (str(item.wallet_uuid), item.initial_balance) for item in request.wallets
+        ]
+
+    async def content():
+        async for wallet_uuids in usecase.execute(request.count, new_wallets):
+            yield "".join(
+                json.dumps({"wallet_uuid": wallet_uuid}) + "\n"
+                for wallet_uuid in wallet_uuids
+            )
+
+    return StreamingResponse(content(), media_type="application/x-ndjson")
@@ -1,19 +1,113 @@
-from pydantic import BaseModel, condecimal, constr
+import enum
+import uuid
+from datetime import date, datetime
+from typing import Optional
+
+from pydantic import BaseModel, conint, conlist, constr, model_validator
+from database.models.rollup import RollupGranularity
 from database.models.withdraw import OperationType
+from money import money
+from settings import settings
 
 
 class OperationRequest(BaseModel):
     operation_type: OperationType
-    amount: condecimal(gt=0)
+    amount: money.amount_type
+    # Credited wallet of a TRANSFER
+    target_wallet_uuid: Optional[uuid.UUID] = None
 
 
 class BalanceResponse(BaseModel):
-    balance: float
+    balance: money.balance_type
 
 
 class OperationResponse(BaseModel):
-    new_balance: float
+    new_balance: money.balance_type
+
+
+class OperationHistoryItem(BaseModel):
+    id: int
+    operation_type: OperationType
+    amount: money.balance_type
+    created_at: datetime
+
+
+class OperationHistoryResponse(BaseModel):
+    items: list[OperationHistoryItem]
+    next_cursor: Optional[int] = None
+
+
+class WalletSlotsRequest(BaseModel):
+    # 0 moves the wallet out of slot mode
+    slots: conint(ge=0, le=settings.WALLET_SLOTS_MAX)
+
+
+class WalletSlotsResponse(BaseModel):
+    slots: int
+
+
+class OperationStatsItem(BaseModel):
+    bucket: date
+    deposits: money.balance_type
+    withdrawals: money.balance_type
+    net: money.balance_type
+    operations_count: int
+
+
+class OperationStatsResponse(BaseModel):
+    granularity: RollupGranularity
+    items: list[OperationStatsItem]
+    # Last rollup pass; operations still in flight then are not counted yet
+    rolled_up_at: datetime
 
 
 class CreateWalletResponse(BaseModel):
     wallet_uuid: str
+
+
+class BulkWalletItem(BaseModel):
+    wallet_uuid: uuid.UUID
+    initial_balance: money.non_negative_amount_type = 0
+
+
+class BulkCreateWalletsRequest(BaseModel):
+    count: Optional[conint(ge=1, le=settings.WALLET_BULK_CREATE_MAX_SIZE)] = None
+    wallets: Optional[
+        conlist(
+            BulkWalletItem,
+            min_length=1,
+            max_length=settings.WALLET_BULK_CREATE_MAX_SIZE,
+        )
+    ] = None
+
+    @model_validator(mode="after")
+    def check_count_or_wallets(self):
+        if (self.count is None) == (self.wallets is None):
+            raise ValueError("Exactly one of count or wallets must be provided")
+        return self
+
+
+class BatchMode(str, enum.Enum):
+    ATOMIC = "ATOMIC"
+    PER_ITEM = "PER_ITEM"
+
+
+class BatchOperationItem(OperationRequest):
+    wallet_uuid: uuid.UUID
+
+
+class BatchOperationsRequest(BaseModel):
+    mode: BatchMode = BatchMode.ATOMIC
+    operations: conlist(
+        BatchOperationItem, min_length=1, max_length=settings.BATCH_OPERATIONS_MAX_SIZE
+    )
+
+
+class BatchOperationResult(BaseModel):
+    wallet_uuid: str
+    new_balance: Optional[money.balance_type] = None
+    error: Optional[str] = None
+
+
+class BatchOperationsResponse(BaseModel):
+    results: list[BatchOperationResult]
@@ -0,0 +1,149 @@
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, Optional
+
+from services.metrics import ADMISSION_QUEUED, ADMISSION_SHED
+
+# SQLSTATEs of the transaction timeouts a request deadline sets:
+# statement_timeout (query_canceled) and lock_timeout (lock_not_available)
+DEADLINE_SQLSTATES = frozenset({"57014", "55P03"})
+
+
+class AdmissionRejected(Exception):
+    """The request is shed instead of waiting for capacity."""
+
+    def __init__(self, status_code: int, reason: str):
+        self.status_code = status_code
+        self.reason = reason
+        super().__init__(reason)
+
+
+class RequestDeadline:
+    """Deadline of the request being served, as seen by the database layer.
+
+    ``timeout`` cancels the request when the deadline passes, but only
+    until its first transaction starts: a cancellation after the commit
+    would report an applied write as failed, and a retry would apply it
+    again. From then on the database enforces the rest of the budget, so
+    a passed deadline rolls the transaction back.
+    """
+
+    def __init__(self, deadline: float, timeout: asyncio.Timeout):
+        self.deadline = deadline
+        self.timeout = timeout
+
+    def start_transaction(self) -> int:
+        """Stop cancelling the request; returns the budget left in ms."""
+        if not self.timeout.expired():
+            self.timeout.reschedule(None)
+        return max(math.ceil((self.deadline - time.monotonic()) * 1000), 1)
+
+
+request_deadline: ContextVar[Optional[RequestDeadline]] = ContextVar(
+    "request_deadline", default=None
+)
+
+
+def is_deadline_error(error: BaseException) -> bool:
+    """Whether a database error is a transaction timeout of the deadline."""
+    sqlstate = getattr(error, "sqlstate", None) or getattr(
+        getattr(error, "orig", None), "sqlstate", None
+    )
+    return sqlstate in DEADLINE_SQLSTATES
+
+
+class AdmissionController:
+    """Bounds the work the wallet routes accept, so overload fails fast.
+
+    At most ``max_in_flight`` requests run at once; up to ``max_queue`` more
+    wait for a slot, each for at most ``queue_timeout`` seconds or until its
+    deadline. A wallet may have at most ``max_per_wallet`` requests queued or
+    running, so one hot wallet cannot take every slot. Requests over a
+    limit are rejected right away: 429 for the per-wallet limit, 503 for
+    the global ones.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_queue: int,
+        max_per_wallet: int,
+        queue_timeout: float,
+    ):
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_per_wallet = max_per_wallet
+        self.queue_timeout = queue_timeout
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._per_wallet: dict[str, int] = {}
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.queued_total = 0
+        self.shed: dict[str, int] = {}
+
+    def count_shed(self, reason: str) -> None:
+        self.shed[reason] = self.shed.get(reason, 0) + 1
+        ADMISSION_SHED.inc(reason)
+
+    def _reject(self, status_code: int, reason: str) -> AdmissionRejected:
+        self.count_shed(reason)
+        return AdmissionRejected(status_code, reason)
+
+    @asynccontextmanager
+    async def admit(
+        self, wallet_uuid: Optional[str], deadline: Optional[float] = None
+    ) -> AsyncIterator[None]:
+        """Hold a slot for the request; ``deadline`` is a monotonic time."""
+        if wallet_uuid is not None:
+            if self._per_wallet.get(wallet_uuid, 0) >= self.max_per_wallet:
+                raise self._reject(429, "wallet_queue_full")
+            self._per_wallet[wallet_uuid] = self._per_wallet.get(wallet_uuid, 0) + 1
+        try:
+            await self._acquire(deadline)
+            self.in_flight += 1
+            self.admitted += 1
+            try:
+                yield
+            finally:
+                self.in_flight -= 1
+                self._slots.release()
+        finally:
+            if wallet_uuid is not None:
+                self._per_wallet[wallet_uuid] -= 1
+                if not self._per_wallet[wallet_uuid]:
+                    del self._per_wallet[wallet_uuid]
+
+    async def _acquire(self, deadline: Optional[float]) -> None:
+        if not self._slots.locked():
+            await self._slots.acquire()
+            return
+        if self.queued >= self.max_queue:
+            raise self._reject(503, "queue_full")
+
+        timeout, reason = self.queue_timeout, "queue_timeout"
+        if deadline is not None and deadline - time.monotonic() < timeout:
+            timeout, reason = deadline - time.monotonic(), "deadline_exceeded"
+        self.queued += 1
+        self.queued_total += 1
+        ADMISSION_QUEUED.inc()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), max(timeout, 0))
+        except asyncio.TimeoutError:
+            raise self._reject(503, reason)
+        finally:
+            self.queued -= 1
+
+    def stats(self) -> dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "wallets_active": len(self._per_wallet),
+            "admitted": self.admitted,
+            "queued_total": self.queued_total,
+            "shed": dict(self.shed),
+        }
@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import time
+
+from database.dao.wallet_dao import WalletDAO
+from exceptions import LedgerBackpressureError
+from services.metrics import (
+    LEDGER_BACKPRESSURE_WAITS,
+    LEDGER_FLUSH_DURATION,
+    LEDGER_FLUSHED_OPERATIONS,
+    LEDGER_STAGING_DEPTH,
+)
+
+
+class LedgerFlusher:
+    """Background stage of the write-behind ledger.
+
+    Operations are appended to ``operation_staging`` by the DAO; ``run``
+    moves them to ``operation`` every ``interval`` seconds, or as soon as
+    this worker staged ``batch_size`` rows, in ``COPY`` batches until the
+    staging table is drained. ``admit`` applies backpressure: writers wait
+    while ``max_depth`` or more rows are staged, for at most ``max_wait``
+    seconds, and then fail with ``LedgerBackpressureError``, so a flusher
+    that keeps failing turns into 503s instead of requests hanging.
+
+    The depth is the table count seen by the last flush plus the rows this
+    worker staged since. Rows other workers staged meanwhile are not seen
+    until the next flush, so between flushes the table can exceed
+    ``max_depth`` by what the other workers stage in one ``interval``.
+    """
+
+    def __init__(
+        self,
+        dao: WalletDAO,
+        batch_size: int,
+        interval: float,
+        max_depth: int,
+        max_wait: float,
+    ):
+        self.dao = dao
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_depth = max_depth
+        self.max_wait = max_wait
+        self.depth = 0
+        self.flushed = 0
+        self.waits = 0
+        self._wake = asyncio.Event()
+        self._drained = asyncio.Event()
+        self._drained.set()
+
+    def staged(self, count: int = 1) -> None:
+        self.depth += count
+        LEDGER_STAGING_DEPTH.set(self.depth)
+        if self.depth >= self.batch_size:
+            self._wake.set()
+        if self.depth >= self.max_depth:
+            self._drained.clear()
+
+    async def admit(self) -> None:
+        give_up_at = time.monotonic() + self.max_wait
+        while self.depth >= self.max_depth:
+            remaining = give_up_at - time.monotonic()
+            if remaining <= 0:
+                raise LedgerBackpressureError()
+            self.waits += 1
+            LEDGER_BACKPRESSURE_WAITS.inc()
+            self._drained.clear()
+            self._wake.set()
+            try:
+                await asyncio.wait_for(
+                    self._drained.wait(), min(self.interval, remaining)
+                )
+            except asyncio.TimeoutError:
+                pass
+
+    async def flush(self) -> int:
+        """Move staged rows until fewer than a batch are left."""
+        flushed = 0
+        while True:
+            started = time.perf_counter()
+            moved, remaining = await self.dao.flush_staged_operations(
+                self.batch_size
+            )
+            LEDGER_FLUSH_DURATION.observe(time.perf_counter() - started)
+            LEDGER_FLUSHED_OPERATIONS.inc(amount=moved)
+            flushed += moved
+            self.flushed += moved
+            self.depth = remaining
+            LEDGER_STAGING_DEPTH.set(remaining)
+            if remaining < self.max_depth:
+                self._drained.set()
+            if moved < self.batch_size:
+                return flushed
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logging.exception("Ledger flush failed")
+
+    async def close(self) -> None:
+        """Flush everything staged; called once writers have stopped."""
+        flushed = await self.flush()
+        logging.info(f"Flushed {flushed} staged operations on shutdown")
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "flushed": self.flushed,
+            "backpressure_waits": self.waits,
+        }
@@ -0,0 +1,235 @@
+import time
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+from sqlalchemy import BigInteger, bindparam, case, func, select
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database.models.checkpoint import balance_checkpoints
+from database.models.operation_staging import ledger
+from database.models.wallet import wallets
+from database.models.wallet_slot import slots_balance
+from database.models.withdraw import DEBIT_OPERATION_TYPES, finished_txid_horizon
+from money import Money, money
+
+
+@dataclass
+class Discrepancy:
+    wallet_uuid: str
+    balance: Money
+    ledger_balance: Money
+    difference: Money
+
+
+@dataclass
+class ReconciliationReport:
+    wallets_checked: int
+    operations_scanned: int
+    scanned_from_txid: int
+    checkpoint_txid: int
+    elapsed_seconds: float
+    rows_per_second: float
+    discrepancies: list[Discrepancy] = field(default_factory=list)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class LedgerAccumulator:
+    """Signed per-wallet ledger sums, in cents, over streamed chunks.
+
+    Operations are keyed by the id of the transaction that wrote them.
+    ``totals`` counts every operation not in the wallet checkpoint (txid at
+    or above it) and is compared with the wallet balance. ``settled_totals``
+    only counts operations of transactions below ``horizon``, which had all
+    finished when the snapshot was taken, and becomes the next checkpoint.
+    """
+
+    def __init__(
+        self,
+        wallet_index: dict[str, int],
+        checkpoint_txids: np.ndarray,
+        horizon: int,
+    ):
+        self.wallet_index = wallet_index
+        self.checkpoint_txids = checkpoint_txids
+        self.horizon = horizon
+        self.totals = np.zeros(len(checkpoint_txids), dtype=np.int64)
+        self.settled_totals = np.zeros(len(checkpoint_txids), dtype=np.int64)
+        self.rows = 0
+
+    def add(self, wallet_uuids, txids, amounts) -> None:
+        unique_uuids, inverse = np.unique(np.asarray(wallet_uuids), return_inverse=True)
+        codes = np.fromiter(
+            (self.wallet_index[wallet_uuid] for wallet_uuid in unique_uuids),
+            dtype=np.int64,
+            count=len(unique_uuids),
+        )[inverse]
+        txids = np.asarray(txids, dtype=np.int64)
+        amounts = np.asarray(amounts, dtype=np.int64)
+
+        new = txids >= self.checkpoint_txids[codes]
+        np.add.at(self.totals, codes[new], amounts[new])
+        settled = new & (txids < self.horizon)
+        np.add.at(self.settled_totals, codes[settled], amounts[settled])
+        self.rows += len(txids)
+
+
+class LedgerReconciliation:
+    """Checks that every wallet balance equals the sum of its ledger rows.
+
+    The ledger is streamed in ``chunk_size`` chunks and aggregated with
+    NumPy. Each wallet's ledger sum is then checkpointed up to the
+    ``finished_txid_horizon`` of the snapshot, and later runs only scan
+    operations of transactions from the checkpoints on. A transaction in
+    flight during the snapshot is above the horizon, so its operations are
+    counted by a later run however late it commits. Rows written before
+    transaction ids were recorded have a NULL ``txid`` and count as 0.
+    Operations still in ``operation_staging`` count as ledger rows too.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        chunk_size: int,
+    ):
+        self.session_factory = session_factory
+        self.chunk_size = chunk_size
+
+    async def run(self) -> ReconciliationReport:
+        started = time.perf_counter()
+
+        async with self.session_factory() as session:
+            await session.connection(
+                execution_options={"isolation_level": "REPEATABLE READ"}
+            )
+
+            wallet_rows = (
+                await session.execute(
+                    select(
+                        wallets.c.uuid,
+                        money.to_minor_units_sql(
+                            wallets.c.balance + slots_balance(wallets.c.uuid)
+                        ),
+                    )
+                )
+            ).all()
+            wallet_uuids = [wallet_uuid for wallet_uuid, _ in wallet_rows]
+            wallet_index = {
+                wallet_uuid: index for index, wallet_uuid in enumerate(wallet_uuids)
+            }
+            balances = np.fromiter(
+                (balance for _, balance in wallet_rows),
+                dtype=np.int64,
+                count=len(wallet_rows),
+            )
+
+            # The snapshot of the transaction, taken by the first query
+            horizon = await session.scalar(select(finished_txid_horizon()))
+
+            checkpoint_txids = np.zeros(len(wallet_rows), dtype=np.int64)
+            checkpoint_balances = np.zeros(len(wallet_rows), dtype=np.int64)
+            checkpoint_rows = await session.execute(
+                select(
+                    balance_checkpoints.c.wallet_uuid,
+                    balance_checkpoints.c.next_txid,
+                    money.to_minor_units_sql(balance_checkpoints.c.balance),
+                )
+            )
+            for wallet_uuid, next_txid, balance in checkpoint_rows:
+                checkpoint_txids[wallet_index[wallet_uuid]] = next_txid
+                checkpoint_balances[wallet_index[wallet_uuid]] = balance
+
+            # Wallets created after the previous run have no checkpoint yet,
+            # but all of their operations are in transactions above it
+            scan_from = await session.scalar(
+                select(func.coalesce(func.min(balance_checkpoints.c.next_txid), 0))
+            )
+
+            accumulator = LedgerAccumulator(wallet_index, checkpoint_txids, horizon)
+            signed_amount = case(
+                (
+                    ledger.c.operation_type.in_(DEBIT_OPERATION_TYPES),
+                    -money.to_minor_units_sql(ledger.c.amount),
+                ),
+                else_=money.to_minor_units_sql(ledger.c.amount),
+            )
+            stmt = select(
+                ledger.c.wallet_uuid, func.coalesce(ledger.c.txid, 0), signed_amount
+            ).execution_options(yield_per=self.chunk_size)
+            if scan_from:
+                stmt = stmt.where(ledger.c.txid >= scan_from)
+            result = await session.stream(stmt)
+            async for chunk in result.partitions():
+                accumulator.add(*zip(*chunk))
+
+            ledger_balances = checkpoint_balances + accumulator.totals
+            discrepancies = [
+                Discrepancy(
+                    wallet_uuid=wallet_uuids[index],
+                    balance=money.from_minor_units(balances[index]),
+                    ledger_balance=money.from_minor_units(ledger_balances[index]),
+                    difference=money.from_minor_units(
+                        balances[index] - ledger_balances[index]
+                    ),
+                )
+                for index in np.flatnonzero(balances != ledger_balances)
+            ]
+
+            await self._write_checkpoints(
+                session,
+                wallet_uuids,
+                horizon,
+                checkpoint_balances + accumulator.settled_totals,
+            )
+            await session.commit()
+
+        elapsed = time.perf_counter() - started
+        return ReconciliationReport(
+            wallets_checked=len(wallet_uuids),
+            operations_scanned=accumulator.rows,
+            scanned_from_txid=scan_from,
+            checkpoint_txid=horizon,
+            elapsed_seconds=round(elapsed, 3),
+            rows_per_second=round(accumulator.rows / elapsed, 1) if elapsed else 0.0,
+            discrepancies=discrepancies,
+        )
+
+    async def _write_checkpoints(
+        self,
+        session: AsyncSession,
+        wallet_uuids: list[str],
+        horizon: int,
+        balances: np.ndarray,
+    ) -> None:
+        rows = func.unnest(
+            bindparam("wallet_uuids", type_=ARRAY(wallets.c.uuid.type)),
+            bindparam("balances", type_=ARRAY(BigInteger)),
+        ).table_valued("wallet_uuid", "balance")
+        stmt = insert(balance_checkpoints).from_select(
+            ["wallet_uuid", "next_txid", "balance"],
+            select(
+                rows.c.wallet_uuid,
+                bindparam("horizon", horizon, BigInteger),
+                money.from_minor_units_sql(rows.c.balance),
+            ),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[balance_checkpoints.c.wallet_uuid],
+            set_={
+                "next_txid": stmt.excluded.next_txid,
+                "balance": stmt.excluded.balance,
+                "updated_at": func.now(),
+            },
+        )
+
+        for start in range(0, len(wallet_uuids), self.chunk_size):
+            end = start + self.chunk_size
+            await session.execute(
+                stmt,
+                {
+                    "wallet_uuids": wallet_uuids[start:end],
+                    "balances": balances[start:end].tolist(),
+                },
+            )
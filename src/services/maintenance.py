@@ -0,0 +1,34 @@
+import asyncio
+import logging
+from datetime import timedelta
+
+from database.dao.wallet_dao import WalletDAO
+
+
+async def purge_idempotency_keys_periodically(
+    dao: WalletDAO, ttl: timedelta, batch_size: int, interval: float
+) -> None:
+    while True:
+        try:
+            purged = await dao.purge_idempotency_keys(ttl, batch_size)
+            if purged:
+                logging.info(f"Purged {purged} expired idempotency keys")
+        except Exception:
+            logging.exception("Idempotency key purge failed")
+        await asyncio.sleep(interval)
+
+
+async def rollup_operations_periodically(
+    dao: WalletDAO, batch_size: int, interval: float
+) -> None:
+    while True:
+        try:
+            rolled_up, caught_up = await dao.rollup_operations(batch_size)
+            while not caught_up:
+                batch, caught_up = await dao.rollup_operations(batch_size)
+                rolled_up += batch
+            if rolled_up:
+                logging.info(f"Rolled up {rolled_up} operations")
+        except Exception:
+            logging.exception("Operation rollup failed")
+        await asyncio.sleep(interval)
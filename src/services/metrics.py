@@ -0,0 +1,162 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Every worker process keeps its own registry and is scraped separately.
+Recording is a dict lookup and an integer increment on the event loop
+thread, so it needs no locks.
+"""
+
+import bisect
+from collections import defaultdict
+from typing import Iterator, Sequence
+
+_registry: list["Metric"] = []
+
+
+class Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        _registry.append(self)
+
+    def _labels(self, values: tuple, **extra: str) -> str:
+        pairs = [*zip(self.labelnames, values), *extra.items()]
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{value}"' for name, value in pairs) + "}"
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        return "\n".join(
+            [
+                f"# HELP {self.name} {self.documentation}",
+                f"# TYPE {self.name} {self.type}",
+                *self.samples(),
+            ]
+        )
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: defaultdict[tuple, float] = defaultdict(float)
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self.values[labels] += amount
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in self.values.items():
+            yield f"{self.name}{self._labels(labels)} {value}"
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.values: dict[tuple, float] = {}
+
+    def set(self, value: float, *labels: str) -> None:
+        self.values[labels] = value
+
+    def samples(self) -> Iterator[str]:
+        for labels, value in self.values.items():
+            yield f"{self.name}{self._labels(labels)} {value}"
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    DEFAULT_BUCKETS = (
+        0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+        0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+    )  # fmt: skip
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> per-bucket counts (last one is +Inf) and the sum
+        self.series: dict[tuple, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts, total = series
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def samples(self) -> Iterator[str]:
+        for labels, (counts, total) in self.series.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                yield (
+                    f"{self.name}_bucket{self._labels(labels, le=str(bound))} "
+                    f"{cumulative}"
+                )
+            yield f"{self.name}_sum{self._labels(labels)} {total[0]}"
+            yield f"{self.name}_count{self._labels(labels)} {cumulative}"
+
+
+def render() -> str:
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route template and status code.",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency, until the last body chunk is sent.",
+    ["method", "route"],
+)
+OPERATION_PHASE_DURATION = Histogram(
+    "wallet_operation_phase_duration_seconds",
+    "Time spent in each step of WalletDAO.process_operation.",
+    ["phase"],
+)
+OPERATION_ERRORS = Counter(
+    "wallet_operation_errors_total",
+    "Rejected wallet operations by error.",
+    ["error"],
+)
+LEDGER_STAGING_DEPTH = Gauge(
+    "wallet_ledger_staging_depth",
+    "Operations staged for the ledger flusher, as last seen by this worker.",
+)
+LEDGER_FLUSH_DURATION = Histogram(
+    "wallet_ledger_flush_duration_seconds",
+    "Duration of one COPY batch moving staged operations to the ledger.",
+)
+LEDGER_FLUSHED_OPERATIONS = Counter(
+    "wallet_ledger_flushed_operations_total",
+    "Staged operations moved to the ledger by this worker.",
+)
+LEDGER_BACKPRESSURE_WAITS = Counter(
+    "wallet_ledger_backpressure_waits_total",
+    "Operations that waited for the ledger flusher to drain the staging table.",
+)
+ADMISSION_SHED = Counter(
+    "wallet_admission_shed_total",
+    "Wallet route requests rejected by admission control, by reason.",
+    ["reason"],
+)
+ADMISSION_QUEUED = Counter(
+    "wallet_admission_queued_total",
+    "Wallet route requests that waited for an admission slot.",
+)
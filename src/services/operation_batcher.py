@@ -0,0 +1,79 @@
+import asyncio
+
+from database.dao.wallet_dao import WalletDAO
+from database.models.withdraw import OperationType
+
+
+class OperationBatcher:
+    """Group-commit stage in front of ``WalletDAO.process_operation``.
+
+    Operations arriving for the same wallet within ``window`` seconds are
+    merged into one ``WalletDAO.process_operations`` call: one row lock, one
+    ledger insert and one balance update per batch. Every caller still gets
+    its own balance or error, in arrival order. At most one batch per wallet
+    is in flight; operations arriving meanwhile form the next batch.
+    """
+
+    def __init__(self, dao: WalletDAO, window: float, max_batch_size: int):
+        self.dao = dao
+        self.window = window
+        self.max_batch_size = max_batch_size
+        self._queues: dict[str, list] = {}
+        self._workers: dict[str, asyncio.Task] = {}
+
+    async def submit(
+        self,
+        wallet_uuid: str,
+        operation_type: OperationType,
+        amount: float,
+    ) -> float:
+        future = asyncio.get_running_loop().create_future()
+        self._queues.setdefault(wallet_uuid, []).append(
+            (operation_type, amount, future)
+        )
+        if wallet_uuid not in self._workers:
+            self._workers[wallet_uuid] = asyncio.create_task(
+                self._drain(wallet_uuid)
+            )
+        return await future
+
+    async def _drain(self, wallet_uuid: str) -> None:
+        try:
+            await asyncio.sleep(self.window)
+            while True:
+                queue = self._queues.get(wallet_uuid)
+                if not queue:
+                    break
+                batch = queue[: self.max_batch_size]
+                del queue[: self.max_batch_size]
+                await self._flush(wallet_uuid, batch)
+        finally:
+            self._workers.pop(wallet_uuid, None)
+            if not self._queues.get(wallet_uuid):
+                self._queues.pop(wallet_uuid, None)
+
+    async def _flush(self, wallet_uuid: str, batch: list) -> None:
+        try:
+            results = await self.dao.process_operations(
+                wallet_uuid,
+                [(operation_type, amount) for operation_type, amount, _ in batch],
+            )
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    async def close(self) -> None:
+        """Wait until every queued operation has been flushed."""
+        while self._workers:
+            await asyncio.gather(*self._workers.values(), return_exceptions=True)
+
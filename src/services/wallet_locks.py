@@ -0,0 +1,76 @@
+import asyncio
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncIterator, Iterable
+
+
+class WalletLockManager:
+    """Serializes same-wallet operations inside one worker.
+
+    Holding the in-process lock before a DB connection is checked out means
+    at most one connection per hot wallet per worker is parked on the row
+    lock, so a hot wallet can not starve the pool for everybody else.
+    Wallets are hashed onto a fixed number of stripes, which bounds memory;
+    unrelated wallets sharing a stripe only serialize with each other.
+    """
+
+    def __init__(self, stripes: int):
+        self._locks = [asyncio.Lock() for _ in range(stripes)]
+        self._queue_depths = [0] * stripes
+        self.waiting = 0
+        self.max_queue_depth = 0
+        self.acquisitions = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def _stripe(self, wallet_uuid: str) -> int:
+        return hash(wallet_uuid) % len(self._locks)
+
+    @asynccontextmanager
+    async def lock(self, wallet_uuid: str) -> AsyncIterator[None]:
+        async with self._lock_stripe(self._stripe(wallet_uuid)):
+            yield
+
+    @asynccontextmanager
+    async def lock_many(self, wallet_uuids: Iterable[str]) -> AsyncIterator[None]:
+        """Lock the stripes of several wallets, always in stripe order."""
+        async with AsyncExitStack() as stack:
+            for stripe in sorted({self._stripe(uuid) for uuid in wallet_uuids}):
+                await stack.enter_async_context(self._lock_stripe(stripe))
+            yield
+
+    @asynccontextmanager
+    async def _lock_stripe(self, stripe: int) -> AsyncIterator[None]:
+        lock = self._locks[stripe]
+
+        self._queue_depths[stripe] += 1
+        self.waiting += 1
+        self.max_queue_depth = max(self.max_queue_depth, self._queue_depths[stripe])
+        started = time.perf_counter()
+        try:
+            await lock.acquire()
+        finally:
+            self._queue_depths[stripe] -= 1
+            self.waiting -= 1
+
+        wait_time = time.perf_counter() - started
+        self.acquisitions += 1
+        self.wait_time_total += wait_time
+        self.wait_time_max = max(self.wait_time_max, wait_time)
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def stats(self) -> dict:
+        return {
+            "stripes": len(self._locks),
+            "waiting": self.waiting,
+            "max_queue_depth": self.max_queue_depth,
+            "acquisitions": self.acquisitions,
+            "wait_time_total": self.wait_time_total,
+            "wait_time_max": self.wait_time_max,
+            "wait_time_avg": (
+                self.wait_time_total / self.acquisitions if self.acquisitions else 0.0
+            ),
+        }
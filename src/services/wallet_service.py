@@ -1,11 +1,33 @@
+from datetime import date, datetime
+from typing import AsyncIterator, Optional, Sequence, Union
+
+from sqlalchemy.engine import Row
+
 from database.dao.wallet_dao import WalletDAO
+from database.models.rollup import RollupGranularity
 from database.models.withdraw import OperationType
-from exceptions import WalletNotFoundError, InsufficientFundsError
+from exceptions import (
+    BaseSystemException,
+    WalletNotFoundError,
+    InsufficientFundsError,
+)
+from services.ledger_flusher import LedgerFlusher
+from services.operation_batcher import OperationBatcher
+from services.wallet_locks import WalletLockManager
 
 
 class WalletService:
-    def __init__(self, dao: WalletDAO):
+    def __init__(
+        self,
+        dao: WalletDAO,
+        batcher: Optional[OperationBatcher] = None,
+        lock_manager: Optional[WalletLockManager] = None,
+        ledger_flusher: Optional[LedgerFlusher] = None,
+    ):
         self.dao = dao
+        self.batcher = batcher
+        self.lock_manager = lock_manager
+        self.ledger_flusher = ledger_flusher
 
     async def get_balance(self, wallet_uuid: str) -> float:
         return await self.dao.get_balance(wallet_uuid)
@@ -15,11 +37,101 @@ class WalletService:
         wallet_uuid: str,
         operation_type: OperationType,
         amount: float,
+        idempotency_key: Optional[str] = None,
+    ) -> float:
+        if self.ledger_flusher is not None:
+            await self.ledger_flusher.admit()
+            new_balance = await self._process_operation(
+                wallet_uuid, operation_type, amount, idempotency_key
+            )
+            self.ledger_flusher.staged()
+            return new_balance
+        return await self._process_operation(
+            wallet_uuid, operation_type, amount, idempotency_key
+        )
+
+    async def _process_operation(
+        self,
+        wallet_uuid: str,
+        operation_type: OperationType,
+        amount: float,
+        idempotency_key: Optional[str] = None,
     ) -> float:
         try:
-            return await self.dao.process_operation(wallet_uuid, operation_type, amount)
+            # The batcher already keeps one transaction per wallet in flight;
+            # keyed operations bypass it to store the key with the ledger row
+            if self.batcher is not None and idempotency_key is None:
+                return await self.batcher.submit(wallet_uuid, operation_type, amount)
+            if self.lock_manager is not None:
+                async with self.lock_manager.lock(wallet_uuid):
+                    return await self.dao.process_operation(
+                        wallet_uuid, operation_type, amount, idempotency_key
+                    )
+            return await self.dao.process_operation(
+                wallet_uuid, operation_type, amount, idempotency_key
+            )
         except (WalletNotFoundError, InsufficientFundsError):
             raise
 
+    async def transfer(
+        self, source_uuid: str, target_uuid: str, amount: float
+    ) -> float:
+        if self.ledger_flusher is not None:
+            await self.ledger_flusher.admit()
+        if self.lock_manager is not None:
+            async with self.lock_manager.lock_many([source_uuid, target_uuid]):
+                new_balance = await self.dao.transfer(source_uuid, target_uuid, amount)
+        else:
+            new_balance = await self.dao.transfer(source_uuid, target_uuid, amount)
+        if self.ledger_flusher is not None:
+            self.ledger_flusher.staged(2)
+        return new_balance
+
+    async def set_wallet_slots(self, wallet_uuid: str, slots: int) -> None:
+        await self.dao.set_wallet_slots(wallet_uuid, slots)
+
+    async def process_operations_batch(
+        self,
+        batch: Sequence[tuple[str, OperationType, float]],
+        atomic: bool = False,
+    ) -> list[Union[float, BaseSystemException]]:
+        if self.ledger_flusher is None:
+            return await self.dao.process_operations_batch(batch, atomic)
+        await self.ledger_flusher.admit()
+        results = await self.dao.process_operations_batch(batch, atomic)
+        self.ledger_flusher.staged(
+            sum(not isinstance(result, BaseSystemException) for result in results)
+        )
+        return results
+
+    async def get_operations(
+        self, wallet_uuid: str, limit: int, cursor: Optional[int] = None
+    ) -> tuple[list[dict], Optional[int]]:
+        return await self.dao.get_operations(wallet_uuid, limit, cursor)
+
+    async def get_operation_stats(
+        self,
+        wallet_uuid: str,
+        granularity: RollupGranularity,
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+    ) -> tuple[list[dict], datetime]:
+        return await self.dao.get_operation_stats(
+            wallet_uuid, granularity, since, until
+        )
+
+    def stream_operations(
+        self, wallet_uuid: str, chunk_size: int
+    ) -> AsyncIterator[Sequence[Row]]:
+        return self.dao.stream_operations(wallet_uuid, chunk_size)
+
     async def create_wallet(self, wallet_uuid: str, initial_balance: float = 0) -> str:
         return await self.dao.create_wallet(wallet_uuid, initial_balance)
+
+    async def create_wallets(
+        self, new_wallets: Sequence[tuple[str, float]]
+    ) -> list[str]:
+        return await self.dao.create_wallets(new_wallets)
+
+    async def copy_wallets(self, wallet_uuids: Sequence[str]) -> None:
+        await self.dao.copy_wallets(wallet_uuids)
@@ -1,4 +1,6 @@
 import logging
+from typing import Optional
+
 from yarl import URL
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -26,6 +28,137 @@ class Settings(BaseSettings):
     DB_PASSWORD_POSTGRES: str
     DB_ECHO_POSTGRES: bool = False
 
+    # Read replica for balance and history reads; unset means primary only
+    DB_HOST_POSTGRES_REPLICA: Optional[str] = None
+    DB_PORT_POSTGRES_REPLICA: Optional[int] = None
+    REPLICA_MAX_LAG_SECONDS: float = 1.0
+    REPLICA_LAG_CHECK_INTERVAL_SECONDS: float = 0.5
+    # Consistency of reads without an X-Read-Consistency header. Writes are
+    # only tracked per worker, so a "replica" read served by another worker
+    # can miss the caller's own write; keep "primary" unless clients accept
+    # stale balances
+    READ_CONSISTENCY_DEFAULT: str = "primary"
+    # Wallets written by this worker are read from the primary for this long
+    READ_YOUR_WRITES_WINDOW_SECONDS: float = 5.0
+    READ_YOUR_WRITES_MAX_SIZE: int = 100000
+
+    # Connection pool, per worker process. See ``db_max_connections`` for
+    # the per-worker budget; a deployment opens up to WORKERS_COUNT times
+    # that, plus one balance listener per worker with BALANCE_CACHE_NOTIFY.
+    # Timeouts of 0 keep the server defaults
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    # Connections opened and prepared at startup, capped at DB_POOL_SIZE
+    DB_POOL_WARMUP_SIZE: int = 5
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_STATEMENT_TIMEOUT_MS: int = 0
+    DB_LOCK_TIMEOUT_MS: int = 0
+
+    # Money representation: "decimal" (NUMERIC(18, 2), decimal amounts) or
+    # "minor_units" (BIGINT cents, integer amounts); needs the migration
+    MONEY_MODE: str = "decimal"
+
+    # Operation path: "for_update" (SELECT ... FOR UPDATE, INSERT, UPDATE)
+    # or "single_statement" (one data-modifying CTE)
+    WALLET_OPERATION_STRATEGY: str = "for_update"
+
+    # DAO backend: "sqlalchemy", or "asyncpg" to run the hot balance and
+    # operation queries as prepared statements on a raw asyncpg pool. That
+    # pool opens on top of the SQLAlchemy one and counts in the budget
+    WALLET_DAO_BACKEND: str = "sqlalchemy"
+    ASYNCPG_POOL_MIN_SIZE: int = 5
+    ASYNCPG_POOL_MAX_SIZE: int = 15
+
+    # Operation batching (group commit per wallet)
+    OPERATION_BATCHING_ENABLED: bool = False
+    OPERATION_BATCH_WINDOW_MS: float = 2.0
+    OPERATION_BATCH_MAX_SIZE: int = 100
+
+    # Write-behind ledger: operations are appended to operation_staging in
+    # the balance transaction and moved to operation by a background flusher
+    # in COPY batches. Writers wait while LEDGER_STAGING_MAX_ROWS are staged,
+    # as far as this worker knows, and get a 503 after
+    # LEDGER_BACKPRESSURE_TIMEOUT_MS
+    LEDGER_STAGING_ENABLED: bool = False
+    LEDGER_FLUSH_BATCH_SIZE: int = 5000
+    LEDGER_FLUSH_INTERVAL_MS: float = 200.0
+    LEDGER_STAGING_MAX_ROWS: int = 50000
+    LEDGER_BACKPRESSURE_TIMEOUT_MS: float = 5000.0
+
+    # Slot mode for very hot wallets (PUT /wallet/{uuid}/slots): the balance
+    # is split over up to WALLET_SLOTS_MAX rows. Unkeyed operations on
+    # wallets without slots still take one statement; every write locking
+    # wallet rows takes one more to fold the slots into them
+    WALLET_SLOTS_ENABLED: bool = False
+    WALLET_SLOTS_MAX: int = 64
+
+    # Per-wallet in-process locks, taken before a DB connection is checked out
+    WALLET_LOCKS_ENABLED: bool = False
+    WALLET_LOCK_STRIPES: int = 1024
+
+    # Idempotency-Key support for the operation endpoint
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_PURGE_INTERVAL_SECONDS: float = 300.0
+    IDEMPOTENCY_PURGE_BATCH_SIZE: int = 5000
+    IDEMPOTENCY_CACHE_MAX_SIZE: int = 100000
+    IDEMPOTENCY_CACHE_TTL_SECONDS: float = 600.0
+
+    # Operation history
+    OPERATIONS_PAGE_MAX_SIZE: int = 500
+    OPERATIONS_EXPORT_CHUNK_SIZE: int = 10000
+
+    # Bulk wallet provisioning
+    WALLET_BULK_CREATE_MAX_SIZE: int = 1000000
+    WALLET_BULK_CREATE_CHUNK_SIZE: int = 10000
+
+    # Ledger reconciliation (python reconcile.py)
+    RECONCILIATION_CHUNK_SIZE: int = 100000
+
+    # Per-wallet turnover rollups behind GET /wallet/{uuid}/stats, folded in
+    # from the ledger by a background job every ROLLUP_INTERVAL_SECONDS in
+    # batches of up to ROLLUP_BATCH_SIZE transaction ids
+    ROLLUP_ENABLED: bool = False
+    ROLLUP_INTERVAL_SECONDS: float = 60.0
+    ROLLUP_BATCH_SIZE: int = 100000
+
+    # Batch operations endpoint
+    BATCH_OPERATIONS_MAX_SIZE: int = 50000
+
+    # Balance read cache; with BALANCE_CACHE_NOTIFY writers publish changed
+    # wallets via pg_notify and every worker drops them from its cache
+    BALANCE_CACHE_ENABLED: bool = False
+    BALANCE_CACHE_MAX_SIZE: int = 100000
+    BALANCE_CACHE_TTL_SECONDS: float = 5.0
+    BALANCE_CACHE_NOTIFY: bool = True
+    BALANCE_CACHE_NOTIFY_CHANNEL: str = "wallet_balance_changed"
+
+    # JSON-RPC calls in flight, batches included; 0 means db_max_connections
+    JSONRPC_CONCURRENCY_LIMIT: int = 0
+
+    # Admission control for the wallet routes: requests over a limit get
+    # 429/503 with Retry-After instead of waiting on the pool. 0 in flight
+    # means db_max_connections. X-Request-Timeout-Ms sets the
+    # request deadline; ADMISSION_DEFAULT_TIMEOUT_MS applies without it
+    # (0 = none). Once a transaction starts, the rest of the deadline is its
+    # statement_timeout and lock_timeout
+    ADMISSION_CONTROL_ENABLED: bool = False
+    ADMISSION_MAX_IN_FLIGHT: int = 0
+    ADMISSION_MAX_QUEUE: int = 100
+    ADMISSION_MAX_PER_WALLET: int = 8
+    ADMISSION_QUEUE_TIMEOUT_MS: float = 1000.0
+    ADMISSION_DEFAULT_TIMEOUT_MS: float = 0.0
+    ADMISSION_RETRY_AFTER_SECONDS: int = 1
+
+    # Middleware switches
+    MIDDLEWARE_TIMING_ENABLED: bool = True
+    MIDDLEWARE_GLOBAL_RESPONSES_ENABLED: bool = True
+    MIDDLEWARE_CORS_ENABLED: bool = True
+
+    # Prometheus metrics on /metrics
+    METRICS_ENABLED: bool = True
+
     # env
     model_config = SettingsConfigDict(env_file=".env", extra="allow")
 
@@ -40,6 +173,35 @@ class Settings(BaseSettings):
             path=f"/{self.DB_NAME_POSTGRES}",
         )
 
+    @property
+    def db_url_postgres_replica(self) -> Optional[URL]:
+        if not self.DB_HOST_POSTGRES_REPLICA:
+            return None
+        return self.db_url_postgres.with_host(
+            self.DB_HOST_POSTGRES_REPLICA
+        ).with_port(self.DB_PORT_POSTGRES_REPLICA or self.DB_PORT_POSTGRES)
+
+    @property
+    def db_dsn_postgres(self) -> str:
+        return str(self.db_url_postgres.with_scheme("postgresql"))
+
+    @property
+    def db_max_connections(self) -> int:
+        """Connections one worker may hold for requests, across both pools."""
+        max_connections = self.DB_POOL_SIZE + self.DB_MAX_OVERFLOW
+        if self.WALLET_DAO_BACKEND == "asyncpg":
+            max_connections += self.ASYNCPG_POOL_MAX_SIZE
+        return max_connections
+
+    @property
+    def db_server_settings(self) -> dict[str, str]:
+        server_settings = {}
+        if self.DB_STATEMENT_TIMEOUT_MS:
+            server_settings["statement_timeout"] = str(self.DB_STATEMENT_TIMEOUT_MS)
+        if self.DB_LOCK_TIMEOUT_MS:
+            server_settings["lock_timeout"] = str(self.DB_LOCK_TIMEOUT_MS)
+        return server_settings
+
     @property
     def db_url_postgres_sync(self) -> str:
         return (
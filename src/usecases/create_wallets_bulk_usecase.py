@@ -0,0 +1,29 @@
+import uuid
+from typing import AsyncIterator, Optional, Sequence
+
+from database.dao.wallet_dao import WalletDAO
+
+
+class CreateWalletsBulkUseCase:
+    def __init__(self, dao: WalletDAO, chunk_size: int):
+        self.dao = dao
+        self.chunk_size = chunk_size
+
+    async def execute(
+        self,
+        count: Optional[int] = None,
+        new_wallets: Optional[Sequence[tuple[str, float]]] = None,
+    ) -> AsyncIterator[list[str]]:
+        """Create wallets chunk by chunk, yielding UUIDs as chunks commit."""
+        if new_wallets is None:
+            for start in range(0, count, self.chunk_size):
+                size = min(self.chunk_size, count - start)
+                wallet_uuids = [str(uuid.uuid4()) for _ in range(size)]
+                await self.dao.copy_wallets(wallet_uuids)
+                yield wallet_uuids
+            return
+
+        for start in range(0, len(new_wallets), self.chunk_size):
+            yield await self.dao.create_wallets(
+                new_wallets[start : start + self.chunk_size]
+            )
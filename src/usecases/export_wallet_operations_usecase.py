@@ -0,0 +1,69 @@
+import csv
+import enum
+import io
+import json
+from typing import AsyncIterator
+
+from database.dao.wallet_dao import WalletDAO
+from exceptions import WalletNotFoundError
+
+CSV_HEADER = ("id", "operation_type", "amount", "created_at")
+
+
+class ExportFormat(str, enum.Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class ExportWalletOperationsUseCase:
+    def __init__(self, dao: WalletDAO, chunk_size: int):
+        self.dao = dao
+        self.chunk_size = chunk_size
+
+    async def execute(
+        self, wallet_uuid: str, export_format: ExportFormat
+    ) -> AsyncIterator[str]:
+        # Fail before the response starts, a 404 can't be sent mid-stream
+        try:
+            await self.dao.get_balance(wallet_uuid)
+        except WalletNotFoundError:
+            raise
+
+        if export_format == ExportFormat.CSV:
+            return self._csv(wallet_uuid)
+        return self._ndjson(wallet_uuid)
+
+    async def _ndjson(self, wallet_uuid: str) -> AsyncIterator[str]:
+        async for chunk in self.dao.stream_operations(wallet_uuid, self.chunk_size):
+            yield "".join(
+                json.dumps(
+                    {
+                        "id": row.id,
+                        "operation_type": row.operation_type.value,
+                        "amount": str(row.amount),
+                        "created_at": row.created_at.isoformat(),
+                    }
+                )
+                + "\n"
+                for row in chunk
+            )
+
+    async def _csv(self, wallet_uuid: str) -> AsyncIterator[str]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(CSV_HEADER)
+        async for chunk in self.dao.stream_operations(wallet_uuid, self.chunk_size):
+            writer.writerows(
+                (
+                    row.id,
+                    row.operation_type.value,
+                    row.amount,
+                    row.created_at.isoformat(),
+                )
+                for row in chunk
+            )
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
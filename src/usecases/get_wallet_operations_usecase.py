@@ -0,0 +1,17 @@
+from typing import Optional
+
+from database.dao.wallet_dao import WalletDAO
+from exceptions import WalletNotFoundError
+
+
+class GetWalletOperationsUseCase:
+    def __init__(self, dao: WalletDAO):
+        self.dao = dao
+
+    async def execute(
+        self, wallet_uuid: str, limit: int, cursor: Optional[int] = None
+    ) -> tuple[list[dict], Optional[int]]:
+        try:
+            return await self.dao.get_operations(wallet_uuid, limit, cursor)
+        except WalletNotFoundError:
+            raise
@@ -0,0 +1,30 @@
+from datetime import date, datetime
+from typing import Optional
+
+from database.dao.wallet_dao import WalletDAO
+from database.models.rollup import RollupGranularity
+from exceptions import WalletNotFoundError
+
+
+class GetWalletStatsUseCase:
+    def __init__(self, dao: WalletDAO, enabled: bool):
+        self.dao = dao
+        self.enabled = enabled
+
+    async def execute(
+        self,
+        wallet_uuid: str,
+        granularity: RollupGranularity,
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+    ) -> tuple[list[dict], datetime]:
+        if not self.enabled:
+            raise ValueError("Operation rollups are disabled")
+        if since is not None and until is not None and since > until:
+            raise ValueError("date_from must not be after date_to")
+        try:
+            return await self.dao.get_operation_stats(
+                wallet_uuid, granularity, since, until
+            )
+        except WalletNotFoundError:
+            raise
@@ -1,21 +1,68 @@
+from typing import Optional
+
 from database.dao.wallet_dao import WalletDAO
 from database.models.withdraw import OperationType
-from exceptions import WalletNotFoundError, InsufficientFundsError
+from exceptions import (
+    IdempotencyKeyMismatchError,
+    WalletNotFoundError,
+    InsufficientFundsError,
+)
+from money import money
+from services.cache import LRUCache
 
 
 class ProcessWalletOperationUseCase:
-    def __init__(self, dao: WalletDAO):
+    ALLOWED_OPERATION_TYPES = (
+        OperationType.DEPOSIT,
+        OperationType.WITHDRAW,
+        OperationType.TRANSFER,
+    )
+
+    def __init__(self, dao: WalletDAO, idempotency_cache: Optional[LRUCache] = None):
         self.dao = dao
+        self.idempotency_cache = idempotency_cache
 
     async def execute(
-        self, wallet_uuid: str, operation_type: str, amount: float
+        self,
+        wallet_uuid: str,
+        operation_type: str,
+        amount: float,
+        idempotency_key: Optional[str] = None,
+        target_wallet_uuid: Optional[str] = None,
     ) -> float:
         try:
             op_type = OperationType(operation_type)
         except ValueError:
-            raise ValueError("Invalid operation_type. Allowed: DEPOSIT, WITHDRAW")
+            op_type = None
+        if op_type not in self.ALLOWED_OPERATION_TYPES:
+            raise ValueError(
+                "Invalid operation_type. Allowed: DEPOSIT, WITHDRAW, TRANSFER"
+            )
+
+        if op_type == OperationType.TRANSFER:
+            if target_wallet_uuid is None:
+                raise ValueError("target_wallet_uuid is required for TRANSFER")
+            if idempotency_key is not None:
+                raise ValueError("Idempotency-Key is not supported for TRANSFER")
+            return await self.dao.transfer(wallet_uuid, target_wallet_uuid, amount)
+
+        use_cache = idempotency_key is not None and self.idempotency_cache is not None
+        if use_cache:
+            fingerprint = (wallet_uuid, op_type, money.parse(amount))
+            cached = self.idempotency_cache.get(idempotency_key)
+            if cached is not None:
+                cached_fingerprint, new_balance = cached
+                if cached_fingerprint != fingerprint:
+                    raise IdempotencyKeyMismatchError()
+                return new_balance
 
         try:
-            return await self.dao.process_operation(wallet_uuid, op_type, amount)
+            new_balance = await self.dao.process_operation(
+                wallet_uuid, op_type, amount, idempotency_key
+            )
         except (WalletNotFoundError, InsufficientFundsError):
             raise
+
+        if use_cache:
+            self.idempotency_cache.set(idempotency_key, (fingerprint, new_balance))
+        return new_balance
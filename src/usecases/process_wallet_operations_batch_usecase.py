@@ -0,0 +1,33 @@
+from typing import Sequence, Union
+
+from database.dao.wallet_dao import WalletDAO
+from database.models.withdraw import OperationType
+from exceptions import BaseSystemException, BatchOperationError
+
+
+class ProcessWalletOperationsBatchUseCase:
+    ALLOWED_OPERATION_TYPES = (OperationType.DEPOSIT, OperationType.WITHDRAW)
+
+    def __init__(self, dao: WalletDAO):
+        self.dao = dao
+
+    async def execute(
+        self, batch: Sequence[tuple[str, str, float]], atomic: bool
+    ) -> list[Union[float, BaseSystemException]]:
+        try:
+            typed_batch = [
+                (wallet_uuid, OperationType(operation_type), amount)
+                for wallet_uuid, operation_type, amount in batch
+            ]
+        except ValueError:
+            typed_batch = None
+        if typed_batch is None or any(
+            operation_type not in self.ALLOWED_OPERATION_TYPES
+            for _, operation_type, _ in typed_batch
+        ):
+            raise ValueError("Invalid operation_type. Allowed: DEPOSIT, WITHDRAW")
+
+        try:
+            return await self.dao.process_operations_batch(typed_batch, atomic)
+        except BatchOperationError:
+            raise
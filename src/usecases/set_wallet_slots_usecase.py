@@ -0,0 +1,17 @@
+from database.dao.wallet_dao import WalletDAO
+from exceptions import WalletNotFoundError
+
+
+class SetWalletSlotsUseCase:
+    def __init__(self, dao: WalletDAO, enabled: bool):
+        self.dao = dao
+        self.enabled = enabled
+
+    async def execute(self, wallet_uuid: str, slots: int) -> int:
+        if not self.enabled:
+            raise ValueError("Wallet slots are disabled")
+        try:
+            await self.dao.set_wallet_slots(wallet_uuid, slots)
+        except WalletNotFoundError:
+            raise
+        return slots
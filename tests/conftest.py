@@ -0,0 +1,185 @@
+import asyncio
+import os
+import sys
+
+import pytest
+
+sys.path.insert(
+    0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src"))
+)
+
+os.environ.setdefault("APP_HOST", "127.0.0.1")
+os.environ.setdefault("APP_PORT", "9000")
+os.environ.setdefault("APP_RELOAD", "False")
+os.environ.setdefault("DB_HOST_POSTGRES", "localhost")
+os.environ.setdefault("DB_PORT_POSTGRES", "5432")
+os.environ.setdefault("DB_NAME_POSTGRES", "wallet")
+os.environ.setdefault("DB_USERNAME_POSTGRES", "postgres")
+os.environ.setdefault("DB_PASSWORD_POSTGRES", "postgres")
+
+# Tests taking the ``session_factory`` fixture run against the Postgres of the
+# DB_* variables and are skipped unless WALLET_TEST_DATABASE=1 marks it as
+# disposable: its "wallet" schema is dropped and rebuilt from the models.
+TEST_DATABASE_ENABLED = os.environ.get("WALLET_TEST_DATABASE") == "1"
+
+
+class FakeWalletService:
+    """Records what the use cases ask of ``WalletService``."""
+
+    def __init__(self):
+        self.calls = []
+
+    async def process_operation(
+        self, wallet_uuid, operation_type, amount, idempotency_key=None
+    ):
+        self.calls.append(("process_operation", wallet_uuid, operation_type, amount))
+        return 100.0 + len(self.calls)
+
+    async def transfer(self, source_uuid, target_uuid, amount):
+        self.calls.append(("transfer", source_uuid, target_uuid, amount))
+        return 90.0
+
+    async def set_wallet_slots(self, wallet_uuid, slots):
+        self.calls.append(("set_wallet_slots", wallet_uuid, slots))
+
+
+class FakeWalletDAO:
+    """In-memory ``WalletDAO`` for the services running in front of it.
+
+    Balances change through the DAO's own ``apply_operation``; ``staged``
+    counts the rows waiting in the ledger staging table.
+    """
+
+    def __init__(self, balances=None, staged=0):
+        self.balances = dict(balances or {})
+        self.staged = staged
+        self.calls = []
+        self.flushed = []
+
+    async def process_operations(self, wallet_uuid, wallet_operations):
+        from database.dao.wallet_dao import apply_operation
+        from exceptions import InsufficientFundsError, WalletNotFoundError
+        from money import money
+
+        self.calls.append((wallet_uuid, list(wallet_operations)))
+        if wallet_uuid not in self.balances:
+            raise WalletNotFoundError()
+        results = []
+        for operation_type, amount in wallet_operations:
+            try:
+                self.balances[wallet_uuid] = apply_operation(
+                    self.balances[wallet_uuid], operation_type, money.parse(amount)
+                )
+            except InsufficientFundsError as e:
+                results.append(e)
+                continue
+            results.append(money.to_api(self.balances[wallet_uuid]))
+        return results
+
+    async def flush_staged_operations(self, batch_size):
+        moved = min(batch_size, self.staged)
+        self.staged -= moved
+        self.flushed.append(moved)
+        return moved, self.staged
+
+
+@pytest.fixture
+def wallet_service():
+    return FakeWalletService()
+
+
+@pytest.fixture
+def fake_wallet_dao():
+    """Builds a ``FakeWalletDAO``; takes its ``balances`` and ``staged``."""
+    return FakeWalletDAO
+
+
+async def _create_schema(engine) -> None:
+    from sqlalchemy import text
+
+    from database.models import (  # noqa: F401 - registers the tables
+        checkpoint,
+        idempotency,
+        operation_staging,
+        rollup,
+        schema_setting,
+        wallet,
+        wallet_slot,
+        withdraw,
+    )
+    from database.models.base import metadata
+
+    async with engine.begin() as connection:
+        await connection.execute(text("DROP SCHEMA IF EXISTS wallet CASCADE"))
+        for enum_type in ("operationtype", "rollupgranularity"):
+            await connection.execute(text(f"DROP TYPE IF EXISTS {enum_type}"))
+        await connection.execute(text("CREATE SCHEMA wallet"))
+        # The staging ids default to the operation sequence, so it goes last
+        staging = operation_staging.operation_staging
+        await connection.run_sync(
+            metadata.create_all,
+            tables=[table for table in metadata.sorted_tables if table is not staging],
+        )
+        await connection.run_sync(metadata.create_all, tables=[staging])
+
+
+async def _reset_tables(engine) -> None:
+    from sqlalchemy import insert, text
+
+    from database.models.base import metadata
+    from database.models.rollup import ROLLUP_CHECKPOINT_NAME, rollup_checkpoints
+    from database.models.schema_setting import MONEY_MODE_SETTING, schema_settings
+    from settings import settings
+
+    names = ", ".join(f"wallet.{table.name}" for table in metadata.sorted_tables)
+    async with engine.begin() as connection:
+        await connection.execute(text(f"TRUNCATE {names} RESTART IDENTITY"))
+        await connection.execute(
+            insert(rollup_checkpoints).values(
+                name=ROLLUP_CHECKPOINT_NAME, next_txid=0
+            )
+        )
+        await connection.execute(
+            insert(schema_settings).values(
+                name=MONEY_MODE_SETTING, value=settings.MONEY_MODE
+            )
+        )
+
+
+@pytest.fixture(scope="session")
+def database_engine():
+    if not TEST_DATABASE_ENABLED:
+        pytest.skip("set WALLET_TEST_DATABASE=1 to run the database tests")
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    from settings import settings
+
+    # NullPool: every test runs its own event loop, connections cannot outlive it
+    engine = create_async_engine(str(settings.db_url_postgres), poolclass=NullPool)
+    asyncio.run(_create_schema(engine))
+    return engine
+
+
+@pytest.fixture
+def session_factory(database_engine):
+    from database.core import create_session_maker
+
+    asyncio.run(_reset_tables(database_engine))
+    return create_session_maker(database_engine)
+
+
+@pytest.fixture
+def api_client(session_factory):
+    """``TestClient`` of the app, its DAOs running on the test database."""
+    from fastapi.testclient import TestClient
+
+    import app as app_module
+    from dependencies import get_session_factory
+
+    app = app_module.app
+    app.dependency_overrides[get_session_factory] = lambda: session_factory
+    try:
+        yield TestClient(app)
+    finally:
+        app.dependency_overrides.clear()
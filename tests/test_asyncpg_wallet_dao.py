@@ -0,0 +1,82 @@
+import asyncio
+from contextlib import asynccontextmanager
+from decimal import Decimal
+
+import pytest
+
+from database.dao import asyncpg_wallet_dao
+from database.dao.asyncpg_wallet_dao import AsyncpgWalletDAO
+from database.models.withdraw import OperationType
+from exceptions import InsufficientFundsError, WalletNotFoundError
+
+
+class FakeStatement:
+    def __init__(self, handler):
+        self.handler = handler
+
+    async def fetchval(self, *args):
+        return self.handler(*args)
+
+    async def fetchrow(self, *args):
+        return self.handler(*args)
+
+
+class FakeConnection:
+    def __init__(self, balances):
+        self.balances = balances
+        self.ledger = []
+        self.statements = {
+            "get_balance": FakeStatement(balances.get),
+            "lock_wallet": FakeStatement(
+                lambda uuid: {"balance": balances[uuid]} if uuid in balances else None
+            ),
+            "insert_operation": FakeStatement(
+                lambda *row: self.ledger.append(row)
+            ),
+            "update_balance": FakeStatement(balances.__setitem__),
+            "notify": FakeStatement(lambda channel, uuid: None),
+        }
+
+    @asynccontextmanager
+    async def transaction(self):
+        yield
+
+
+class FakePool:
+    def __init__(self, connection):
+        self.connection = connection
+
+    @asynccontextmanager
+    async def acquire(self):
+        yield self.connection
+
+
+@pytest.fixture
+def connection(monkeypatch):
+    connection = FakeConnection({"w1": Decimal("10.00")})
+    pool = FakePool(connection)
+    monkeypatch.setattr(asyncpg_wallet_dao, "get_asyncpg_pool", lambda: pool)
+    return connection
+
+
+def test_operation_uses_prepared_statements(connection):
+    dao = AsyncpgWalletDAO(session_factory=None)
+
+    balance = asyncio.run(dao.process_operation("w1", OperationType.WITHDRAW, 2.5))
+
+    assert balance == 7.5
+    assert connection.balances["w1"] == Decimal("7.50")
+    assert connection.ledger == [("w1", "WITHDRAW", Decimal("2.5"))]
+    assert asyncio.run(dao.get_balance("w1")) == 7.5
+
+
+def test_operation_errors(connection):
+    dao = AsyncpgWalletDAO(session_factory=None)
+
+    with pytest.raises(WalletNotFoundError):
+        asyncio.run(dao.process_operation("w2", OperationType.DEPOSIT, 1))
+    with pytest.raises(WalletNotFoundError):
+        asyncio.run(dao.get_balance("w2"))
+    with pytest.raises(InsufficientFundsError):
+        asyncio.run(dao.process_operation("w1", OperationType.WITHDRAW, 100))
+    assert connection.ledger == []
@@ -0,0 +1,25 @@
+import asyncio
+
+from database.notifications import BalanceChangeListener
+from services.cache import LRUCache
+
+
+def test_reconnect_retries_after_non_postgres_error(monkeypatch):
+    cache = LRUCache(max_size=10, ttl=60)
+    cache.set("w1", 100)
+    listener = BalanceChangeListener("postgresql://", "balances", cache)
+    listener.RECONNECT_DELAY = 0
+    errors = [RuntimeError("TLS handshake failed"), ValueError("bad message")]
+    attempts = []
+
+    async def start():
+        attempts.append(True)
+        if errors:
+            raise errors.pop(0)
+
+    monkeypatch.setattr(listener, "start", start)
+
+    asyncio.run(listener._reconnect())
+
+    assert len(attempts) == 3
+    assert cache.get("w1") is None
@@ -0,0 +1,110 @@
+import asyncio
+import uuid
+
+from fastapi.testclient import TestClient
+
+from database.dao.wallet_dao import WalletDAO
+from database.models.withdraw import OperationType
+
+MISSING_UUID = "00000000-0000-0000-0000-000000000000"
+
+
+def create_wallets(session_factory, *balances):
+    wallet_uuids = [str(uuid.uuid4()) for _ in balances]
+    asyncio.run(
+        WalletDAO(session_factory).create_wallets(list(zip(wallet_uuids, balances)))
+    )
+    return wallet_uuids
+
+
+def post_batch(client, mode, operations):
+    return client.post(
+        "/api/v1/wallet/operations/batch",
+        json={
+            "mode": mode,
+            "operations": [
+                {"wallet_uuid": wallet_uuid, "operation_type": type_, "amount": amount}
+                for wallet_uuid, type_, amount in operations
+            ],
+        },
+    )
+
+
+def balance(client, wallet_uuid):
+    return client.get(f"/api/v1/wallet/{wallet_uuid}").json()["balance"]
+
+
+def test_per_item_batch_reports_each_result(api_client, session_factory):
+    first, second = create_wallets(session_factory, 100, 0)
+
+    response = post_batch(
+        api_client,
+        "PER_ITEM",
+        [
+            (first, "WITHDRAW", 30),
+            (second, "WITHDRAW", 10),
+            (MISSING_UUID, "DEPOSIT", 5),
+            (second, "DEPOSIT", 5),
+        ],
+    )
+
+    assert response.status_code == 200
+    assert [
+        (item["new_balance"], item["error"]) for item in response.json()["results"]
+    ] == [
+        (70.0, None),
+        (None, "Insufficient funds"),
+        (None, "Wallet not found"),
+        (5.0, None),
+    ]
+    assert (balance(api_client, first), balance(api_client, second)) == (70.0, 5.0)
+
+
+def test_atomic_batch_rolls_back_on_first_failure(api_client, session_factory):
+    first, second = create_wallets(session_factory, 100, 0)
+
+    insufficient = post_batch(
+        api_client, "ATOMIC", [(first, "WITHDRAW", 30), (second, "WITHDRAW", 10)]
+    )
+    missing = post_batch(
+        api_client, "ATOMIC", [(first, "DEPOSIT", 30), (MISSING_UUID, "DEPOSIT", 1)]
+    )
+
+    assert insufficient.status_code == 400
+    assert insufficient.json()["detail"] == "Operation #1: Insufficient funds"
+    assert missing.status_code == 404
+    assert (balance(api_client, first), balance(api_client, second)) == (100.0, 0.0)
+
+
+def test_batches_in_opposite_wallet_order_do_not_deadlock(session_factory):
+    first, second = create_wallets(session_factory, 0, 0)
+    dao = WalletDAO(session_factory)
+    deposit = OperationType.DEPOSIT
+
+    async def main():
+        # Wallets are locked in UUID order, not in batch order
+        await asyncio.gather(
+            *(
+                dao.process_operations_batch(
+                    [(first, deposit, 1), (second, deposit, 1)][::direction]
+                )
+                for _ in range(20)
+                for direction in (1, -1)
+            )
+        )
+        return await dao.get_balance(first), await dao.get_balance(second)
+
+    assert asyncio.run(main()) == (40.0, 40.0)
+
+
+def test_batch_rejects_transfers():
+    import app as app_module
+
+    response = post_batch(
+        TestClient(app_module.app),
+        "ATOMIC",
+        [(MISSING_UUID, "TRANSFER", 10)],
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Invalid operation_type")
@@ -0,0 +1,46 @@
+import time
+
+from services.cache import LRUCache
+
+
+def test_get_counts_hits_and_misses():
+    cache = LRUCache(max_size=10, ttl=60)
+    cache.set("w1", 10.0)
+
+    assert cache.get("w1") == 10.0
+    assert cache.get("w2") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LRUCache(max_size=2, ttl=60)
+    cache.set("w1", 1.0)
+    cache.set("w2", 2.0)
+    cache.get("w1")
+    cache.set("w3", 3.0)
+
+    assert cache.get("w2") is None
+    assert cache.get("w1") == 1.0
+    assert cache.get("w3") == 3.0
+    assert cache.evictions == 1
+
+
+def test_expired_entry_is_a_miss(monkeypatch):
+    cache = LRUCache(max_size=10, ttl=5)
+    cache.set("w1", 1.0)
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 6)
+
+    assert cache.get("w1") is None
+    assert len(cache) == 0
+
+
+def test_invalidate_drops_entry():
+    cache = LRUCache(max_size=10, ttl=60)
+    cache.set("w1", 1.0)
+    cache.invalidate("w1")
+    cache.invalidate("missing")
+
+    assert cache.get("w1") is None
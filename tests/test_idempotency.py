@@ -0,0 +1,67 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+
+from database.dao.wallet_dao import WalletDAO
+from database.models.withdraw import OperationType, operations
+from exceptions import IdempotencyKeyMismatchError
+from services.cache import LRUCache
+from usecases.process_wallet_operation_usecase import ProcessWalletOperationUseCase
+
+
+def make_usecase(service):
+    return ProcessWalletOperationUseCase(service, LRUCache(max_size=10, ttl=60))
+
+
+def test_recent_duplicate_is_answered_from_memory(wallet_service):
+    usecase = make_usecase(wallet_service)
+
+    first = asyncio.run(usecase.execute("w1", "DEPOSIT", 10, "key-1"))
+    replay = asyncio.run(usecase.execute("w1", "DEPOSIT", 10.00, "key-1"))
+
+    assert first == replay == 101.0
+    assert len(wallet_service.calls) == 1
+
+
+def test_key_reused_for_another_operation_is_rejected(wallet_service):
+    usecase = make_usecase(wallet_service)
+    asyncio.run(usecase.execute("w1", "DEPOSIT", 10, "key-1"))
+
+    with pytest.raises(IdempotencyKeyMismatchError):
+        asyncio.run(usecase.execute("w1", "WITHDRAW", 10, "key-1"))
+
+
+def test_operations_without_key_are_not_deduplicated(wallet_service):
+    usecase = make_usecase(wallet_service)
+
+    asyncio.run(usecase.execute("w1", "DEPOSIT", 10))
+    asyncio.run(usecase.execute("w1", "DEPOSIT", 10))
+
+    assert len(wallet_service.calls) == 2
+
+
+def test_dao_applies_a_keyed_operation_once(session_factory):
+    dao = WalletDAO(session_factory)
+    wallet_uuid = str(uuid.uuid4())
+
+    async def main():
+        await dao.create_wallet(wallet_uuid)
+        first = await dao.process_operation(
+            wallet_uuid, OperationType.DEPOSIT, 10, idempotency_key="key-1"
+        )
+        replay = await dao.process_operation(
+            wallet_uuid, OperationType.DEPOSIT, 10, idempotency_key="key-1"
+        )
+        with pytest.raises(IdempotencyKeyMismatchError):
+            await dao.process_operation(
+                wallet_uuid, OperationType.WITHDRAW, 10, idempotency_key="key-1"
+            )
+        async with session_factory() as session:
+            ledger_rows = await session.scalar(
+                select(func.count()).select_from(operations)
+            )
+        return first, replay, await dao.get_balance(wallet_uuid), ledger_rows
+
+    assert asyncio.run(main()) == (10.0, 10.0, 10.0, 1)
@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from dependencies import (
+    get_process_wallet_operation_usecase,
+    get_wallet_balance_usecase,
+)
+from exceptions import InsufficientFundsError, WalletNotFoundError
+
+W1 = "6f0c2d6e-3b1a-4c1e-9a3e-0d7b1f3c5a01"
+W2 = "6f0c2d6e-3b1a-4c1e-9a3e-0d7b1f3c5a02"
+MISSING = "6f0c2d6e-3b1a-4c1e-9a3e-0d7b1f3c5a03"
+BALANCES = {W1: 100.0, W2: 5.0}
+
+
+class FakeBalanceUseCase:
+    in_flight = 0
+    max_in_flight = 0
+
+    async def execute(self, wallet_uuid):
+        cls = type(self)
+        cls.in_flight += 1
+        cls.max_in_flight = max(cls.max_in_flight, cls.in_flight)
+        await asyncio.sleep(0.01)
+        cls.in_flight -= 1
+        if wallet_uuid not in BALANCES:
+            raise WalletNotFoundError()
+        return BALANCES[wallet_uuid]
+
+
+class FakeOperationUseCase:
+    async def execute(
+        self, wallet_uuid, operation_type, amount, idempotency_key, target_wallet_uuid
+    ):
+        if amount > BALANCES[wallet_uuid]:
+            raise InsufficientFundsError()
+        return BALANCES[wallet_uuid] - amount
+
+
+@pytest.fixture
+def client():
+    import app as app_module
+    from routers.rpc import entrypoint
+
+    # TestClient runs each request on a new event loop; the scheduler
+    # binds to the loop of its first batch
+    entrypoint.scheduler = None
+    app = app_module.app
+    app.dependency_overrides[get_wallet_balance_usecase] = FakeBalanceUseCase
+    app.dependency_overrides[get_process_wallet_operation_usecase] = (
+        FakeOperationUseCase
+    )
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def call(method, params, id):
+    return {"jsonrpc": "2.0", "id": id, "method": method, "params": params}
+
+
+def test_batch_returns_result_or_error_per_call(client):
+    response = client.post(
+        "/api/v1/jsonrpc",
+        json=[
+            call("get_balance", {"wallet_uuid": W1}, 1),
+            call("get_balance", {"wallet_uuid": MISSING}, 2),
+            call(
+                "process_operation",
+                {"wallet_uuid": W2, "operation_type": "WITHDRAW", "amount": 10},
+                3,
+            ),
+        ],
+    )
+
+    assert response.status_code == 200
+    by_id = {item["id"]: item for item in response.json()}
+    assert by_id[1]["result"] == {"balance": 100.0}
+    assert by_id[2]["error"]["code"] == 1001
+    assert by_id[3]["error"]["code"] == 1002
+
+
+def test_batch_calls_run_concurrently_within_pool_limit(client):
+    from routers.rpc import entrypoint
+
+    response = client.post(
+        "/api/v1/jsonrpc",
+        json=[call("get_balance", {"wallet_uuid": W1}, i) for i in range(200)],
+    )
+
+    assert len(response.json()) == 200
+    assert 1 < FakeBalanceUseCase.max_in_flight <= entrypoint.scheduler.limit
+
+
+def test_malformed_wallet_uuid_is_rejected_before_the_usecase(client):
+    response = client.post(
+        "/api/v1/jsonrpc", json=call("get_balance", {"wallet_uuid": "w1"}, 1)
+    )
+
+    assert response.json()["error"]["code"] == -32602
@@ -0,0 +1,128 @@
+import asyncio
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from database.dao.wallet_dao import WalletDAO
+from database.models.operation_staging import operation_staging
+from database.models.withdraw import OperationType
+from dependencies import get_process_wallet_operation_usecase
+from exceptions import LedgerBackpressureError
+from money import money
+from services.ledger_flusher import LedgerFlusher
+
+
+def test_flush_moves_batches_until_drained(fake_wallet_dao):
+    dao = fake_wallet_dao(staged=25)
+    flusher = LedgerFlusher(
+        dao, batch_size=10, interval=1, max_depth=100, max_wait=1
+    )
+
+    assert asyncio.run(flusher.flush()) == 25
+    assert dao.flushed == [10, 10, 5]
+    assert flusher.stats()["depth"] == 0
+
+
+def test_writers_wait_while_staging_is_full(fake_wallet_dao):
+    async def main():
+        dao = fake_wallet_dao()
+        flusher = LedgerFlusher(
+            dao, batch_size=10, interval=1, max_depth=3, max_wait=1
+        )
+        flusher.staged(3)
+        dao.staged = 3
+
+        admitted = asyncio.create_task(flusher.admit())
+        await asyncio.sleep(0.01)
+        assert not admitted.done()
+
+        runner = asyncio.create_task(flusher.run())
+        await asyncio.wait_for(admitted, 1)
+        runner.cancel()
+        return flusher.stats()
+
+    stats = asyncio.run(main())
+
+    assert stats["flushed"] == 3
+    assert stats["backpressure_waits"] == 1
+
+
+def test_writers_give_up_when_staging_stays_full(fake_wallet_dao):
+    flusher = LedgerFlusher(
+        fake_wallet_dao(), batch_size=10, interval=0.01, max_depth=3, max_wait=0.05
+    )
+    # No flusher is running, as when every flush fails
+    flusher.staged(3)
+
+    with pytest.raises(LedgerBackpressureError):
+        asyncio.run(flusher.admit())
+    assert flusher.stats()["backpressure_waits"] >= 1
+
+
+def test_full_staging_is_a_503():
+    import app as app_module
+
+    class FullLedgerUseCase:
+        async def execute(self, *args):
+            raise LedgerBackpressureError()
+
+    app = app_module.app
+    app.dependency_overrides[get_process_wallet_operation_usecase] = (
+        FullLedgerUseCase
+    )
+    try:
+        response = TestClient(app).post(
+            f"/api/v1/wallet/{uuid.uuid4()}/operation",
+            json={"operation_type": "DEPOSIT", "amount": 10},
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+
+
+def test_close_flushes_everything_staged(fake_wallet_dao):
+    dao = fake_wallet_dao(staged=7)
+    flusher = LedgerFlusher(
+        dao, batch_size=5, interval=1, max_depth=100, max_wait=1
+    )
+
+    asyncio.run(flusher.close())
+
+    assert dao.staged == 0
+
+
+def test_staging_dao_appends_to_staging_table():
+    assert WalletDAO(None, ledger_staging=True).ledger_table is operation_staging
+
+
+def test_flusher_moves_staged_operations_to_the_ledger(session_factory):
+    dao = WalletDAO(session_factory, ledger_staging=True)
+    flusher = LedgerFlusher(
+        dao, batch_size=2, interval=1, max_depth=100, max_wait=1
+    )
+    wallet_uuid = str(uuid.uuid4())
+
+    async def count(table):
+        async with session_factory() as session:
+            return await session.scalar(select(func.count()).select_from(table))
+
+    async def main():
+        await dao.create_wallet(wallet_uuid)
+        for amount in (10, 20, 30):
+            await dao.process_operation(wallet_uuid, OperationType.DEPOSIT, amount)
+        staged = await count(operation_staging)
+        flushed = await flusher.flush()
+        # The plain DAO reads ``operation`` alone
+        history, _ = await WalletDAO(session_factory).get_operations(
+            wallet_uuid, limit=10
+        )
+        return staged, flushed, await count(operation_staging), history
+
+    staged, flushed, left, history = asyncio.run(main())
+
+    assert (staged, flushed, left) == (3, 3, 0)
+    assert [row["amount"] for row in history] == [money.parse(a) for a in (30, 20, 10)]
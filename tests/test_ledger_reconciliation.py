@@ -0,0 +1,115 @@
+import asyncio
+import uuid
+
+import numpy as np
+from sqlalchemy import insert, update
+
+from database.dao.wallet_dao import WalletDAO
+from database.models.wallet import wallets
+from database.models.withdraw import OperationType, operations
+from money import money
+from services.ledger_reconciliation import (
+    Discrepancy,
+    LedgerAccumulator,
+    LedgerReconciliation,
+)
+
+
+def test_accumulator_sums_signed_amounts_per_wallet():
+    accumulator = LedgerAccumulator(
+        {"w1": 0, "w2": 1}, np.zeros(2, dtype=np.int64), horizon=100
+    )
+
+    accumulator.add(["w1", "w2", "w1"], [1, 2, 3], [500, 700, -200])
+    accumulator.add(["w2"], [4], [-100])
+
+    assert accumulator.totals.tolist() == [300, 600]
+    assert accumulator.rows == 4
+
+
+def test_accumulator_skips_checkpointed_operations():
+    accumulator = LedgerAccumulator(
+        {"w1": 0, "w2": 1}, np.array([5, 0], dtype=np.int64), horizon=100
+    )
+
+    accumulator.add(["w1", "w1", "w2"], [4, 6, 3], [1000, 10, 20])
+
+    assert accumulator.totals.tolist() == [10, 20]
+
+
+def test_only_operations_below_horizon_are_settled():
+    accumulator = LedgerAccumulator(
+        {"w1": 0}, np.zeros(1, dtype=np.int64), horizon=3
+    )
+
+    accumulator.add(["w1", "w1", "w1"], [1, 2, 3], [1, 10, 100])
+
+    assert accumulator.totals.tolist() == [111]
+    assert accumulator.settled_totals.tolist() == [11]
+
+
+def test_reconciliation_reports_balances_off_their_ledger(session_factory):
+    dao = WalletDAO(session_factory)
+    reconciliation = LedgerReconciliation(session_factory, chunk_size=2)
+    first_uuid, second_uuid = str(uuid.uuid4()), str(uuid.uuid4())
+
+    async def main():
+        await dao.create_wallets([(first_uuid, 100), (second_uuid, 50)])
+        await dao.process_operation(first_uuid, OperationType.WITHDRAW, 30)
+        first = await reconciliation.run()
+        async with session_factory() as session:
+            async with session.begin():
+                await session.execute(
+                    update(wallets)
+                    .where(wallets.c.uuid == second_uuid)
+                    .values(balance=money.parse(60))
+                )
+        await dao.process_operation(first_uuid, OperationType.DEPOSIT, 5)
+        return first, await reconciliation.run()
+
+    first, second = asyncio.run(main())
+
+    assert (first.wallets_checked, first.operations_scanned) == (2, 3)
+    assert first.discrepancies == []
+    # Only the deposit is newer than the checkpoints
+    assert second.scanned_from_txid == first.checkpoint_txid
+    assert second.operations_scanned == 1
+    assert second.discrepancies == [
+        Discrepancy(
+            wallet_uuid=second_uuid,
+            balance=money.parse(60),
+            ledger_balance=money.parse(50),
+            difference=money.parse(10),
+        )
+    ]
+
+
+def test_reconciliation_counts_operations_committed_out_of_order(session_factory):
+    dao = WalletDAO(session_factory)
+    reconciliation = LedgerReconciliation(session_factory, chunk_size=100)
+    slow_uuid, fast_uuid = str(uuid.uuid4()), str(uuid.uuid4())
+
+    async def main():
+        await dao.create_wallets([(slow_uuid, 100), (fast_uuid, 100)])
+        async with session_factory() as slow:
+            async with slow.begin():
+                # Takes the lower operation id and commits last
+                await slow.execute(
+                    insert(operations).values(
+                        wallet_uuid=slow_uuid,
+                        operation_type=OperationType.DEPOSIT,
+                        amount=money.parse(5),
+                    )
+                )
+                await slow.execute(
+                    update(wallets)
+                    .where(wallets.c.uuid == slow_uuid)
+                    .values(balance=wallets.c.balance + money.parse(5))
+                )
+                await dao.process_operation(fast_uuid, OperationType.DEPOSIT, 10)
+                while_in_flight = await reconciliation.run()
+        return while_in_flight, await reconciliation.run(), await reconciliation.run()
+
+    reports = asyncio.run(main())
+
+    assert [report.discrepancies for report in reports] == [[], [], []]
@@ -0,0 +1,53 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from middlewares import MetricsMiddleware
+from services.metrics import HTTP_REQUESTS, Counter, Histogram, _registry
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_latency_seconds", "Test.", ["phase"], buckets=(0.1, 1))
+    _registry.remove(histogram)
+    histogram.observe(0.05, "lock")
+    histogram.observe(0.5, "lock")
+    histogram.observe(5, "lock")
+
+    lines = histogram.render().splitlines()
+
+    assert lines[:2] == [
+        "# HELP test_latency_seconds Test.",
+        "# TYPE test_latency_seconds histogram",
+    ]
+    assert lines[2:] == [
+        'test_latency_seconds_bucket{phase="lock",le="0.1"} 1',
+        'test_latency_seconds_bucket{phase="lock",le="1"} 2',
+        'test_latency_seconds_bucket{phase="lock",le="+Inf"} 3',
+        'test_latency_seconds_sum{phase="lock"} 5.55',
+        'test_latency_seconds_count{phase="lock"} 3',
+    ]
+
+
+def test_counter_without_labels():
+    counter = Counter("test_total", "Test.")
+    _registry.remove(counter)
+    counter.inc()
+    counter.inc(amount=2)
+
+    assert counter.render().splitlines()[-1] == "test_total 3.0"
+
+
+def test_middleware_labels_requests_with_route_template():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/wallet/{wallet_uuid}")
+    async def get_wallet(wallet_uuid: str):
+        return {}
+
+    client = TestClient(app)
+    client.get("/wallet/a")
+    client.get("/wallet/b")
+    client.get("/missing")
+
+    assert HTTP_REQUESTS.values[("GET", "/wallet/{wallet_uuid}", "200")] == 2
+    assert HTTP_REQUESTS.values[("GET", "unmatched", "404")] == 1
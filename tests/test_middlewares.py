@@ -0,0 +1,248 @@
+import asyncio
+import logging
+import uuid
+
+import httpx
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from starlette.responses import StreamingResponse
+
+from database.dao.wallet_dao import WalletDAO
+from database.models.wallet import wallets
+from database.models.withdraw import OperationType
+from middlewares import (
+    AdmissionControlMiddleware,
+    GlobalResponsesMiddleware,
+    TimingMiddleware,
+)
+from services.admission import AdmissionController, request_deadline
+
+
+def make_client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(TimingMiddleware)
+    app.add_middleware(GlobalResponsesMiddleware)
+
+    @app.get("/wallet/{wallet_uuid}")
+    async def get_wallet(wallet_uuid: str):
+        raise HTTPException(status_code=404, detail="Wallet not found")
+
+    @app.get("/crash")
+    async def crash():
+        raise RuntimeError("boom")
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            yield b"partial "
+            yield b"output"
+
+        return StreamingResponse(chunks(), status_code=500)
+
+    return TestClient(app, raise_server_exceptions=False)
+
+
+def test_unknown_url_gets_global_404_body():
+    response = make_client().get("/unknown")
+
+    assert response.status_code == 404
+    assert response.text == "Page not found"
+
+
+def test_endpoint_404_keeps_its_body():
+    response = make_client().get("/wallet/missing")
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Wallet not found"}
+
+
+def test_unhandled_exception_gets_global_500_body():
+    response = make_client().get("/crash")
+
+    assert response.status_code == 500
+    assert response.text == "Internal server error"
+
+
+def test_streaming_500_body_is_replaced():
+    response = make_client().get("/stream")
+
+    assert response.status_code == 500
+    assert response.text == "Internal server error"
+
+
+def test_timing_is_logged_at_debug(caplog):
+    with caplog.at_level(logging.DEBUG):
+        make_client().get("/unknown?page=2")
+
+    assert any(
+        "Method: GET, URL: /unknown?page=2, Time:" in record.getMessage()
+        for record in caplog.records
+    )
+
+
+def run_admission_requests(controller, requests, timeout_ms=None):
+    app = FastAPI()
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        controller=controller,
+        path_prefix="/wallet",
+        retry_after=2,
+    )
+
+    @app.get("/wallet/{wallet_uuid}")
+    async def get_wallet(wallet_uuid: str):
+        await asyncio.sleep(0.05)
+        return {"wallet_uuid": wallet_uuid}
+
+    async def main():
+        headers = {"X-Request-Timeout-Ms": str(timeout_ms)} if timeout_ms else {}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            return await asyncio.gather(
+                *(client.get(path, headers=headers) for path in requests)
+            )
+
+    return asyncio.run(main())
+
+
+def test_hot_wallet_over_its_limit_gets_429():
+    controller = AdmissionController(
+        max_in_flight=10, max_queue=10, max_per_wallet=2, queue_timeout=1
+    )
+
+    responses = run_admission_requests(
+        controller, ["/wallet/w1"] * 3 + ["/wallet/w2"]
+    )
+
+    assert sorted(response.status_code for response in responses) == [
+        200, 200, 200, 429,
+    ]  # fmt: skip
+    rejected = next(r for r in responses if r.status_code == 429)
+    assert rejected.headers["retry-after"] == "2"
+    assert controller.stats()["shed"] == {"wallet_queue_full": 1}
+
+
+def test_full_queue_is_shed_with_503():
+    controller = AdmissionController(
+        max_in_flight=1, max_queue=1, max_per_wallet=10, queue_timeout=1
+    )
+
+    responses = run_admission_requests(
+        controller, [f"/wallet/w{i}" for i in range(3)]
+    )
+
+    assert sorted(response.status_code for response in responses) == [200, 200, 503]
+    assert controller.stats()["queued_total"] == 1
+    assert controller.stats()["shed"] == {"queue_full": 1}
+
+
+def test_request_past_its_deadline_gets_503():
+    controller = AdmissionController(
+        max_in_flight=10, max_queue=10, max_per_wallet=10, queue_timeout=1
+    )
+
+    (response,) = run_admission_requests(controller, ["/wallet/w1"], timeout_ms=10)
+
+    assert response.status_code == 503
+    assert response.json() == {"detail": "deadline_exceeded"}
+    assert controller.stats()["in_flight"] == 0
+
+
+def deadline_app(write):
+    """App whose ``POST /wallet/{uuid}`` runs ``write`` under admission control."""
+    app = FastAPI()
+    app.add_middleware(
+        AdmissionControlMiddleware,
+        controller=AdmissionController(
+            max_in_flight=10, max_queue=10, max_per_wallet=10, queue_timeout=1
+        ),
+        path_prefix="/wallet",
+    )
+
+    @app.post("/wallet/{wallet_uuid}")
+    async def post_wallet(wallet_uuid: str):
+        return {"balance": await write(wallet_uuid)}
+
+    return app
+
+
+def post_with_deadline(app, wallet_uuid, timeout_ms):
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://test"
+        ) as client:
+            return await client.post(
+                f"/wallet/{wallet_uuid}",
+                headers={"X-Request-Timeout-Ms": str(timeout_ms)},
+            )
+
+    return asyncio.run(main())
+
+
+def test_deadline_passing_after_the_transaction_started_is_not_a_503():
+    committed = []
+
+    async def write(wallet_uuid):
+        # What the database layer does when the transaction begins
+        request_deadline.get().start_transaction()
+        await asyncio.sleep(0.05)
+        committed.append(wallet_uuid)
+        return 10
+
+    response = post_with_deadline(deadline_app(write), "w1", timeout_ms=10)
+
+    assert response.status_code == 200
+    assert committed == ["w1"]
+
+
+def test_deadline_passing_after_the_commit_keeps_the_write(session_factory):
+    dao = WalletDAO(session_factory)
+    wallet_uuid = str(uuid.uuid4())
+
+    async def write(wallet_uuid):
+        new_balance = await dao.process_operation(
+            wallet_uuid, OperationType.DEPOSIT, 10
+        )
+        # The deadline passes after the commit, before the response
+        await asyncio.sleep(0.2)
+        return new_balance
+
+    asyncio.run(dao.create_wallet(wallet_uuid))
+    response = post_with_deadline(deadline_app(write), wallet_uuid, timeout_ms=100)
+
+    assert response.status_code == 200
+    assert response.json() == {"balance": 10.0}
+    assert asyncio.run(dao.get_balance(wallet_uuid)) == 10.0
+
+
+def test_deadline_passing_during_the_write_rolls_it_back(session_factory):
+    dao = WalletDAO(session_factory)
+    wallet_uuid = str(uuid.uuid4())
+
+    async def write(wallet_uuid):
+        return await dao.process_operation(wallet_uuid, OperationType.DEPOSIT, 10)
+
+    async def main():
+        await dao.create_wallet(wallet_uuid)
+        async with session_factory() as holder:
+            async with holder.begin():
+                # Holds the wallet row past the deadline, so lock_timeout fires
+                await holder.execute(
+                    update(wallets)
+                    .where(wallets.c.uuid == wallet_uuid)
+                    .values(balance=wallets.c.balance)
+                )
+                response = await asyncio.to_thread(
+                    post_with_deadline, deadline_app(write), wallet_uuid, 100
+                )
+        return response, await dao.get_balance(wallet_uuid)
+
+    response, balance = asyncio.run(main())
+
+    assert response.status_code == 503
+    assert response.json() == {"detail": "deadline_exceeded"}
+    assert balance == 0.0
@@ -0,0 +1,60 @@
+import asyncio
+from decimal import Decimal
+
+import pytest
+from pydantic import BaseModel, ValidationError
+
+from database.dao.wallet_dao import WalletDAO, apply_operation
+from database.models.withdraw import OperationType
+from exceptions import InsufficientFundsError
+from lifespan import check_money_mode
+from money import DecimalMoney, MinorUnitsMoney
+from settings import settings
+
+
+def test_decimal_mode_parses_exactly():
+    money = DecimalMoney()
+
+    assert money.parse(0.1) == Decimal("0.1")
+    assert money.parse(Decimal("10.25")) == Decimal("10.25")
+    assert money.to_api(Decimal("10.25")) == 10.25
+    assert money.from_minor_units(1025) == Decimal("10.25")
+
+
+def test_minor_units_mode_uses_integers():
+    money = MinorUnitsMoney()
+
+    assert money.parse(1025) == 1025
+    assert money.parse(Decimal("1025")) == 1025
+    with pytest.raises(ValueError):
+        money.parse(Decimal("10.25"))
+
+    balance = apply_operation(1000, OperationType.WITHDRAW, money.parse(250))
+    assert balance == 750 and isinstance(balance, int)
+    with pytest.raises(InsufficientFundsError):
+        apply_operation(balance, OperationType.WITHDRAW, 751)
+
+
+def test_minor_units_api_types():
+    class Request(BaseModel):
+        amount: MinorUnitsMoney.amount_type
+
+    class Response(BaseModel):
+        balance: MinorUnitsMoney.balance_type
+
+    assert Request(amount=100).amount == 100
+    with pytest.raises(ValidationError):
+        Request(amount=10.5)
+    assert Response(balance=12345).model_dump_json() == '{"balance":12345}'
+
+
+def test_startup_checks_the_migrated_money_mode(session_factory, monkeypatch):
+    dao = WalletDAO(session_factory)
+    migrated_mode = settings.MONEY_MODE
+
+    asyncio.run(check_money_mode(dao))
+
+    other_mode = "decimal" if migrated_mode == "minor_units" else "minor_units"
+    monkeypatch.setattr(settings, "MONEY_MODE", other_mode)
+    with pytest.raises(RuntimeError, match=migrated_mode):
+        asyncio.run(check_money_mode(dao))
@@ -0,0 +1,118 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+
+from database.dao.wallet_dao import WalletDAO
+from database.models.withdraw import OperationType, operations
+from exceptions import InsufficientFundsError, WalletNotFoundError
+from services.operation_batcher import OperationBatcher
+
+
+def run_concurrently(batcher, submissions):
+    async def main():
+        return await asyncio.gather(
+            *(batcher.submit(*submission) for submission in submissions),
+            return_exceptions=True,
+        )
+
+    return asyncio.run(main())
+
+
+def test_operations_on_same_wallet_are_coalesced(fake_wallet_dao):
+    dao = fake_wallet_dao({"w1": 0})
+    batcher = OperationBatcher(dao, window=0.01, max_batch_size=100)
+
+    results = run_concurrently(
+        batcher, [("w1", OperationType.DEPOSIT, 10)] * 5
+    )
+
+    assert results == [10, 20, 30, 40, 50]
+    assert len(dao.calls) == 1
+
+
+def test_each_caller_gets_its_own_error_in_arrival_order(fake_wallet_dao):
+    dao = fake_wallet_dao({"w1": 5})
+    batcher = OperationBatcher(dao, window=0.01, max_batch_size=100)
+
+    results = run_concurrently(
+        batcher,
+        [
+            ("w1", OperationType.WITHDRAW, 10),
+            ("w1", OperationType.DEPOSIT, 10),
+            ("w1", OperationType.WITHDRAW, 10),
+        ],
+    )
+
+    assert isinstance(results[0], InsufficientFundsError)
+    assert results[1:] == [15, 5]
+
+
+def test_batches_are_split_by_wallet_and_size(fake_wallet_dao):
+    dao = fake_wallet_dao({"w1": 0, "w2": 0})
+    batcher = OperationBatcher(dao, window=0.01, max_batch_size=2)
+
+    run_concurrently(
+        batcher,
+        [("w1", OperationType.DEPOSIT, 1)] * 3
+        + [("w2", OperationType.DEPOSIT, 1)],
+    )
+
+    assert sorted(len(ops) for _, ops in dao.calls) == [1, 1, 2]
+    assert not batcher._queues and not batcher._workers
+
+
+def test_batch_failure_is_propagated_to_every_caller(fake_wallet_dao):
+    dao = fake_wallet_dao({})
+    batcher = OperationBatcher(dao, window=0.01, max_batch_size=100)
+
+    results = run_concurrently(
+        batcher, [("missing", OperationType.DEPOSIT, 1)] * 2
+    )
+
+    assert all(isinstance(result, WalletNotFoundError) for result in results)
+
+
+@pytest.mark.parametrize("window", [0, 0.005])
+def test_close_waits_for_pending_operations(fake_wallet_dao, window):
+    dao = fake_wallet_dao({"w1": 0})
+    batcher = OperationBatcher(dao, window=window, max_batch_size=100)
+
+    async def main():
+        task = asyncio.ensure_future(
+            batcher.submit("w1", OperationType.DEPOSIT, 1)
+        )
+        await asyncio.sleep(0)
+        await batcher.close()
+        return task.result()
+
+    assert asyncio.run(main()) == 1
+
+
+def test_batches_are_applied_by_the_dao(session_factory):
+    dao = WalletDAO(session_factory)
+    batcher = OperationBatcher(dao, window=0.01, max_batch_size=100)
+    wallet_uuid = str(uuid.uuid4())
+
+    async def main():
+        await dao.create_wallet(wallet_uuid, 5)
+        results = await asyncio.gather(
+            batcher.submit(wallet_uuid, OperationType.WITHDRAW, 10),
+            batcher.submit(wallet_uuid, OperationType.DEPOSIT, 10),
+            batcher.submit(wallet_uuid, OperationType.WITHDRAW, 10),
+            return_exceptions=True,
+        )
+        await batcher.close()
+        async with session_factory() as session:
+            ledger_rows = await session.scalar(
+                select(func.count()).select_from(operations)
+            )
+        return results, await dao.get_balance(wallet_uuid), ledger_rows
+
+    results, balance, ledger_rows = asyncio.run(main())
+
+    assert isinstance(results[0], InsufficientFundsError)
+    assert results[1:] == [15.0, 5.0]
+    # The opening deposit and the two applied operations
+    assert (balance, ledger_rows) == (5.0, 3)
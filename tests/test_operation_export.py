@@ -0,0 +1,79 @@
+import asyncio
+import csv
+import io
+import json
+import uuid
+
+import pytest
+
+from database.dao.wallet_dao import WalletDAO
+from database.models.withdraw import OperationType
+from money import money
+from settings import settings
+
+
+@pytest.fixture
+def wallet_uuid(session_factory, monkeypatch):
+    # Several chunks for three rows
+    monkeypatch.setattr(settings, "OPERATIONS_EXPORT_CHUNK_SIZE", 2)
+    dao = WalletDAO(session_factory)
+    wallet_uuid = str(uuid.uuid4())
+
+    async def main():
+        await dao.create_wallet(wallet_uuid, 100)
+        await dao.process_operation(wallet_uuid, OperationType.WITHDRAW, 30)
+        await dao.process_operation(wallet_uuid, OperationType.DEPOSIT, 5)
+
+    asyncio.run(main())
+    return wallet_uuid
+
+
+EXPECTED_ROWS = [("DEPOSIT", 100), ("WITHDRAW", 30), ("DEPOSIT", 5)]
+
+
+def export(client, wallet_uuid, export_format):
+    return client.get(
+        f"/api/v1/wallet/{wallet_uuid}/operations/export",
+        params={"format": export_format},
+    )
+
+
+def test_ndjson_export_streams_one_object_per_operation(api_client, wallet_uuid):
+    response = export(api_client, wallet_uuid, "ndjson")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"] == (
+        f'attachment; filename="{wallet_uuid}.ndjson"'
+    )
+    assert response.text.endswith("\n")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+    assert [(row["operation_type"], row["amount"]) for row in rows] == [
+        (operation_type, str(money.parse(amount)))
+        for operation_type, amount in EXPECTED_ROWS
+    ]
+    assert all(
+        set(row) == {"id", "operation_type", "amount", "created_at"} for row in rows
+    )
+
+
+def test_csv_export_has_one_header_and_a_row_per_operation(api_client, wallet_uuid):
+    response = export(api_client, wallet_uuid, "csv")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    header, *rows = csv.reader(io.StringIO(response.text))
+    assert header == ["id", "operation_type", "amount", "created_at"]
+    assert [(row[1], row[2]) for row in rows] == [
+        (operation_type, str(money.parse(amount)))
+        for operation_type, amount in EXPECTED_ROWS
+    ]
+
+
+@pytest.mark.parametrize("export_format", ["ndjson", "csv"])
+def test_export_of_unknown_wallet_is_404(api_client, export_format):
+    response = export(api_client, uuid.uuid4(), export_format)
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Wallet not found"}
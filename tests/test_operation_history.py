@@ -0,0 +1,93 @@
+import asyncio
+import uuid
+
+from sqlalchemy import text
+
+from database.dao.wallet_dao import WalletDAO
+from database.models.withdraw import OperationType
+
+
+def create_wallet_with_operations(session_factory, batched, single):
+    """Opening deposit, ``batched`` deposits in one transaction, then
+    ``single`` deposits in their own."""
+    dao = WalletDAO(session_factory)
+    wallet_uuid = str(uuid.uuid4())
+
+    async def main():
+        await dao.create_wallet(wallet_uuid, 1)
+        if batched:
+            # One transaction, so every row gets the same created_at
+            await dao.process_operations(
+                wallet_uuid, [(OperationType.DEPOSIT, 1)] * batched
+            )
+        for _ in range(single):
+            await dao.process_operation(wallet_uuid, OperationType.DEPOSIT, 1)
+
+    asyncio.run(main())
+    return wallet_uuid
+
+
+def fetch_pages(client, wallet_uuid, limit):
+    pages, cursor = [], None
+    while True:
+        params = {"limit": limit}
+        if cursor is not None:
+            params["cursor"] = cursor
+        response = client.get(f"/api/v1/wallet/{wallet_uuid}/operations", params=params)
+        assert response.status_code == 200
+        body = response.json()
+        pages.append(body["items"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_pages_split_rows_with_equal_created_at_by_id(api_client, session_factory):
+    wallet_uuid = create_wallet_with_operations(session_factory, batched=5, single=2)
+
+    pages = fetch_pages(api_client, wallet_uuid, limit=2)
+
+    items = [item for page in pages for item in page]
+    ids = [item["id"] for item in items]
+    assert [len(page) for page in pages] == [2, 2, 2, 2]
+    assert ids == sorted(set(ids), reverse=True)
+    # The batched rows share created_at and span three pages
+    assert len({item["created_at"] for item in items[2:7]}) == 1
+
+
+def test_full_last_page_has_no_cursor(api_client, session_factory):
+    wallet_uuid = create_wallet_with_operations(session_factory, batched=0, single=3)
+
+    assert [len(page) for page in fetch_pages(api_client, wallet_uuid, 2)] == [2, 2]
+    assert [len(page) for page in fetch_pages(api_client, wallet_uuid, 10)] == [4]
+
+
+def test_history_of_unknown_and_empty_wallets(api_client, session_factory):
+    empty_uuid = str(uuid.uuid4())
+    asyncio.run(WalletDAO(session_factory).create_wallet(empty_uuid))
+
+    empty = api_client.get(f"/api/v1/wallet/{empty_uuid}/operations")
+    unknown = api_client.get(f"/api/v1/wallet/{uuid.uuid4()}/operations")
+
+    assert empty.json() == {"items": [], "next_cursor": None}
+    assert unknown.status_code == 404
+
+
+def test_history_page_is_served_by_the_history_index(session_factory):
+    async def main():
+        async with session_factory() as session:
+            async with session.begin():
+                # The test tables are tiny; rule out the sequential scan
+                await session.execute(text("SET LOCAL enable_seqscan = off"))
+                plan = await session.scalar(
+                    text(
+                        "EXPLAIN (FORMAT JSON) SELECT id, operation_type, amount,"
+                        " created_at FROM wallet.operation"
+                        " WHERE wallet_uuid = '00000000-0000-0000-0000-000000000000'"
+                        " AND id < 100"
+                        " ORDER BY id DESC LIMIT 51"
+                    )
+                )
+        return str(plan)
+
+    assert "ix_operation_wallet_uuid_id" in asyncio.run(main())
@@ -0,0 +1,155 @@
+import asyncio
+import uuid
+from datetime import date, datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+
+from database.dao.wallet_dao import WalletDAO
+from database.models.rollup import RollupGranularity
+from database.models.withdraw import OperationType, operations
+from dependencies import get_wallet_stats_usecase
+from money import money
+from services.maintenance import rollup_operations_periodically
+from usecases.get_wallet_stats_usecase import GetWalletStatsUseCase
+
+WALLET_UUID = "6f0c2d6e-3b1a-4c1e-9a3e-0d7b1f3c5a01"
+ROLLED_UP_AT = datetime(2026, 9, 2, 12, 0, tzinfo=timezone.utc)
+
+
+class FakeRollupDAO:
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.calls = 0
+
+    async def rollup_operations(self, batch_size):
+        self.calls += 1
+        if not self.batches:
+            # Stops the job loop at its next pass
+            raise asyncio.CancelledError()
+        return self.batches.pop(0)
+
+
+class FakeStatsService:
+    async def get_operation_stats(self, wallet_uuid, granularity, since, until):
+        rows = [
+            {
+                "bucket": date(2026, 9, 1),
+                "deposits": 150,
+                "withdrawals": 40,
+                "net": 110,
+                "operations_count": 7,
+            }
+        ]
+        return rows, ROLLED_UP_AT
+
+
+def test_rollup_job_drains_batches_until_caught_up():
+    dao = FakeRollupDAO([(5, False), (3, False), (0, True)])
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(
+            rollup_operations_periodically(
+                dao, batch_size=10, interval=0
+            )
+        )
+
+    assert dao.calls == 4
+
+
+@pytest.mark.parametrize(
+    "enabled, since, until",
+    [(False, None, None), (True, date(2026, 2, 1), date(2026, 1, 1))],
+)
+def test_stats_usecase_rejects_invalid_requests(enabled, since, until):
+    usecase = GetWalletStatsUseCase(FakeStatsService(), enabled)
+
+    with pytest.raises(ValueError):
+        asyncio.run(
+            usecase.execute(WALLET_UUID, RollupGranularity.DAY, since, until)
+        )
+
+
+def test_stats_endpoint_returns_rollup_buckets():
+    import app as app_module
+
+    app = app_module.app
+    app.dependency_overrides[get_wallet_stats_usecase] = lambda: (
+        GetWalletStatsUseCase(FakeStatsService(), enabled=True)
+    )
+    try:
+        client = TestClient(app)
+        response = client.get(
+            f"/api/v1/wallet/{WALLET_UUID}/stats", params={"granularity": "month"}
+        )
+        malformed = client.get("/api/v1/wallet/not-a-uuid/stats")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["granularity"] == "month"
+    assert datetime.fromisoformat(body["rolled_up_at"]) == ROLLED_UP_AT
+    assert body["items"][0]["bucket"] == "2026-09-01"
+    assert body["items"][0]["net"] == 110
+    assert malformed.status_code == 422
+
+
+async def rollup_all(dao):
+    rolled_up, caught_up = 0, False
+    while not caught_up:
+        batch, caught_up = await dao.rollup_operations(batch_size=10**6)
+        rolled_up += batch
+    return rolled_up
+
+
+def test_rollup_waits_for_operations_committed_out_of_order(session_factory):
+    dao = WalletDAO(session_factory)
+    slow_uuid, fast_uuid = str(uuid.uuid4()), str(uuid.uuid4())
+
+    async def main():
+        await dao.create_wallets([(slow_uuid, 0), (fast_uuid, 0)])
+        async with session_factory() as slow:
+            async with slow.begin():
+                # Takes the lower operation id and commits last
+                await slow.execute(
+                    insert(operations).values(
+                        wallet_uuid=slow_uuid,
+                        operation_type=OperationType.DEPOSIT,
+                        amount=money.parse(5),
+                    )
+                )
+                await dao.process_operation(fast_uuid, OperationType.DEPOSIT, 10)
+                while_in_flight = await rollup_all(dao)
+        after_commit = await rollup_all(dao)
+        stats, _ = await dao.get_operation_stats(slow_uuid, RollupGranularity.DAY)
+        return while_in_flight, after_commit, stats
+
+    while_in_flight, after_commit, stats = asyncio.run(main())
+
+    assert (while_in_flight, after_commit) == (0, 2)
+    assert [(row["net"], row["operations_count"]) for row in stats] == [
+        (money.parse(5), 1)
+    ]
+
+
+def test_rollup_folds_each_operation_once(session_factory):
+    dao = WalletDAO(session_factory)
+    wallet_uuid = str(uuid.uuid4())
+
+    async def main():
+        await dao.create_wallet(wallet_uuid, 100)
+        await dao.process_operation(wallet_uuid, OperationType.WITHDRAW, 30)
+        await rollup_all(dao)
+        await dao.process_operation(wallet_uuid, OperationType.DEPOSIT, 5)
+        await rollup_all(dao)
+        return await dao.get_operation_stats(wallet_uuid, RollupGranularity.MONTH)
+
+    (row,), _ = asyncio.run(main())
+
+    assert (row["deposits"], row["withdrawals"], row["operations_count"]) == (
+        money.parse(105),
+        money.parse(30),
+        3,
+    )
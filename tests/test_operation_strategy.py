@@ -0,0 +1,103 @@
+import asyncio
+import uuid
+
+import asyncpg
+import pytest
+from sqlalchemy import func, select
+
+from database.dao.wallet_dao import WalletDAO
+from database.models.withdraw import OperationType, operations
+from exceptions import InsufficientFundsError, WalletNotFoundError
+from settings import settings
+
+MISSING_UUID = "00000000-0000-0000-0000-000000000000"
+
+
+def run_operations(session_factory, strategy):
+    dao = WalletDAO(session_factory, operation_strategy=strategy)
+    wallet_uuid = str(uuid.uuid4())
+    steps = [
+        (wallet_uuid, OperationType.DEPOSIT, 50),
+        (wallet_uuid, OperationType.WITHDRAW, 30),
+        (wallet_uuid, OperationType.WITHDRAW, 100),
+        (MISSING_UUID, OperationType.DEPOSIT, 10),
+        (MISSING_UUID, OperationType.WITHDRAW, 10),
+        (wallet_uuid, OperationType.WITHDRAW, 120),
+    ]
+
+    async def main():
+        await dao.create_wallet(wallet_uuid, 100)
+        outcomes = []
+        for step in steps:
+            try:
+                outcomes.append(await dao.process_operation(*step))
+            except (InsufficientFundsError, WalletNotFoundError) as e:
+                outcomes.append(type(e))
+        async with session_factory() as session:
+            ledger_rows = await session.scalar(
+                select(func.count()).where(operations.c.wallet_uuid == wallet_uuid)
+            )
+        return outcomes, ledger_rows, await dao.get_balance(wallet_uuid)
+
+    return asyncio.run(main())
+
+
+def test_strategies_agree_on_results_and_errors(session_factory):
+    for_update = run_operations(session_factory, WalletDAO.STRATEGY_FOR_UPDATE)
+    single_statement = run_operations(
+        session_factory, WalletDAO.STRATEGY_SINGLE_STATEMENT
+    )
+
+    assert for_update == single_statement
+    assert for_update == (
+        [
+            150.0,
+            120.0,
+            InsufficientFundsError,
+            WalletNotFoundError,
+            WalletNotFoundError,
+            0.0,
+        ],
+        # The opening deposit and the three applied operations
+        4,
+        0.0,
+    )
+
+
+async def rejected_withdrawal(dao, wallet_uuid, other_uuid):
+    await dao.process_operation(wallet_uuid, OperationType.WITHDRAW, 1000)
+
+
+async def rejected_transfer(dao, wallet_uuid, other_uuid):
+    await dao.transfer(wallet_uuid, other_uuid, 1000)
+
+
+@pytest.mark.parametrize(
+    "dao_options",
+    [
+        {"operation_strategy": WalletDAO.STRATEGY_SINGLE_STATEMENT},
+        {"wallet_slots": True},
+    ],
+)
+@pytest.mark.parametrize("rejected", [rejected_withdrawal, rejected_transfer])
+def test_only_applied_operations_notify(session_factory, dao_options, rejected):
+    dao = WalletDAO(session_factory, balance_notify_channel="balances", **dao_options)
+    wallet_uuid, other_uuid = str(uuid.uuid4()), str(uuid.uuid4())
+
+    async def main():
+        await dao.create_wallets([(wallet_uuid, 100), (other_uuid, 0)])
+        notified = []
+        listener = await asyncpg.connect(settings.db_dsn_postgres)
+        await listener.add_listener(
+            "balances", lambda *args: notified.append(args[-1])
+        )
+        try:
+            with pytest.raises(InsufficientFundsError):
+                await rejected(dao, wallet_uuid, other_uuid)
+            await dao.process_operation(wallet_uuid, OperationType.DEPOSIT, 5)
+            await asyncio.sleep(0.2)
+        finally:
+            await listener.close()
+        return notified
+
+    assert asyncio.run(main()) == [wallet_uuid]
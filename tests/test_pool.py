@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+from sqlalchemy import exc
+from sqlalchemy.util import greenlet_spawn
+
+from database.pool import InstrumentedAsyncPool, PoolStats
+from settings import settings
+
+
+class FakeConnection:
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_wait_histogram_buckets():
+    stats = PoolStats()
+    stats.observe_wait(0.0005)
+    stats.observe_wait(0.003)
+    stats.observe_wait(10)
+
+    histogram = stats.stats()["wait_histogram"]
+    assert histogram["le_1ms"] == 1
+    assert histogram["le_5ms"] == 1
+    assert histogram["le_inf"] == 1
+    assert stats.wait_time_max == 10
+
+
+def test_pool_records_checkouts_overflow_and_timeouts():
+    pool = InstrumentedAsyncPool(
+        FakeConnection, pool_size=1, max_overflow=1, timeout=0.01
+    )
+
+    def scenario():
+        first = pool.connect()
+        second = pool.connect()
+        snapshot = pool.snapshot()
+        with pytest.raises(exc.TimeoutError):
+            pool.connect()
+        first.close()
+        second.close()
+        return snapshot
+
+    snapshot = asyncio.run(greenlet_spawn(scenario))
+
+    assert snapshot["checked_out"] == 2
+    assert snapshot["overflow_in_use"] == 1
+    assert pool.stats.checkouts == 2
+    assert pool.stats.timeouts == 1
+    assert pool.stats.wait_time_max >= 0.01
+    assert pool.recreate().stats is pool.stats
+
+
+def test_connection_budget_includes_asyncpg_pool(monkeypatch):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 5)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 10)
+    monkeypatch.setattr(settings, "ASYNCPG_POOL_MAX_SIZE", 15)
+
+    monkeypatch.setattr(settings, "WALLET_DAO_BACKEND", "sqlalchemy")
+    assert settings.db_max_connections == 15
+
+    monkeypatch.setattr(settings, "WALLET_DAO_BACKEND", "asyncpg")
+    assert settings.db_max_connections == 30
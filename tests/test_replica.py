@@ -0,0 +1,62 @@
+from database.dao.wallet_dao import WalletDAO
+from database.replica import ReadConsistency, ReplicaRouter
+from dependencies import get_read_consistency
+from services.cache import LRUCache
+
+PRIMARY = object()
+REPLICA = object()
+
+
+def make_dao(lag=0.0, consistency=ReadConsistency.REPLICA):
+    router = ReplicaRouter(
+        REPLICA, max_lag=1.0, recent_writes=LRUCache(max_size=10, ttl=60)
+    )
+    router.lag = lag
+    return WalletDAO(PRIMARY, replica_router=router, read_consistency=consistency)
+
+
+def test_replica_consistency_reads_go_to_replica():
+    dao = make_dao()
+
+    assert dao._read_session_factory("w1") is REPLICA
+    assert dao.replica_router.stats()["replica_reads"] == 1
+
+
+def test_primary_consistency_header_overrides():
+    dao = make_dao(consistency=get_read_consistency(ReadConsistency.PRIMARY))
+
+    assert dao._read_session_factory("w1") is PRIMARY
+
+
+def test_reads_default_to_primary_without_header():
+    assert get_read_consistency(None) == ReadConsistency.PRIMARY
+
+
+def test_default_read_after_write_on_another_worker_goes_to_primary():
+    writer = make_dao()
+    reader = make_dao(consistency=get_read_consistency(None))
+    writer._wallets_written(["w1"])
+
+    # The reader's worker never saw the write, only the default protects it
+    assert reader._read_session_factory("w1") is PRIMARY
+
+
+def test_own_writes_are_read_from_primary():
+    dao = make_dao()
+    dao._wallets_written(["w1"])
+
+    assert dao._read_session_factory("w1") is PRIMARY
+    assert dao._read_session_factory("w2") is REPLICA
+
+
+def test_lagging_or_unmeasured_replica_falls_back_to_primary():
+    for lag in (None, 1.5):
+        dao = make_dao(lag=lag)
+
+        assert dao._read_session_factory("w1") is PRIMARY
+        assert dao.replica_router.stats()["fallbacks"] == 1
+        assert not dao.replica_router.healthy
+
+
+def test_without_replica_everything_reads_primary():
+    assert WalletDAO(PRIMARY)._read_session_factory("w1") is PRIMARY
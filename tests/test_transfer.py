@@ -0,0 +1,129 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from database.dao.wallet_dao import WalletDAO, apply_operation
+from database.models.withdraw import OperationType, operations
+from exceptions import InsufficientFundsError, WalletNotFoundError
+from money import money
+from usecases.process_wallet_operation_usecase import ProcessWalletOperationUseCase
+
+
+def test_transfer_goes_through_one_dao_call(wallet_service):
+    usecase = ProcessWalletOperationUseCase(wallet_service)
+
+    new_balance = asyncio.run(
+        usecase.execute("w1", "TRANSFER", 10, target_wallet_uuid="w2")
+    )
+
+    assert new_balance == 90.0
+    assert wallet_service.calls == [("transfer", "w1", "w2", 10)]
+
+
+@pytest.mark.parametrize(
+    "operation_type, target_wallet_uuid",
+    [("TRANSFER", None), ("TRANSFER_IN", "w2")],
+)
+def test_invalid_transfer_requests_are_rejected(
+    wallet_service, operation_type, target_wallet_uuid
+):
+    usecase = ProcessWalletOperationUseCase(wallet_service)
+
+    with pytest.raises(ValueError):
+        asyncio.run(
+            usecase.execute(
+                "w1", operation_type, 10, target_wallet_uuid=target_wallet_uuid
+            )
+        )
+
+
+def test_apply_operation_debits_transfer_and_credits_transfer_in():
+    assert apply_operation(100, OperationType.TRANSFER, 30) == 70
+    assert apply_operation(100, OperationType.TRANSFER_IN, 30) == 130
+    with pytest.raises(InsufficientFundsError):
+        apply_operation(10, OperationType.TRANSFER, 30)
+
+
+async def ledger_rows(session_factory):
+    async with session_factory() as session:
+        result = await session.execute(
+            select(
+                operations.c.wallet_uuid,
+                operations.c.operation_type,
+                operations.c.amount,
+            ).order_by(operations.c.id)
+        )
+        return result.all()
+
+
+def test_transfer_writes_paired_ledger_rows(session_factory):
+    dao = WalletDAO(session_factory)
+    source_uuid, target_uuid = str(uuid.uuid4()), str(uuid.uuid4())
+
+    async def main():
+        await dao.create_wallets([(source_uuid, 100), (target_uuid, 0)])
+        new_balance = await dao.transfer(source_uuid, target_uuid, 30)
+        return (
+            new_balance,
+            await dao.get_balance(target_uuid),
+            await ledger_rows(session_factory),
+        )
+
+    new_balance, target_balance, rows = asyncio.run(main())
+
+    assert (new_balance, target_balance) == (70.0, 30.0)
+    assert rows[1:] == [
+        (source_uuid, OperationType.TRANSFER, money.parse(30)),
+        (target_uuid, OperationType.TRANSFER_IN, money.parse(30)),
+    ]
+
+
+@pytest.mark.parametrize(
+    "amount, target_exists, error",
+    [(150, True, InsufficientFundsError), (30, False, WalletNotFoundError)],
+)
+def test_failed_transfer_changes_nothing(session_factory, amount, target_exists, error):
+    dao = WalletDAO(session_factory)
+    source_uuid, target_uuid = str(uuid.uuid4()), str(uuid.uuid4())
+    new_wallets = [(source_uuid, 100)] + [(target_uuid, 0)] * target_exists
+
+    async def main():
+        await dao.create_wallets(new_wallets)
+        with pytest.raises(error):
+            await dao.transfer(source_uuid, target_uuid, amount)
+        return await dao.get_balance(source_uuid), await ledger_rows(session_factory)
+
+    source_balance, rows = asyncio.run(main())
+
+    assert source_balance == 100.0
+    # Only the opening deposit
+    assert len(rows) == 1
+
+
+def test_opposite_transfers_do_not_deadlock(session_factory):
+    dao = WalletDAO(session_factory)
+    first_uuid, second_uuid = str(uuid.uuid4()), str(uuid.uuid4())
+
+    async def main():
+        await dao.create_wallets([(first_uuid, 1000), (second_uuid, 1000)])
+        # Both rows are locked in UUID order whatever the direction
+        await asyncio.gather(
+            *(
+                dao.transfer(source_uuid, target_uuid, 1)
+                for _ in range(20)
+                for source_uuid, target_uuid in (
+                    (first_uuid, second_uuid),
+                    (second_uuid, first_uuid),
+                )
+            )
+        )
+        return await dao.get_balance(first_uuid), await dao.get_balance(second_uuid)
+
+    assert asyncio.run(main()) == (1000.0, 1000.0)
+
+
+def test_transfer_to_the_same_wallet_is_rejected():
+    with pytest.raises(ValueError):
+        asyncio.run(WalletDAO(None).transfer("w1", "w1", 10))
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from database.dao.wallet_dao import WalletDAO
+from database.models.withdraw import OperationType, operations
+from exceptions import WalletAlreadyExistsError
+from money import money
+from settings import settings
+
+
+def ledger(session_factory):
+    async def main():
+        async with session_factory() as session:
+            result = await session.execute(
+                select(
+                    operations.c.wallet_uuid,
+                    operations.c.operation_type,
+                    operations.c.amount,
+                ).order_by(operations.c.id)
+            )
+            return result.all()
+
+    return asyncio.run(main())
+
+
+def test_create_wallet_endpoint(api_client):
+    response = api_client.post("/api/v1/wallet/")
+
+    assert response.status_code == 200
+    wallet_uuid = response.json()["wallet_uuid"]
+    assert api_client.get(f"/api/v1/wallet/{wallet_uuid}").json() == {"balance": 0}
+
+
+def test_create_wallets_skips_existing_uuids(session_factory):
+    dao = WalletDAO(session_factory)
+    existing, new, empty = (str(uuid.uuid4()) for _ in range(3))
+
+    async def main():
+        await dao.create_wallet(existing, 10)
+        created = await dao.create_wallets([(existing, 99), (new, 20), (empty, 0)])
+        with pytest.raises(WalletAlreadyExistsError):
+            await dao.create_wallet(new)
+        balances = [await dao.get_balance(uuid_) for uuid_ in (existing, new, empty)]
+        return created, balances
+
+    created, balances = asyncio.run(main())
+
+    assert sorted(created) == sorted([new, empty])
+    assert balances == [10.0, 20.0, 0.0]
+    # Opening deposits for the non-zero balances only
+    assert ledger(session_factory) == [
+        (existing, OperationType.DEPOSIT, money.parse(10)),
+        (new, OperationType.DEPOSIT, money.parse(20)),
+    ]
+
+
+def test_bulk_endpoint_streams_created_wallets(api_client, session_factory):
+    existing, new = str(uuid.uuid4()), str(uuid.uuid4())
+    asyncio.run(WalletDAO(session_factory).create_wallet(existing))
+
+    response = api_client.post(
+        "/api/v1/wallet/bulk",
+        json={
+            "wallets": [
+                {"wallet_uuid": existing, "initial_balance": 5},
+                {"wallet_uuid": new, "initial_balance": 5},
+            ]
+        },
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        {"wallet_uuid": new}
+    ]
+    assert api_client.get(f"/api/v1/wallet/{existing}").json() == {"balance": 0}
+    assert api_client.get(f"/api/v1/wallet/{new}").json() == {
+        "balance": money.to_api(money.parse(5))
+    }
+
+
+def test_bulk_endpoint_copies_generated_wallets(
+    api_client, session_factory, monkeypatch
+):
+    monkeypatch.setattr(settings, "WALLET_BULK_CREATE_CHUNK_SIZE", 2)
+
+    response = api_client.post("/api/v1/wallet/bulk", json={"count": 5})
+
+    assert response.status_code == 200
+    wallet_uuids = [
+        json.loads(line)["wallet_uuid"] for line in response.text.splitlines()
+    ]
+    assert len(set(wallet_uuids)) == 5
+    for wallet_uuid in wallet_uuids:
+        assert api_client.get(f"/api/v1/wallet/{wallet_uuid}").json() == {
+            "balance": 0
+        }
+    # COPY writes zero balances and no ledger rows
+    assert ledger(session_factory) == []
+
+
+@pytest.mark.parametrize(
+    "body",
+    [{}, {"count": 1, "wallets": [{"wallet_uuid": str(uuid.uuid4())}]}],
+)
+def test_bulk_request_needs_count_or_wallets(body):
+    import app as app_module
+
+    response = TestClient(app_module.app).post("/api/v1/wallet/bulk", json=body)
+
+    assert response.status_code == 422
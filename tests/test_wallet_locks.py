@@ -0,0 +1,67 @@
+import asyncio
+
+from services.wallet_locks import WalletLockManager
+
+
+def test_same_wallet_operations_are_serialized():
+    manager = WalletLockManager(stripes=16)
+    active = []
+    max_active = []
+
+    async def operation():
+        async with manager.lock("w1"):
+            active.append(1)
+            max_active.append(len(active))
+            await asyncio.sleep(0.001)
+            active.pop()
+
+    async def main():
+        await asyncio.gather(*(operation() for _ in range(5)))
+
+    asyncio.run(main())
+
+    stats = manager.stats()
+    assert max(max_active) == 1
+    assert stats["acquisitions"] == 5
+    assert stats["max_queue_depth"] == 4
+    assert stats["waiting"] == 0
+    assert stats["wait_time_max"] > 0
+
+
+def test_different_stripes_do_not_block_each_other():
+    manager = WalletLockManager(stripes=1024)
+    wallets = ["w1", "w2"]
+    while manager._stripe(wallets[0]) == manager._stripe(wallets[1]):
+        wallets[1] += "x"
+
+    async def main():
+        async with manager.lock(wallets[0]):
+            await asyncio.wait_for(_hold(manager, wallets[1]), timeout=1)
+
+    asyncio.run(main())
+
+
+async def _hold(manager, wallet_uuid):
+    async with manager.lock(wallet_uuid):
+        pass
+
+
+def test_opposite_transfers_do_not_deadlock():
+    manager = WalletLockManager(stripes=16)
+
+    async def transfer(source, target):
+        async with manager.lock_many([source, target]):
+            await asyncio.sleep(0.001)
+
+    async def main():
+        await asyncio.wait_for(
+            asyncio.gather(
+                *(transfer("w1", "w2") for _ in range(10)),
+                *(transfer("w2", "w1") for _ in range(10)),
+            ),
+            timeout=5,
+        )
+
+    asyncio.run(main())
+
+    assert manager.stats()["waiting"] == 0
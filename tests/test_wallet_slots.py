@@ -0,0 +1,219 @@
+import asyncio
+import uuid
+
+import pytest
+from sqlalchemy import select, update
+
+from database.dao.asyncpg_wallet_dao import AsyncpgWalletDAO
+from database.dao.wallet_dao import WalletDAO
+from database.models.wallet import wallets
+from database.models.wallet_slot import wallet_slots
+from database.models.withdraw import OperationType
+from exceptions import InsufficientFundsError, WalletNotFoundError
+from money import money
+from services.operation_batcher import OperationBatcher
+from usecases.set_wallet_slots_usecase import SetWalletSlotsUseCase
+
+
+def test_set_wallet_slots_requires_slot_mode_enabled(wallet_service):
+    usecase = SetWalletSlotsUseCase(wallet_service, enabled=False)
+    with pytest.raises(ValueError):
+        asyncio.run(usecase.execute("w1", 4))
+    assert wallet_service.calls == []
+
+    usecase = SetWalletSlotsUseCase(wallet_service, enabled=True)
+    assert asyncio.run(usecase.execute("w1", 4)) == 4
+    assert wallet_service.calls == [("set_wallet_slots", "w1", 4)]
+
+
+def test_operation_applied_on_a_slot_skips_the_wallet_row(session_factory):
+    dao = WalletDAO(session_factory, wallet_slots=True)
+    wallet_uuid = str(uuid.uuid4())
+
+    async def main():
+        await dao.create_wallet(wallet_uuid, 100)
+        await dao.set_wallet_slots(wallet_uuid, 4)
+        new_balance = await dao.process_operation(
+            wallet_uuid, OperationType.DEPOSIT, 5
+        )
+        async with session_factory() as session:
+            row_balance = await session.scalar(
+                select(wallets.c.balance).where(wallets.c.uuid == wallet_uuid)
+            )
+        return new_balance, row_balance, await dao.get_balance(wallet_uuid)
+
+    assert asyncio.run(main()) == (105.0, money.parse(0), 105.0)
+
+
+async def wallet_row_and_slots(session_factory, wallet_uuid):
+    async with session_factory() as session:
+        row_balance = await session.scalar(
+            select(wallets.c.balance).where(wallets.c.uuid == wallet_uuid)
+        )
+        slot_balances = await session.scalars(
+            select(wallet_slots.c.balance)
+            .where(wallet_slots.c.wallet_uuid == wallet_uuid)
+            .order_by(wallet_slots.c.slot)
+        )
+        return row_balance, sum(slot_balances.all())
+
+
+def test_deposit_waits_for_a_busy_slot_instead_of_folding(session_factory):
+    dao = WalletDAO(session_factory, wallet_slots=True)
+    wallet_uuid = str(uuid.uuid4())
+
+    async def main():
+        await dao.create_wallet(wallet_uuid, 100)
+        await dao.set_wallet_slots(wallet_uuid, 2)
+        async with session_factory() as holder:
+            async with holder.begin():
+                # Holds every slot, so the deposit has to wait for one
+                await holder.execute(
+                    update(wallet_slots)
+                    .where(wallet_slots.c.wallet_uuid == wallet_uuid)
+                    .values(balance=wallet_slots.c.balance + 5)
+                )
+                deposit = asyncio.create_task(
+                    dao.process_operation(wallet_uuid, OperationType.DEPOSIT, 10)
+                )
+                await asyncio.sleep(0.2)
+                assert not deposit.done()
+        new_balance = await deposit
+        return new_balance, await wallet_row_and_slots(session_factory, wallet_uuid)
+
+    # The slots keep the balance, the wallet row stays empty
+    assert asyncio.run(main()) == (120.0, (money.parse(0), money.parse(120)))
+
+
+def test_withdrawal_no_slot_covers_is_taken_across_slots(session_factory):
+    dao = WalletDAO(session_factory, wallet_slots=True)
+    wallet_uuid = str(uuid.uuid4())
+
+    async def main():
+        await dao.create_wallet(wallet_uuid, 100)
+        await dao.set_wallet_slots(wallet_uuid, 2)
+        async with session_factory() as session:
+            async with session.begin():
+                await session.execute(
+                    update(wallet_slots)
+                    .where(wallet_slots.c.wallet_uuid == wallet_uuid)
+                    .values(balance=money.parse(50))
+                )
+        new_balance = await dao.process_operation(
+            wallet_uuid, OperationType.WITHDRAW, 80
+        )
+        with pytest.raises(InsufficientFundsError):
+            await dao.process_operation(wallet_uuid, OperationType.WITHDRAW, 80)
+        return new_balance, await wallet_row_and_slots(session_factory, wallet_uuid)
+
+    assert asyncio.run(main()) == (20.0, (money.parse(0), money.parse(20)))
+
+
+def test_wallet_without_slots_in_slot_mode(session_factory):
+    dao = WalletDAO(session_factory, wallet_slots=True)
+    wallet_uuid = str(uuid.uuid4())
+
+    async def main():
+        await dao.create_wallet(wallet_uuid, 10)
+        deposit = await dao.process_operation(wallet_uuid, OperationType.DEPOSIT, 5)
+        with pytest.raises(InsufficientFundsError):
+            await dao.process_operation(wallet_uuid, OperationType.WITHDRAW, 30)
+        with pytest.raises(WalletNotFoundError):
+            await dao.process_operation(
+                str(uuid.uuid4()), OperationType.DEPOSIT, 5
+            )
+        return deposit, await dao.get_balance(wallet_uuid)
+
+    assert asyncio.run(main()) == (15.0, 15.0)
+
+
+@pytest.mark.parametrize(
+    "strategy", [WalletDAO.STRATEGY_FOR_UPDATE, WalletDAO.STRATEGY_SINGLE_STATEMENT]
+)
+def test_withdrawal_from_wallet_without_slots_in_slot_mode(session_factory, strategy):
+    dao = WalletDAO(session_factory, operation_strategy=strategy, wallet_slots=True)
+    wallet_uuid = str(uuid.uuid4())
+
+    async def main():
+        await dao.create_wallet(wallet_uuid, 100)
+        return await dao.process_operation(wallet_uuid, OperationType.WITHDRAW, 30)
+
+    assert asyncio.run(main()) == 70.0
+
+
+async def withdraw_keyed(dao, wallet_uuid, other_uuid):
+    return await dao.process_operation(
+        wallet_uuid, OperationType.WITHDRAW, 30, idempotency_key="slots-key"
+    )
+
+
+async def withdraw_batched(dao, wallet_uuid, other_uuid):
+    batcher = OperationBatcher(dao, window=0.01, max_batch_size=100)
+    new_balance = await batcher.submit(wallet_uuid, OperationType.WITHDRAW, 30)
+    await batcher.close()
+    return new_balance
+
+
+async def withdraw_in_batch(dao, wallet_uuid, other_uuid):
+    results = await dao.process_operations_batch(
+        [
+            (wallet_uuid, OperationType.WITHDRAW, 30),
+            (other_uuid, OperationType.DEPOSIT, 30),
+        ],
+        atomic=True,
+    )
+    return results[0]
+
+
+async def transfer_out(dao, wallet_uuid, other_uuid):
+    return await dao.transfer(wallet_uuid, other_uuid, 30)
+
+
+@pytest.mark.parametrize(
+    "dao_class, withdraw",
+    [
+        (WalletDAO, withdraw_keyed),
+        (WalletDAO, withdraw_batched),
+        (WalletDAO, withdraw_in_batch),
+        (WalletDAO, transfer_out),
+        (AsyncpgWalletDAO, withdraw_keyed),
+        (AsyncpgWalletDAO, transfer_out),
+    ],
+)
+def test_write_paths_see_the_slot_balances(session_factory, dao_class, withdraw):
+    dao = dao_class(session_factory, wallet_slots=True)
+    wallet_uuid, other_uuid = str(uuid.uuid4()), str(uuid.uuid4())
+
+    async def main():
+        await dao.create_wallets([(wallet_uuid, 100), (other_uuid, 0)])
+        # Slot 0 now holds the whole balance, the wallet row none of it
+        await dao.set_wallet_slots(wallet_uuid, 4)
+        new_balance = await withdraw(dao, wallet_uuid, other_uuid)
+        return new_balance, await dao.get_balance(wallet_uuid)
+
+    assert asyncio.run(main()) == (70.0, 70.0)
+
+
+def test_asyncpg_dao_waits_for_a_busy_slot(session_factory):
+    dao = AsyncpgWalletDAO(session_factory, wallet_slots=True)
+    wallet_uuid = str(uuid.uuid4())
+
+    async def main():
+        await dao.create_wallet(wallet_uuid, 100)
+        await dao.set_wallet_slots(wallet_uuid, 4)
+        async with session_factory() as holder:
+            async with holder.begin():
+                # Holds every slot, so the deposit waits for one; the prepared
+                # statements of the raw path would see the empty wallet row
+                await holder.execute(
+                    update(wallet_slots)
+                    .where(wallet_slots.c.wallet_uuid == wallet_uuid)
+                    .values(balance=wallet_slots.c.balance)
+                )
+                deposit = asyncio.create_task(
+                    dao.process_operation(wallet_uuid, OperationType.DEPOSIT, 10)
+                )
+                await asyncio.sleep(0.2)
+        return await deposit, await dao.get_balance(wallet_uuid)
+
+    assert asyncio.run(main()) == (110.0, 110.0)